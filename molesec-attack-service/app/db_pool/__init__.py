@@ -0,0 +1,39 @@
+"""Postgres database backend with in-process connection pooling.
+
+Opening a connection to the db takes a TCP + TLS + auth handshake, which
+with CONN_MAX_AGE = 0 is paid on every request. With this backend django
+still "closes" its connection at the end of every request, but the
+underlying connection goes back to a pool and is reused by the next
+request instead.
+
+USAGE
+
+DATABASES = {
+    "default": {
+        "ENGINE": "app.db_pool",
+        ...
+        # Optional, see PoolOptions in pool.py for the defaults.
+        "POOL": {"max_size": 20, "timeout": 10},
+    },
+}
+
+Keep "CONN_MAX_AGE": 0, so that connections are returned to the pool as
+soon as a request is done, the pool takes care of keeping them open.
+
+Pool counters and gauges can be read with get_pools_stats().
+
+Behind the Supabase pooler (PgBouncer in transaction mode, port 6543),
+as the profile data service is, this still pays off: PgBouncer shares
+server connections between clients, but every client connection to it
+still goes through the TCP + TLS + auth handshake, which is what the
+pool saves. Pooled connections must not rely on session state, which
+transaction mode doesn't keep anyway, and they're rolled back when
+returned to the pool.
+
+The profile data service has a copy of this package, tests included,
+keep both in sync. The services are deployed separately, each from its
+own directory and requirements, and don't share any code.
+"""
+from app.db_pool.pool import PoolTimeoutError, close_pools, get_pools_stats
+
+__all__ = ["PoolTimeoutError", "close_pools", "get_pools_stats"]
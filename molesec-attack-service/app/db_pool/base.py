@@ -0,0 +1,52 @@
+"""Postgres backend handing out pooled connections.
+
+Same as django's postgresql backend, except that connections are checked
+out of a pool (see pool.py) when django opens them and returned to it
+when django closes them, e.g. at the end of every request.
+"""
+import psycopg2.extras
+from django.db.backends.postgresql import base
+
+from app.db_pool import pool as db_pool
+from app.db_pool.creation import DatabaseCreation
+
+
+def _connect(conn_params, options):
+    # What django's get_new_connection does, minus setting
+    # self.isolation_level, which is done for every checkout instead.
+    connection = base.Database.connect(**conn_params)
+    isolation_level = options.get("isolation_level")
+    if isolation_level is not None and isolation_level != connection.isolation_level:
+        connection.set_session(isolation_level=isolation_level)
+    # See django's get_new_connection.
+    psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+    return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict["OPTIONS"]
+        pool = db_pool.get_pool(
+            self.alias,
+            conn_params,
+            self.settings_dict.get("POOL", {}),
+            connect=lambda: _connect(conn_params, options),
+        )
+        connection = pool.get()
+        self.isolation_level = options.get(
+            "isolation_level", connection.isolation_level
+        )
+        self._pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = getattr(self, "_pool", None)
+        if pool is None:
+            super()._close()
+            return
+        with self.wrap_database_errors:
+            pool.put(self.connection)
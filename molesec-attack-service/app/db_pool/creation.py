@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from app.db_pool import pool as db_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test db would make DROP
+        # DATABASE fail.
+        db_pool.close_pools(database=test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
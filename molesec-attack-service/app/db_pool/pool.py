@@ -0,0 +1,301 @@
+"""A small, thread/greenlet safe pool of psycopg2 connections.
+
+Plain threading primitives are used, which gunicorn's eventlet worker
+monkey patches into their green counterparts, so the pool works the
+same way with real threads (runserver, tests, management commands) and
+with greenlets (the web dynos).
+
+Connections are handed out LIFO, so that the most recently used ones
+are kept warm and the others age out after max_idle seconds.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    """No connection became available in time.
+
+    Subclasses psycopg2's OperationalError so that django wraps it into
+    its own OperationalError, like any other connection failure.
+    """
+
+
+@dataclass
+class PoolOptions:
+    # Max number of connections, idle or in use, kept by the pool.
+    max_size: int = 20
+    # Seconds to wait for a connection when max_size is reached.
+    timeout: float = 10.0
+    # Connections idle for longer than this are checked with a
+    # "SELECT 1" before being handed out.
+    health_check_after: float = 30.0
+    # Connections idle for longer than this are closed.
+    max_idle: float = 300.0
+    # Connections older than this are closed once returned.
+    max_lifetime: float = 3600.0
+
+    @classmethod
+    def from_dict(cls, options: Dict[str, Any]) -> "PoolOptions":
+        names = {field.name for field in fields(cls)}
+        unknown = set(options) - names
+        if unknown:
+            raise ValueError(f"Unknown pool options: {', '.join(sorted(unknown))}.")
+        return cls(**options)
+
+
+@dataclass
+class _Entry:
+    connection: Any
+    created_at: float
+    last_used_at: float
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        name: str,
+        database: Optional[str],
+        connect: Callable[[], Any],
+        options: PoolOptions,
+    ) -> None:
+        self.name = name
+        self.database = database
+        self.options = options
+        self._connect = connect
+        self._condition = threading.Condition()
+        self._idle: Deque[_Entry] = deque()
+        self._in_use: Dict[int, _Entry] = {}
+        # Idle + in use + being opened.
+        self._size = 0
+        self._counters: Counter = Counter()
+
+    def get(self):
+        """Checks out a connection, opening one if needed.
+
+        Raises:
+            PoolTimeoutError: if the pool is exhausted for longer than
+                options.timeout.
+        """
+        deadline = time.monotonic() + self.options.timeout
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                entry = self._open()
+            elif not self._is_healthy(entry):
+                self._discard(entry, counter="health_check_failures")
+                continue
+
+            with self._condition:
+                self._in_use[id(entry.connection)] = entry
+                self._counters["checkouts"] += 1
+            return entry.connection
+
+    def put(self, connection) -> None:
+        """Returns a connection to the pool.
+
+        Open transactions are rolled back. Broken or expired connections
+        are closed instead of being kept.
+        """
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Not ours, e.g. the pool has been closed in the meantime.
+            _close_quietly(connection)
+            return
+
+        now = time.monotonic()
+        if now - entry.created_at > self.options.max_lifetime or not _reset(connection):
+            self._discard(entry, counter="discarded")
+            return
+
+        entry.last_used_at = now
+        with self._condition:
+            self._idle.append(entry)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Closes the idle connections.
+
+        Connections in use are closed when returned.
+        """
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            # Connections in use are closed rather than kept when
+            # returned, see put.
+            self._size -= len(self._in_use)
+            self._in_use.clear()
+            self._condition.notify_all()
+        for entry in idle:
+            _close_quietly(entry.connection)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.options.max_size,
+                **self._counters,
+            }
+
+    def _reserve(self, deadline: float) -> Optional[_Entry]:
+        """Takes an idle connection or a slot to open a new one.
+
+        Returns:
+            An idle entry, or None if the caller should open a new
+            connection.
+        """
+        expired: List[_Entry] = []
+        waited_since = None
+        try:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    while self._idle:
+                        entry = self._idle.pop()
+                        if now - entry.last_used_at > self.options.max_idle:
+                            expired.append(entry)
+                            self._size -= 1
+                            self._counters["expired"] += 1
+                            continue
+                        return entry
+                    if self._size < self.options.max_size:
+                        self._size += 1
+                        return None
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Couldn't get a connection from pool {self.name} "
+                            f"within {self.options.timeout}s, "
+                            f"{self.options.max_size} connections in use."
+                        )
+                    if waited_since is None:
+                        waited_since = now
+                        self._counters["waits"] += 1
+                    self._condition.wait(remaining)
+        finally:
+            if waited_since is not None:
+                self._counters["wait_ms"] += int(
+                    (time.monotonic() - waited_since) * 1000
+                )
+            for entry in expired:
+                _close_quietly(entry.connection)
+
+    def _open(self) -> _Entry:
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._counters["opened"] += 1
+        now = time.monotonic()
+        return _Entry(connection=connection, created_at=now, last_used_at=now)
+
+    def _is_healthy(self, entry: _Entry) -> bool:
+        connection = entry.connection
+        if connection.closed:
+            return False
+        if time.monotonic() - entry.last_used_at < self.options.health_check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _discard(self, entry: _Entry, counter: str) -> None:
+        _close_quietly(entry.connection)
+        with self._condition:
+            # The pool might have been closed in the meantime.
+            self._size = max(0, self._size - 1)
+            self._counters[counter] += 1
+            self._condition.notify()
+
+
+def _reset(connection) -> bool:
+    """Brings a returned connection back to an idle state."""
+    if connection.closed:
+        return False
+    try:
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+def _close_quietly(connection) -> None:
+    try:
+        connection.close()
+    except psycopg2.Error:
+        logging.exception("Failed to close a pooled connection.")
+
+
+_pools_lock = threading.Lock()
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+
+
+def get_pool(
+    alias: str,
+    conn_params: Dict[str, Any],
+    options: Dict[str, Any],
+    connect: Callable[[], Any],
+) -> ConnectionPool:
+    """Returns the pool for a db alias and connection parameters.
+
+    Pools are keyed by connection parameters as well, since the test
+    runner switches the db name of an alias on the fly.
+    """
+    key = (alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            database = conn_params.get("database")
+            pool = ConnectionPool(
+                f"{alias}:{database}",
+                database,
+                connect,
+                PoolOptions.from_dict(options),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_pools(database: Optional[str] = None) -> None:
+    """Closes the idle connections of the pools of a db, or of all."""
+    with _pools_lock:
+        pools = [
+            pool
+            for pool in _pools.values()
+            if database is None or pool.database == database
+        ]
+    for pool in pools:
+        pool.close()
+
+
+def get_pools_stats() -> List[Dict[str, Any]]:
+    """Returns counters and gauges of all the pools of the process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from psycopg2 import extensions
+
+from app.db_pool import pool as db_pool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = True
+        self.rollbacks = 0
+        self.info = self
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+def create_pool(**options) -> db_pool.ConnectionPool:
+    return db_pool.ConnectionPool(
+        "test", "test", FakeConnection, db_pool.PoolOptions(**options)
+    )
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def test_reuses_returned_connections(self):
+        pool = create_pool()
+        connection_ = pool.get()
+        pool.put(connection_)
+
+        self.assertIs(pool.get(), connection_)
+        self.assertEqual(pool.stats()["opened"], 1)
+        self.assertEqual(pool.stats()["checkouts"], 2)
+
+    def test_rolls_back_open_transactions_on_return(self):
+        pool = create_pool()
+        connection_ = pool.get()
+        connection_.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        pool.put(connection_)
+
+        self.assertEqual(connection_.rollbacks, 1)
+        self.assertIs(pool.get(), connection_)
+
+    def test_discards_broken_connections(self):
+        pool = create_pool()
+        connection_ = pool.get()
+        connection_.close()
+        pool.put(connection_)
+
+        self.assertIsNot(pool.get(), connection_)
+        self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_times_out_when_exhausted(self):
+        pool = create_pool(max_size=1, timeout=0.01)
+        pool.get()
+
+        with self.assertRaises(db_pool.PoolTimeoutError):
+            pool.get()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_closes_expired_connections(self):
+        pool = create_pool(max_idle=10)
+        connection_ = pool.get()
+        pool.put(connection_)
+
+        with patch("time.monotonic", return_value=10**9):
+            self.assertIsNot(pool.get(), connection_)
+        self.assertTrue(connection_.closed)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
+class DatabaseWrapperTestCase(TransactionTestCase):
+    def test_connection_is_reused_across_requests(self):
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        connection.close()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw_connection)
@@ -0,0 +1,33 @@
+"""orjson based rendering, used when FAST_JSON_RENDERING is enabled.
+
+orjson natively serializes UUIDs, dates and datetimes, so it's fed
+plain dicts (see core/fast_serializers.py) rather than the
+output of DRF serializers. The output matches the one of the default
+DRF JSONRenderer.
+"""
+from typing import Any
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+_fallback_encoder = encoders.JSONEncoder()
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data: Any) -> bytes:
+    # Anything orjson doesn't know about (Decimal, lazy strings etc.)
+    # is handled like DRF would.
+    return orjson.dumps(data, default=_fallback_encoder.default, option=_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        return dumps(data)
@@ -83,6 +83,15 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Opt-in fast path: plain dict serializers for the hot read models and
+# orjson rendering, see core/fast_serializers.py.
+FAST_JSON_RENDERING = ast.literal_eval(os.getenv("FAST_JSON_RENDERING", "False"))
+if FAST_JSON_RENDERING:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "app.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "AttackService docs",
     "VERSION": "0.1.0",
@@ -162,7 +171,8 @@ LOGGING = {
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        # Postgres with in-process connection pooling, see app/db_pool.
+        "ENGINE": "app.db_pool",
         "NAME": "postgres",
         "HOST": os.getenv("DB_HOST"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
@@ -174,6 +184,13 @@ DATABASES = {
             if os.getenv("DB_HOST", "").startswith("localhost") is not True
             else None
         },
+        "POOL": {
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        },
+        # Connections are given back to the pool at the end of every
+        # request, the pool keeps them open.
+        "CONN_MAX_AGE": 0,
     },
 }
 
@@ -216,13 +233,23 @@ SENDGRID_ECHO_TO_STDOUT = False
 COMMON_GMAIL_EMAIL_ADDRESS_1 = os.environ["COMMON_GMAIL_EMAIL_ADDRESS_1"]
 COMMON_GMAIL_EMAIL_PSW_1 = os.environ["COMMON_GMAIL_EMAIL_PSW_1"]
 
-COMMON_GMAIL_EMAIL_ADDRESSES = {
-    COMMON_GMAIL_EMAIL_ADDRESS_1,
-}
-
 COMMON_GMAIL_EMAIL_ADDRESS_TO_PSWDS = {
     COMMON_GMAIL_EMAIL_ADDRESS_1: COMMON_GMAIL_EMAIL_PSW_1,
 }
+# More accounts can be added as COMMON_GMAIL_EMAIL_ADDRESS_2 and
+# COMMON_GMAIL_EMAIL_PSW_2 and so on, emails are spread over all of
+# them, see core.utils.senders.
+_n = 2
+while f"COMMON_GMAIL_EMAIL_ADDRESS_{_n}" in os.environ:
+    COMMON_GMAIL_EMAIL_ADDRESS_TO_PSWDS[
+        os.environ[f"COMMON_GMAIL_EMAIL_ADDRESS_{_n}"]
+    ] = os.environ[f"COMMON_GMAIL_EMAIL_PSW_{_n}"]
+    _n += 1
+
+COMMON_GMAIL_EMAIL_ADDRESSES = set(COMMON_GMAIL_EMAIL_ADDRESS_TO_PSWDS)
+
+# Emails per day each of the accounts above can send.
+GMAIL_SENDER_DAILY_QUOTA = int(os.getenv("GMAIL_SENDER_DAILY_QUOTA", "500"))
 
 # For whitelisting emails by header. Currently unused.
 MOLESEC_PHISHING_EMAIL_HEADER = "X-MoleSec-Phi-Test"
@@ -259,6 +286,72 @@ USE_TZ = True
 USE_SCHEDULER = True
 SCHEDULER_LOG_LEVEL = logging.WARNING
 
+# Threads delivering the approved artifacts, see
+# core.attack_agent.deliveries.
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "4"))
+# Threads generating artifacts, see core.attack_agent.generations.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+# Generate a few emails per objective, personalized per target, rather
+# than an email per target, see core.attack_agent.email_templates.
+OBJECTIVE_EMAIL_TEMPLATES = ast.literal_eval(
+    os.getenv("OBJECTIVE_EMAIL_TEMPLATES", "False")
+)
+EMAIL_TEMPLATE_VARIANTS = 3
+EMAIL_TEMPLATE_TEMPERATURE = 0.7
+# Requests to the LLM sent at the same time, and the budgets of every
+# model, as (per minute, burst) requests and tokens. See
+# core.text_generation._scheduler.
+LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "8"))
+# Emails generated concurrently for every email needed, the first valid
+# one is used. Cuts failed generations and tail latency, at the cost of
+# extra tokens.
+LLM_SPECULATIVE_CANDIDATES = int(os.getenv("LLM_SPECULATIVE_CANDIDATES", "1"))
+# Temperature of the extra candidates of deterministic generations
+# (temperature 0), which would all be the same otherwise.
+LLM_SPECULATIVE_TEMPERATURE = 0.7
+# Stream generations, so that broken emails are aborted early.
+LLM_STREAMING = ast.literal_eval(os.getenv("LLM_STREAMING", "False"))
+# Models to generate every request type with, by order of preference,
+# the latency SLOs of the models (90th percentile, in seconds) and the
+# failure rate over which models are considered degraded. See
+# core.text_generation.routing.
+LLM_ROUTES = {
+    "DEFAULT": ["gpt-4", "gpt-3.5-turbo"],
+}
+LLM_LATENCY_SLOS = {
+    "gpt-4": 30,
+    "gpt-3.5-turbo": 15,
+}
+LLM_MAX_FAILURE_RATE = 0.2
+# Prices of the models, in USD per 1000 (prompt, completion) tokens, and
+# budgets of the orgs, in USD per 30 days, as {"<org id>": budget}. See
+# core.attack_agent.llm_usage.
+LLM_COSTS = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo": (0.002, 0.002),
+}
+LLM_ORG_BUDGETS = json.loads(os.getenv("LLM_ORG_BUDGETS", "{}"))
+LLM_DEFAULT_ORG_BUDGET = ast.literal_eval(os.getenv("LLM_DEFAULT_ORG_BUDGET", "None"))
+# The backend of the LLMs, "openai" or "fake" to generate emails
+# offline, see core.text_generation._fake.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "1"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+FAKE_LLM_COMPLETION_TOKENS = int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "150"))
+LLM_RATE_LIMITS = {
+    "gpt-4": {"REQUESTS": (200, 20), "TOKENS": (40_000, 10_000)},
+    "gpt-3.5-turbo": {"REQUESTS": (3_500, 100), "TOKENS": (90_000, 20_000)},
+}
+# Rates at which artifacts are delivered, as (per minute, burst), per
+# provider (for SMTP, per account) and per recipient domain. See
+# core.utils.rate_limits.
+DELIVERY_RATE_LIMITS = {
+    "GOOGLE_INSERTION": (600, 50),
+    "GMAIL_SMTP": (20, 5),
+    "MAILGUN": (120, 20),
+    "DOMAIN": (60, 10),
+}
+
 # Slack
 
 SLACK_TOKEN = os.environ["SLACK_TOKEN"]
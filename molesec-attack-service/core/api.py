@@ -1,6 +1,7 @@
 from io import BytesIO
 from typing import Optional
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.http import HttpResponse
@@ -16,7 +17,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from app.utils import HasAPIKeyCached
-from core import text_generation
+from core import fast_serializers, text_generation
 from core.attack_event_listener import receive_email_opened_event, record_token_consumed
 from core.models import Attack, Objective
 from core.profile_data import get_profile_data
@@ -41,6 +42,9 @@ class AttackList(ListAPIView):
     def list(self, request, objective_id: str, *args, **kwargs):
         attacks = Attack.objects.filter(objective__id=objective_id)
         queryset = attacks.prefetch_related("logs")
+        if settings.FAST_JSON_RENDERING:
+            return Response([fast_serializers.attack_to_dict(a) for a in queryset])
+
         serializer = self.get_serializer(queryset, many=True)
 
         return Response(serializer.data)
@@ -57,6 +61,9 @@ class AttackObject(APIView):
         if attack is None:
             raise ObjectDoesNotExist(f"Attack with ID {attack_id} is not found.")
 
+        if settings.FAST_JSON_RENDERING:
+            return Response(fast_serializers.attack_with_artifacts_to_dict(attack))
+
         serialized_attack = AttackDetailsSerializer(attack)
 
         return Response(serialized_attack.data)
@@ -16,6 +16,12 @@ class CoreConfig(AppConfig):
         Otherwise, AppRegistryNotReady error would be raised.
 
         """
+        from core.attack_agent.deliveries import (  # noqa pylint: disable=import-outside-toplevel
+            process_delivery_jobs,
+        )
+        from core.attack_agent.generations import (  # noqa pylint: disable=import-outside-toplevel
+            process_generation_jobs,
+        )
         from core.coordinators.attack_coordinator import (  # noqa pylint: disable=import-outside-toplevel
             monitor_attacks,
         )
@@ -39,3 +45,13 @@ class CoreConfig(AppConfig):
             scheduler.add_job(
                 monitor_attacks, trigger=CronTrigger(second="*/10"), id="attacks"
             )
+            scheduler.add_job(
+                process_delivery_jobs,
+                trigger=CronTrigger(second="*/5"),
+                id="deliveries",
+            )
+            scheduler.add_job(
+                process_generation_jobs,
+                trigger=CronTrigger(second="*/5"),
+                id="generations",
+            )
@@ -6,12 +6,16 @@ in an attack on John, the Attack Agent can be used to generate
 phishing emails as artifacts and send them to John.
 
 """
+import logging
+from typing import Dict, List, Optional
+from uuid import UUID
 
 from django.utils import timezone
 
 from core import attack_logger
-from core.attack_agent.phishing_emails import send_phishing_email
+from core.attack_agent.phishing_emails import render_phishing_email, send_phishing_email
 from core.models import AttackArtifact, PhishingEmail
+from core.utils import emails as email_utils
 
 
 def deploy(artifact: AttackArtifact) -> None:
@@ -28,4 +32,50 @@ def deploy(artifact: AttackArtifact) -> None:
     artifact.save()
 
 
-__all__ = ["deploy"]
+def deploy_many(
+    artifacts: List[AttackArtifact],
+) -> Dict[UUID, Optional[Exception]]:
+    """Deploy the deliverable artifacts among the given ones.
+
+    Phishing emails are sent or inserted all together, see
+    send_or_insert_emails. Artifacts whose email couldn't go out are
+    left as they are, so that they can be deployed again later on.
+
+    Returns:
+        The ids of the deliverable artifacts, mapped to None if the
+        artifact has been deployed or to the error raised otherwise.
+    """
+    deliverables = {
+        artifact.id: artifact for artifact in artifacts if artifact.is_deliverable
+    }
+
+    results: Dict[UUID, Optional[Exception]] = {}
+    outgoing = {}
+    for artifact in deliverables.values():
+        if not isinstance(artifact.content_object, PhishingEmail):
+            continue
+        try:
+            outgoing[artifact.id] = render_phishing_email(artifact.content_object)
+        except Exception as e:
+            logging.exception(f"Could not render the email of artifact {artifact.id}.")
+            results[artifact.id] = e
+
+    results.update(email_utils.send_or_insert_emails(outgoing))
+
+    for artifact_id, artifact in deliverables.items():
+        if results.get(artifact_id) is not None:
+            logging.error(
+                f"Could not deliver artifact {artifact_id}: {results[artifact_id]!r}"
+            )
+            continue
+        if isinstance(artifact.content_object, PhishingEmail):
+            attack_logger.log_email_sent(artifact)
+
+        artifact.sent_at = timezone.now()
+        artifact.save()
+        results[artifact_id] = None
+
+    return results
+
+
+__all__ = ["deploy", "deploy_many"]
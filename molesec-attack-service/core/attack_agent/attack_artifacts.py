@@ -1,20 +1,21 @@
 import logging
+import uuid
 from enum import Enum
-from typing import List
 
 from django.conf import settings
 from django.db import transaction
 
 from core import types as core_types
 from core import utils as core_utils
-from core.attack_agent import deploy
-from core.attack_agent.phishing_emails import create_phishing_email
+from core.attack_agent.phishing_emails import generate_phishing_email
 from core.models import (
     Attack,
     AttackArtifact,
     AttackArtifactContent,
     AttackArtifactStatus,
     Goal,
+    PhishingToken,
+    TokenType,
 )
 
 
@@ -22,10 +23,14 @@ class ArtifactContentType(str, Enum):
     EMAIL = "EMAIL"
 
 
-def create_attack_artifact_content(
+def generate_attack_artifact_content(
     attack: Attack, type: ArtifactContentType
 ) -> AttackArtifactContent:
-    """Create AttackArtifactContent based on the given type."""
+    """Generate, without saving, AttackArtifactContent of a given type.
+
+    Might take a while (e.g. LLM calls), don't call this within a
+    transaction.
+    """
     if type != ArtifactContentType.EMAIL:
         raise ValueError("Unknown Artifact content type.")
 
@@ -35,7 +40,16 @@ def create_attack_artifact_content(
     }
     request_type = goal_to_request_type[attack.objective.goal]
 
-    return create_phishing_email(attack, request_type=request_type)
+    return generate_phishing_email(attack, request_type=request_type)
+
+
+def create_attack_artifact_content(
+    attack: Attack, type: ArtifactContentType
+) -> AttackArtifactContent:
+    """Create AttackArtifactContent based on the given type."""
+    content_object = generate_attack_artifact_content(attack, type)
+    content_object.save()
+    return content_object
 
 
 def _request_artifact_approval(artifact: AttackArtifact) -> None:
@@ -54,30 +68,38 @@ def _request_artifact_approval(artifact: AttackArtifact) -> None:
         core_utils.send_slack_message(msg)
 
 
-def create_attack_artifact(
-    attack: Attack,
-    content_type: ArtifactContentType = ArtifactContentType.EMAIL,
-):
-    """Creates an AttackArtifact and its content."""
+def save_attack_artifact(
+    attack: Attack, content_object: AttackArtifactContent
+) -> AttackArtifact:
+    """Saves generated content along with its AttackArtifact."""
 
     with transaction.atomic():
-        content_object = create_attack_artifact_content(attack, content_type)
+        content_object.save()
         artifact = AttackArtifact.objects.create(
             attack=attack, content_object=content_object
         )
+        if attack.objective.goal == Goal.CREDENTIALS:
+            PhishingToken.objects.create(
+                attack_artifact=artifact,
+                type=TokenType.CREDENTIALS,
+                token=uuid.uuid4().hex,
+            )
         if artifact.status == AttackArtifactStatus.UNDER_REVIEW:
-            _request_artifact_approval(artifact)
+            transaction.on_commit(lambda: _request_artifact_approval(artifact))
         return artifact
 
 
-def deliver_artifacts(artifacts: List[AttackArtifact]):
-    """Send out deliverable artifacts."""
-    deliverables = [artifact for artifact in artifacts if artifact.is_deliverable]
-
-    for artifact in deliverables:
-        deploy(artifact)
-
-    return deliverables
+def create_attack_artifact(
+    attack: Attack,
+    content_type: ArtifactContentType = ArtifactContentType.EMAIL,
+):
+    """Creates an AttackArtifact and its content."""
+    content_object = generate_attack_artifact_content(attack, content_type)
+    return save_attack_artifact(attack, content_object)
 
 
-__all__ = ["create_attack_artifact", "deliver_artifacts"]
+__all__ = [
+    "create_attack_artifact",
+    "generate_attack_artifact_content",
+    "save_attack_artifact",
+]
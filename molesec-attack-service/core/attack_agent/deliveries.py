@@ -0,0 +1,211 @@
+"""Delivery of approved artifacts through an outbox.
+
+The coordinator doesn't deliver artifacts itself, it enqueues a
+DeliveryJob per deliverable artifact, which is cheap and can't be slowed
+down by SMTP or Gmail. Delivery workers then claim the jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so that they never work on the same
+job, and deliver them outside of any transaction.
+
+Deliveries are rate limited per provider (per account for SMTP) and per
+recipient domain, see settings.DELIVERY_RATE_LIMITS. Jobs over the
+limit are put back until tokens are available, without counting as a
+failed attempt.
+
+A claimed job is leased for _LEASE_SECONDS. Failed deliveries are
+retried with exponential backoff up to _MAX_ATTEMPTS times, after which
+the job is dead-lettered (DeliveryJobStatus.DEAD). If a worker dies
+mid-delivery, the job is claimed again once the lease expires: artifacts
+that have been marked as sent are not delivered again, and emails keep
+the same Message-ID across attempts so that duplicates are dropped.
+
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import attack_agent
+from core.models import AttackArtifact, DeliveryJob, DeliveryJobStatus, PhishingEmail
+from core.utils import emails as email_utils
+from core.utils import rate_limits
+
+_LEASE_SECONDS = 300
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE_SECONDS = 30
+_BACKOFF_MAX_SECONDS = 3600
+# Jobs claimed at once by a worker, emails of the same claim can be
+# inserted in a single batch.
+_CLAIM_SIZE = 50
+
+
+def _idempotency_key(artifact: AttackArtifact) -> str:
+    return f"artifact:{artifact.id}"
+
+
+def enqueue_deliveries(artifacts: List[AttackArtifact]) -> int:
+    """Creates the delivery jobs of the deliverable artifacts.
+
+    Artifacts that already have a job are skipped, so this can be called
+    over and over with the same artifacts.
+
+    Returns:
+        The number of artifacts that have been considered deliverable.
+    """
+    now = timezone.now()
+    jobs = [
+        DeliveryJob(
+            artifact=artifact,
+            idempotency_key=_idempotency_key(artifact),
+            next_attempt_at=now,
+        )
+        for artifact in artifacts
+        if artifact.is_deliverable
+    ]
+    DeliveryJob.objects.bulk_create(jobs, ignore_conflicts=True)
+    return len(jobs)
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(
+        seconds=min(_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), _BACKOFF_MAX_SECONDS)
+    )
+
+
+def claim_jobs(limit: int = _CLAIM_SIZE) -> List[DeliveryJob]:
+    """Claims the jobs that are due, leasing them for _LEASE_SECONDS."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            DeliveryJob.objects.select_for_update(skip_locked=True)
+            .filter(status=DeliveryJobStatus.PENDING, next_attempt_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by("next_attempt_at")[:limit]
+        )
+        for job in jobs:
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=_LEASE_SECONDS)
+        DeliveryJob.objects.bulk_update(jobs, ["attempts", "locked_until"])
+    return jobs
+
+
+def _complete(job: DeliveryJob, error: Optional[Exception] = None) -> None:
+    job.locked_until = None
+    if error is None:
+        job.status = DeliveryJobStatus.SENT
+        job.last_error = ""
+    elif job.attempts >= _MAX_ATTEMPTS:
+        logging.error(f"Delivery job {job.id} is dead after {job.attempts} attempts.")
+        job.status = DeliveryJobStatus.DEAD
+        job.last_error = repr(error)
+    else:
+        job.next_attempt_at = timezone.now() + _backoff(job.attempts)
+        job.last_error = repr(error)
+    job.save(
+        update_fields=[
+            "status",
+            "locked_until",
+            "next_attempt_at",
+            "last_error",
+            "updated_at",
+        ]
+    )
+
+
+def _defer(job: DeliveryJob, seconds: float) -> None:
+    # Not an actual attempt.
+    job.attempts -= 1
+    job.locked_until = None
+    job.next_attempt_at = timezone.now() + timedelta(seconds=seconds)
+    job.save(
+        update_fields=["attempts", "locked_until", "next_attempt_at", "updated_at"]
+    )
+
+
+def _rate_limits(artifact: AttackArtifact) -> Dict[str, rate_limits.Rate]:
+    content = artifact.content_object
+    if not isinstance(content, PhishingEmail):
+        return {}
+    to_email = content.recipients[0]
+    provider = email_utils.get_email_provider(content.sender, to_email)
+    provider_key = provider.value
+    if provider == email_utils.EmailProvider.GMAIL_SMTP:
+        # Gmail limits every account on its own.
+        provider_key = f"{provider.value}:{content.sender}"
+    domain = to_email.split("@")[1].lower()
+    limits = settings.DELIVERY_RATE_LIMITS
+    return {
+        provider_key: rate_limits.Rate(*limits[provider.value]),
+        f"DOMAIN:{domain}": rate_limits.Rate(*limits["DOMAIN"]),
+    }
+
+
+def deliver(jobs: List[DeliveryJob]) -> None:
+    """Delivers the artifacts of claimed jobs, recording the outcome."""
+    artifacts = {
+        artifact.id: artifact
+        for artifact in AttackArtifact.objects.filter(
+            id__in=[job.artifact_id for job in jobs]
+        )
+        .select_related("attack")
+        .prefetch_related("content_object")
+    }
+
+    to_deploy = []
+    for job in jobs:
+        artifact = artifacts.get(job.artifact_id)
+        if artifact is None or artifact.sent_at is not None:
+            # Delivered by an attempt that died before completing it.
+            _complete(job)
+        elif not artifact.is_deliverable:
+            _complete(job, ValueError("The artifact is not deliverable anymore."))
+        else:
+            wait = rate_limits.try_acquire(_rate_limits(artifact))
+            if wait > 0:
+                _defer(job, wait)
+            else:
+                to_deploy.append(artifact)
+
+    results = attack_agent.deploy_many(to_deploy)
+    for job in jobs:
+        if job.artifact_id in results:
+            _complete(job, results[job.artifact_id])
+
+
+def _run_worker(stop: threading.Event) -> int:
+    delivered = 0
+    try:
+        while not stop.is_set():
+            jobs = claim_jobs()
+            if not jobs:
+                break
+            deliver(jobs)
+            delivered += len(jobs)
+    finally:
+        # Worker threads have their own connection.
+        connection.close()
+    return delivered
+
+
+def process_delivery_jobs() -> None:
+    """Runs the delivery workers until there are no due jobs left."""
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=settings.DELIVERY_WORKERS) as executor:
+        futures = [
+            executor.submit(_run_worker, stop) for _ in range(settings.DELIVERY_WORKERS)
+        ]
+        try:
+            processed = sum(future.result() for future in futures)
+        except BaseException:
+            stop.set()
+            raise
+    if processed:
+        logging.info(f"Processed {processed} delivery jobs.")
+
+
+__all__ = ["claim_jobs", "deliver", "enqueue_deliveries", "process_delivery_jobs"]
@@ -0,0 +1,100 @@
+"""Phishing emails generated from objective-level templates.
+
+Most of the inputs of the email generation are the same for all the
+targets of an objective, only the names differ. When
+settings.OBJECTIVE_EMAIL_TEMPLATES is set, a few templates are generated
+per objective, request type and whether the email is signed (see
+core.text_generation.templates), and every target gets one of them with
+the names filled in. This takes the LLM calls of an objective from one
+per target to settings.EMAIL_TEMPLATE_VARIANTS.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from core import text_generation
+from core.models import Attack, EmailTemplate, Objective
+from core.text_generation.templates import NAME_PLACEHOLDERS
+
+
+def _get_or_create_templates(
+    objective: Objective, with_sender: bool, parameters: Dict[str, Any]
+) -> List[EmailTemplate]:
+    def get_templates() -> List[EmailTemplate]:
+        return list(
+            EmailTemplate.objects.filter(
+                objective=objective,
+                request_type=parameters["text_request_type"],
+                with_sender=with_sender,
+            ).order_by("variant")
+        )
+
+    templates = get_templates()
+    if templates:
+        return templates
+
+    # No lock is held while generating, the coordinator and the other
+    # workers keep updating the objective meanwhile. Workers racing on
+    # the same templates all generate them, the unique variants let
+    # only the first insert go through and the others use its templates.
+    generated = text_generation.generate_email_templates_with_llm(
+        variants=settings.EMAIL_TEMPLATE_VARIANTS,
+        with_sender=with_sender,
+        **parameters,
+    )
+    try:
+        with transaction.atomic():
+            EmailTemplate.objects.bulk_create(
+                EmailTemplate(
+                    objective=objective,
+                    request_type=parameters["text_request_type"],
+                    with_sender=with_sender,
+                    variant=variant,
+                    subject=subject,
+                    body=body,
+                    generation_parameters=parameters,
+                )
+                for variant, (subject, body) in enumerate(generated)
+            )
+    except IntegrityError:
+        logging.info(
+            f"Email templates of objective {objective.id} created "
+            "concurrently, discarding ours."
+        )
+    return get_templates()
+
+
+def generate_email_from_template(
+    attack: Attack, generation_parameters: Dict[str, Any]
+) -> Optional[Tuple[str, str]]:
+    """Generate the subject and body of an email from a template.
+
+    Args:
+        attack: the attack the email is for.
+        generation_parameters: as passed to generate_email_with_llm.
+
+    Returns:
+        None if templates can't be used, i.e. some names are missing.
+    """
+    names = {key: generation_parameters.get(key) for key in NAME_PLACEHOLDERS}
+    with_sender = names["from_name"] is not None
+    if not all(
+        value for key, value in names.items() if with_sender or key.startswith("to_")
+    ):
+        return None
+
+    parameters = {
+        key: value
+        for key, value in generation_parameters.items()
+        if key not in NAME_PLACEHOLDERS
+    }
+    parameters["temperature"] = settings.EMAIL_TEMPLATE_TEMPERATURE
+    templates = _get_or_create_templates(attack.objective, with_sender, parameters)
+    # The same target always gets the same template.
+    template = templates[attack.id.int % len(templates)]
+    return text_generation.personalize(template.subject, template.body, names)
+
+
+__all__ = ["generate_email_from_template"]
@@ -0,0 +1,251 @@
+"""Generation of attack artifacts through a job queue.
+
+Generating an artifact means fetching profile data and calling an LLM,
+which takes seconds. Rather than doing that within the coordinator tick,
+attacks that need an artifact get a GenerationJob, which generation
+workers claim with SELECT ... FOR UPDATE SKIP LOCKED. The content is
+generated outside of any transaction and then saved, along with its
+artifact, in a short one.
+
+A claimed job is leased for _LEASE_SECONDS. Failed generations are
+retried with exponential backoff up to _MAX_ATTEMPTS times, after which
+the job is dead-lettered (GenerationJobStatus.DEAD), and its attack,
+which would otherwise wait for the artifact forever, fails. A worker
+only saves its artifact, or its failure, if the job is still its own by
+then, so a job reclaimed after its lease expired never ends up with two
+artifacts.
+
+Jobs of orgs over their LLM budget are put back for _PAUSE_SECONDS,
+without counting as an attempt, see core.attack_agent.llm_usage.
+
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import utils as core_utils
+from core.attack_agent import llm_usage
+from core.attack_agent.attack_artifacts import (
+    ArtifactContentType,
+    generate_attack_artifact_content,
+    save_attack_artifact,
+)
+from core.coordinators.attacks import fail_attack
+from core.models import (
+    ActiveAttackStatuses,
+    Attack,
+    AttackStatus,
+    GenerationJob,
+    GenerationJobStatus,
+)
+
+_LEASE_SECONDS = 600
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE_SECONDS = 30
+_BACKOFF_MAX_SECONDS = 3600
+_PAUSE_SECONDS = 3600
+
+
+def enqueue_generation(attack: Attack) -> None:
+    """Creates the job generating the next artifact of the attack.
+
+    Can be called over and over, the job is only created once.
+    """
+    index = attack.artifacts.count()
+    GenerationJob.objects.get_or_create(
+        idempotency_key=f"attack:{attack.id}:artifact:{index}",
+        defaults={"attack": attack, "next_attempt_at": timezone.now()},
+    )
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(
+        seconds=min(_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), _BACKOFF_MAX_SECONDS)
+    )
+
+
+def claim_job() -> Optional[GenerationJob]:
+    """Claims a job that is due, leasing it for _LEASE_SECONDS."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            GenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status=GenerationJobStatus.PENDING, next_attempt_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by("next_attempt_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.attempts += 1
+        job.locked_until = now + timedelta(seconds=_LEASE_SECONDS)
+        job.save(update_fields=["attempts", "locked_until", "updated_at"])
+    return job
+
+
+def _lock_if_owned(job: GenerationJob) -> Optional[GenerationJob]:
+    """Locks the job if it's still leased to the caller.
+
+    Must be called within a transaction. Returns None if the job got
+    reclaimed, after its lease expired, or is done.
+    """
+    current = GenerationJob.objects.select_for_update().get(id=job.id)
+    if (
+        current.status != GenerationJobStatus.PENDING
+        or current.attempts != job.attempts
+    ):
+        logging.warning(f"Generation job {job.id} got reclaimed, dropping it.")
+        return None
+    return current
+
+
+def _fail(job: GenerationJob, error: Exception) -> None:
+    with transaction.atomic():
+        current = _lock_if_owned(job)
+        if current is None:
+            return
+        current.locked_until = None
+        current.last_error = repr(error)
+        if current.attempts >= _MAX_ATTEMPTS:
+            logging.error(
+                f"Generation job {job.id} is dead after {job.attempts} attempts."
+            )
+            current.status = GenerationJobStatus.DEAD
+        else:
+            current.next_attempt_at = timezone.now() + _backoff(current.attempts)
+        current.save(
+            update_fields=[
+                "status",
+                "locked_until",
+                "next_attempt_at",
+                "last_error",
+                "updated_at",
+            ]
+        )
+        if current.status != GenerationJobStatus.DEAD:
+            return
+
+        # No artifact will ever come, don't leave the attack waiting.
+        attack = Attack.objects.select_for_update(of=("self",)).get(id=job.attack_id)
+        if attack.status in ActiveAttackStatuses:
+            fail_attack(attack)
+        core_utils.send_slack_message(
+            f"Generation job {job.id} of attack {attack.id} is dead after"
+            f" {job.attempts} attempts, the attack failed: {error!r}",
+            core_utils.SLACK_CHANNELS.ERRORS,
+        )
+
+
+def _pause(job: GenerationJob) -> None:
+    with transaction.atomic():
+        current = _lock_if_owned(job)
+        if current is None:
+            return
+        # Not an actual attempt.
+        current.attempts -= 1
+        current.locked_until = None
+        current.next_attempt_at = timezone.now() + timedelta(seconds=_PAUSE_SECONDS)
+        current.save(
+            update_fields=["attempts", "locked_until", "next_attempt_at", "updated_at"]
+        )
+
+
+def generate(job: GenerationJob) -> None:
+    """Generates the artifact of a claimed job and saves it."""
+    attack = Attack.objects.select_related("objective").get(id=job.attack_id)
+
+    if attack.status == AttackStatus.ONGOING and llm_usage.is_over_budget(
+        attack.org_id
+    ):
+        logging.warning(
+            f"Org {attack.org_id} is over its LLM budget, pausing generation"
+            f" job {job.id}."
+        )
+        _pause(job)
+        return
+
+    content_object = None
+    if attack.status == AttackStatus.ONGOING:
+        try:
+            content_object = generate_attack_artifact_content(
+                attack, ArtifactContentType.EMAIL
+            )
+        except Exception as e:
+            logging.exception(f"Generation job {job.id} failed.")
+            _fail(job, e)
+            return
+
+    with transaction.atomic():
+        current = _lock_if_owned(job)
+        if current is None:
+            return
+
+        attack = (
+            Attack.objects.select_for_update(of=("self",))
+            .select_related("objective")
+            .get(id=job.attack_id)
+        )
+        # The attack might have ended while generating.
+        if content_object is not None and attack.status == AttackStatus.ONGOING:
+            current.artifact = save_attack_artifact(attack, content_object)
+        current.status = GenerationJobStatus.DONE
+        current.locked_until = None
+        current.save(update_fields=["status", "locked_until", "artifact", "updated_at"])
+
+
+def _run_worker(stop: threading.Event) -> int:
+    generated = 0
+    try:
+        while not stop.is_set():
+            job = claim_job()
+            if job is None:
+                break
+            generate(job)
+            generated += 1
+    finally:
+        # Worker threads have their own connection.
+        connection.close()
+    return generated
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # The workers' threads are kept around across runs, so that the
+    # HTTP sessions the openai client keeps per thread are reused.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.GENERATION_WORKERS,
+                thread_name_prefix="generation",
+            )
+        return _executor
+
+
+def process_generation_jobs() -> None:
+    """Runs the generation workers until there are no due jobs left."""
+    stop = threading.Event()
+    executor = _get_executor()
+    futures = [
+        executor.submit(_run_worker, stop) for _ in range(settings.GENERATION_WORKERS)
+    ]
+    try:
+        processed = sum(future.result() for future in futures)
+    except BaseException:
+        stop.set()
+        raise
+    if processed:
+        logging.info(f"Processed {processed} generation jobs.")
+
+
+__all__ = ["claim_job", "enqueue_generation", "generate", "process_generation_jobs"]
@@ -0,0 +1,106 @@
+"""Accounting of the LLM usage, and budgets.
+
+Generations record the LLM calls they make (see
+core.text_generation.record_calls) as LLMCall rows, with their tokens,
+cost, latency and retries, attributed to the email, attack, objective
+and org they're made for. Failed generations are accounted for as well,
+and so are speculative candidates that lost, once they complete.
+
+Orgs can be given a budget, in USD over the last _BUDGET_PERIOD_DAYS
+days (settings.LLM_ORG_BUDGETS, settings.LLM_DEFAULT_ORG_BUDGET).
+Generation is paused for orgs over their budget, see
+core.attack_agent.generations.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core import text_generation
+from core.models import Attack, LLMCall, Objective
+
+_BUDGET_PERIOD_DAYS = 30
+
+
+def cost(model: str, prompt_tokens: int, completion_tokens: int) -> Decimal:
+    """Returns the cost of a call in USD, 0 for unpriced models."""
+    # Fake models, see core.text_generation._fake, are free.
+    prices = settings.LLM_COSTS.get(model)
+    if prices is None:
+        return Decimal(0)
+    prompt_price, completion_price = (Decimal(str(price)) for price in prices)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def save_calls(
+    calls: List[text_generation.LLMCallStats],
+    attack: Attack,
+    phishing_email_id: Optional[UUID] = None,
+) -> None:
+    LLMCall.objects.bulk_create(
+        LLMCall(
+            org_id=attack.org_id,
+            objective_id=attack.objective_id,
+            attack=attack,
+            phishing_email_id=phishing_email_id,
+            model=call.model,
+            prompt_tokens=call.prompt_tokens,
+            completion_tokens=call.completion_tokens,
+            cost=cost(call.model, call.prompt_tokens, call.completion_tokens),
+            latency_seconds=call.latency_seconds,
+            retries=call.retries,
+            succeeded=call.succeeded,
+        )
+        for call in calls
+    )
+
+
+def get_usage(
+    org_id: Optional[UUID] = None,
+    objective: Optional[Objective] = None,
+    since: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Aggregates the calls of an org or an objective.
+
+    Returns:
+        The number of calls, failed calls, retries, tokens, the cost and
+        the average latency of the calls.
+    """
+    calls = LLMCall.objects.all()
+    if org_id is not None:
+        calls = calls.filter(org_id=org_id)
+    if objective is not None:
+        calls = calls.filter(objective=objective)
+    if since is not None:
+        calls = calls.filter(created_at__gte=since)
+    return calls.aggregate(
+        calls=Count("id"),
+        failures=Count("id", filter=Q(succeeded=False)),
+        retries=Coalesce(Sum("retries"), 0),
+        prompt_tokens=Coalesce(Sum("prompt_tokens"), 0),
+        completion_tokens=Coalesce(Sum("completion_tokens"), 0),
+        cost=Coalesce(Sum("cost"), Decimal(0)),
+        latency_seconds=Avg("latency_seconds"),
+    )
+
+
+def get_budget(org_id: UUID) -> Optional[Decimal]:
+    budget = settings.LLM_ORG_BUDGETS.get(str(org_id), settings.LLM_DEFAULT_ORG_BUDGET)
+    return Decimal(str(budget)) if budget is not None else None
+
+
+def is_over_budget(org_id: UUID) -> bool:
+    """Whether the org spent its budget, over the last period."""
+    budget = get_budget(org_id)
+    if budget is None:
+        return False
+    since = timezone.now() - timedelta(days=_BUDGET_PERIOD_DAYS)
+    return get_usage(org_id=org_id, since=since)["cost"] >= budget
+
+
+__all__ = ["cost", "get_budget", "get_usage", "is_over_budget", "save_calls"]
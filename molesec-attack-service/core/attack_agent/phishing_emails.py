@@ -11,12 +11,13 @@ from pydantic import UUID4, EmailStr
 
 from core import text_generation
 from core import types as core_types
+from core.attack_agent import email_templates, llm_usage
 from core.errors import ApplicationError
 from core.models import Attack, Goal, PhishingEmail, TokenType
 from core.profile_data import get_profile_data
 from core.types import Email, Individual, ProfileData
 from core.utils import emails as email_utils
-from core.utils import with_default
+from core.utils import senders, with_default
 from core.utils.emails import send_or_insert_email
 
 
@@ -67,28 +68,36 @@ def _pick_target_email(emails: List[Email]) -> EmailStr:
     return emails[0].value
 
 
-def create_phishing_email(
+def generate_phishing_email(
     attack: Attack,
     request_type: core_types.TextGenerationRequestType,
     token: Optional[str] = None,
 ) -> PhishingEmail:
-    """Create a phishing email."""
+    """Generate a phishing email, without saving it.
+
+    Calls the LLM, so don't call this within a transaction.
+    """
 
     token = with_default(token, uuid4().hex)
     impersonated_individual, profile = extract_profiles(attack=attack)
 
+    # Currently, the target is the only recipient.
+    to_email = _pick_target_email(profile.emails)
+
     # By default we pick one among the emails we control so that sending
     # will surely work. If insertion for the sake of bypassing checks
     # is possible then we can put whatever email in the sender field.
-    sender_email = settings.COMMON_GMAIL_EMAIL_ADDRESS_1
-
-    # Currently, the target is the only recipient.
-    to_email = _pick_target_email(profile.emails)
     if email_utils.supports_insertion(to_email):
         logging.info(f"Target email {to_email} supports insertion.")
         if impersonated_individual is not None:
             sender_email = impersonated_individual.emails[0].value
             logging.info(f"Using {sender_email} as sender email.")
+        else:
+            # Inserted as well, no sending quota involved.
+            sender_email = settings.COMMON_GMAIL_EMAIL_ADDRESS_1
+    else:
+        # Spread over the accounts we control, see the senders module.
+        sender_email = senders.pick_sender()
 
     generation_parameters = {
         "from_name": impersonated_individual.first_name
@@ -105,12 +114,31 @@ def create_phishing_email(
         "text_request_reason": core_types.TextGenerationRequestReason.NOT_WORKING,
         "text_request_length": core_types.TextGenerationRequestLength.SHORT,
         "temperature": 0,
-        "model": "gpt-4",
+        "model": text_generation.pick_model(request_type),
     }
 
-    subject, body = text_generation.generate_email_with_llm(**generation_parameters)
-
-    phishing_email = PhishingEmail.objects.create(
+    email_id = uuid4()
+    with text_generation.record_calls(
+        on_late_call=lambda call: llm_usage.save_calls(
+            [call], attack, phishing_email_id=email_id
+        )
+    ) as calls:
+        try:
+            generated = None
+            if settings.OBJECTIVE_EMAIL_TEMPLATES:
+                generated = email_templates.generate_email_from_template(
+                    attack, generation_parameters
+                )
+            if generated is None:
+                generated = text_generation.generate_email_with_llm(
+                    **generation_parameters
+                )
+        finally:
+            llm_usage.save_calls(calls, attack, phishing_email_id=email_id)
+    subject, body = generated
+
+    return PhishingEmail(
+        id=email_id,
         token=token,
         sender=sender_email,
         recipients=[to_email],
@@ -120,14 +148,33 @@ def create_phishing_email(
         generation_parameters=generation_parameters,
     )
 
+
+def create_phishing_email(
+    attack: Attack,
+    request_type: core_types.TextGenerationRequestType,
+    token: Optional[str] = None,
+) -> PhishingEmail:
+    """Create a phishing email."""
+    phishing_email = generate_phishing_email(attack, request_type, token=token)
+    phishing_email.save()
     return phishing_email
 
 
 def regenerate_email(email: PhishingEmail) -> None:
     """Regenerate the content of a phishing email and save it."""
-    subject, body = text_generation.generate_email_with_llm(
-        **email.generation_parameters
-    )
+    # The point is getting a different email, skip the cache.
+    attack = email.artifact.attack
+    with text_generation.record_calls(
+        on_late_call=lambda call: llm_usage.save_calls(
+            [call], attack, phishing_email_id=email.id
+        )
+    ) as calls:
+        try:
+            subject, body = text_generation.generate_email_with_llm(
+                **email.generation_parameters, use_cache=False
+            )
+        finally:
+            llm_usage.save_calls(calls, attack, phishing_email_id=email.id)
     email.subject = subject
     email.body = body
     email.save(update_fields=["subject", "body"])
@@ -143,8 +190,10 @@ def _wrap_link_with_fake_link(visible_link: str, href: str) -> str:
     return f'<a clicktracking="off" href={href} target="_blank">{visible_link}</a>'
 
 
-def send_phishing_email(email: PhishingEmail, use_fake_url: bool = False):
-    """Sends the phishing email.
+def render_phishing_email(
+    email: PhishingEmail, use_fake_url: bool = False
+) -> email_utils.OutgoingEmail:
+    """Renders the phishing email into the email that goes out.
 
     Args:
         email: The phishing email object.
@@ -196,7 +245,7 @@ def send_phishing_email(email: PhishingEmail, use_fake_url: bool = False):
         },
     )
 
-    send_or_insert_email(
+    return email_utils.OutgoingEmail(
         from_email=email.sender,
         # Not really happy about using generation parameters for this.
         from_name=email.generation_parameters.get("from_name"),
@@ -206,8 +255,31 @@ def send_phishing_email(email: PhishingEmail, use_fake_url: bool = False):
         body=body,
         is_html=True,
         # See docs/email-whitelisting.md if use this for real.
-        extra_headers={settings.MOLESEC_PHISHING_EMAIL_HEADER: "true"},
+        extra_headers={
+            settings.MOLESEC_PHISHING_EMAIL_HEADER: "true",
+            # Same id for every delivery attempt of the email, so that
+            # Gmail drops the duplicates if it's delivered twice.
+            "Message-ID": f"<{email.id}@{email.sender.split('@')[1]}>",
+        },
     )
 
 
-__all__ = ["create_phishing_email", "send_phishing_email"]
+def send_phishing_email(email: PhishingEmail, use_fake_url: bool = False):
+    """Sends the phishing email.
+
+    Args:
+        email: The phishing email object.
+        use_fake_url: set as True to use a fake URL text. Default False.
+                      Only enable this if whitelisted.
+
+    """
+    outgoing = render_phishing_email(email, use_fake_url=use_fake_url)
+    send_or_insert_email(**outgoing._asdict())
+
+
+__all__ = [
+    "create_phishing_email",
+    "generate_phishing_email",
+    "render_phishing_email",
+    "send_phishing_email",
+]
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.attack_agent import deliveries
+from core.models import (
+    Attack,
+    AttackArtifact,
+    AttackArtifactStatus,
+    DeliveryJob,
+    DeliveryJobStatus,
+    Objective,
+    PhishingEmail,
+    RateLimitBucket,
+)
+
+
+@patch("core.utils.emails.supports_insertion", new=lambda email: False)
+@patch("core.attack_agent.render_phishing_email")
+@patch("core.attack_agent.email_utils.send_or_insert_emails")
+class DeliveriesTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["test@email.com"],
+        )
+        attack = Attack.objects.create(
+            target_email="test@email.com", objective=objective, org_id=objective.org_id
+        )
+        email = PhishingEmail.objects.create(
+            token=uuid4().hex,
+            subject="Hi",
+            sender="sender@email.com",
+            recipients=["test@email.com"],
+        )
+        self.artifact = AttackArtifact.objects.create(
+            attack=attack, content_object=email, status=AttackArtifactStatus.APPROVED
+        )
+
+    def test_delivers_once(self, mock_send, mock_render):
+        mock_send.side_effect = lambda emails: {key: None for key in emails}
+
+        deliveries.enqueue_deliveries([self.artifact])
+        deliveries.enqueue_deliveries([self.artifact])
+        self.assertEqual(DeliveryJob.objects.count(), 1)
+
+        jobs = deliveries.claim_jobs()
+        self.assertEqual(len(jobs), 1)
+        # Leased jobs can't be claimed by other workers.
+        self.assertEqual(deliveries.claim_jobs(), [])
+        deliveries.deliver(jobs)
+
+        job = DeliveryJob.objects.get()
+        self.assertEqual(job.status, DeliveryJobStatus.SENT)
+        self.artifact.refresh_from_db()
+        self.assertIsNotNone(self.artifact.sent_at)
+        self.assertEqual(self.artifact.attack.logs.count(), 1)
+
+        # The artifact isn't deliverable anymore.
+        deliveries.enqueue_deliveries([self.artifact])
+        self.assertEqual(DeliveryJob.objects.count(), 1)
+
+    def test_retries_and_dead_letters(self, mock_send, mock_render):
+        mock_send.side_effect = lambda emails: {key: ValueError() for key in emails}
+
+        deliveries.enqueue_deliveries([self.artifact])
+        deliveries.deliver(deliveries.claim_jobs())
+
+        job = DeliveryJob.objects.get()
+        self.assertEqual(job.status, DeliveryJobStatus.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError", job.last_error)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertEqual(deliveries.claim_jobs(), [])
+
+        DeliveryJob.objects.update(
+            attempts=deliveries._MAX_ATTEMPTS - 1,  # pylint: disable=W0212
+            next_attempt_at=timezone.now(),
+        )
+        deliveries.deliver(deliveries.claim_jobs())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeliveryJobStatus.DEAD)
+        self.artifact.refresh_from_db()
+        self.assertIsNone(self.artifact.sent_at)
+
+    def test_skips_delivered_artifacts(self, mock_send, mock_render):
+        deliveries.enqueue_deliveries([self.artifact])
+        jobs = deliveries.claim_jobs()
+        # A previous attempt died after delivering the artifact.
+        AttackArtifact.objects.update(sent_at=timezone.now())
+
+        deliveries.deliver(jobs)
+
+        mock_send.assert_called_once_with({})
+        self.assertEqual(DeliveryJob.objects.get().status, DeliveryJobStatus.SENT)
+
+    def test_defers_over_the_rate_limit(self, mock_send, mock_render):
+        mock_send.side_effect = lambda emails: {key: None for key in emails}
+        RateLimitBucket.objects.create(
+            key="DOMAIN:email.com", tokens=0, updated_at=timezone.now()
+        )
+
+        deliveries.enqueue_deliveries([self.artifact])
+        deliveries.deliver(deliveries.claim_jobs())
+
+        mock_send.assert_called_once_with({})
+        job = DeliveryJob.objects.get()
+        self.assertEqual(job.status, DeliveryJobStatus.PENDING)
+        # Deferring isn't a failed attempt.
+        self.assertEqual(job.attempts, 0)
+        self.assertGreater(job.next_attempt_at, timezone.now())
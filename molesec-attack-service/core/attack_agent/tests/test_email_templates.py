@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.attack_agent import email_templates
+from core.models import Attack, AttackStatus, EmailTemplate, Goal, Objective
+
+
+def _generate_email(to_name, to_last_name, from_name=None, **parameters):
+    return f"For {to_name}", f"Hi {to_name} {to_last_name}, {from_name}"
+
+
+@override_settings(EMAIL_TEMPLATE_VARIANTS=2)
+@patch(
+    "core.text_generation.templates.generate_email_with_llm",
+    side_effect=_generate_email,
+)
+class EmailTemplatesTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["a@email.com", "b@email.com"],
+            goal=Goal.CREDENTIALS,
+        )
+        self.parameters = {
+            "formal_level": "INFORMAL",
+            "text_request_type": "CLICK_LINK",
+            "temperature": 0,
+            "model": "gpt-4",
+        }
+
+    def _attack(self, target_email):
+        return Attack.objects.create(
+            target_email=target_email,
+            objective=self.objective,
+            org_id=self.objective.org_id,
+            status=AttackStatus.ONGOING,
+        )
+
+    def test_templates_are_shared_by_targets(self, mock_generate):
+        subject, body = email_templates.generate_email_from_template(
+            self._attack("a@email.com"),
+            {**self.parameters, "to_name": "Ada", "to_last_name": "Lovelace"},
+        )
+        self.assertEqual(subject, "For Ada")
+        self.assertEqual(body, "Hi Ada Lovelace, None")
+
+        subject, body = email_templates.generate_email_from_template(
+            self._attack("b@email.com"),
+            {**self.parameters, "to_name": "Alan", "to_last_name": "Turing"},
+        )
+        self.assertEqual(subject, "For Alan")
+        self.assertEqual(mock_generate.call_count, 2)
+        self.assertEqual(EmailTemplate.objects.count(), 2)
+        self.assertEqual(mock_generate.call_args.kwargs["temperature"], 0.7)
+
+    def test_uses_templates_created_concurrently(self, mock_generate):
+        def create_templates_while_generating(**kwargs):
+            # Another worker is done first.
+            EmailTemplate.objects.create(
+                objective=self.objective,
+                request_type="CLICK_LINK",
+                with_sender=False,
+                subject="From __TO_NAME__",
+                body="Hi __TO_NAME__",
+                generation_parameters={},
+            )
+            return [("Ours", "Ours"), ("Ours too", "Ours too")]
+
+        with patch(
+            "core.text_generation.generate_email_templates_with_llm",
+            side_effect=create_templates_while_generating,
+        ):
+            subject, _ = email_templates.generate_email_from_template(
+                self._attack("a@email.com"),
+                {**self.parameters, "to_name": "Ada", "to_last_name": "Lovelace"},
+            )
+        self.assertEqual(subject, "From Ada")
+        self.assertEqual(EmailTemplate.objects.count(), 1)
+
+    def test_signed_emails_have_their_own_templates(self, mock_generate):
+        _, body = email_templates.generate_email_from_template(
+            self._attack("a@email.com"),
+            {
+                **self.parameters,
+                "to_name": "Ada",
+                "to_last_name": "Lovelace",
+                "from_name": "Alan",
+                "from_last_name": "Turing",
+            },
+        )
+        self.assertEqual(body, "Hi Ada Lovelace, Alan")
+        self.assertEqual(EmailTemplate.objects.filter(with_sender=True).count(), 2)
+
+    def test_missing_names(self, mock_generate):
+        self.assertIsNone(
+            email_templates.generate_email_from_template(
+                self._attack("a@email.com"),
+                {**self.parameters, "to_name": "Ada", "to_last_name": None},
+            )
+        )
+        mock_generate.assert_not_called()
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.attack_agent import generations
+from core.models import (
+    Attack,
+    AttackStatus,
+    GenerationJob,
+    GenerationJobStatus,
+    Goal,
+    Objective,
+    PhishingEmail,
+    TokenType,
+)
+
+
+def _generated_email(attack, type):
+    return PhishingEmail(
+        token=uuid4().hex,
+        subject="Hi",
+        sender="sender@email.com",
+        recipients=[attack.target_email],
+    )
+
+
+@patch("core.attack_agent.generations.generate_attack_artifact_content")
+class GenerationsTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["test@email.com"],
+            goal=Goal.CREDENTIALS,
+        )
+        self.attack = Attack.objects.create(
+            target_email="test@email.com",
+            objective=objective,
+            org_id=objective.org_id,
+            status=AttackStatus.ONGOING,
+        )
+
+    def test_generates_once(self, mock_generate):
+        mock_generate.side_effect = _generated_email
+
+        generations.enqueue_generation(self.attack)
+        generations.enqueue_generation(self.attack)
+        self.assertEqual(GenerationJob.objects.count(), 1)
+
+        job = generations.claim_job()
+        # Leased jobs can't be claimed by other workers.
+        self.assertIsNone(generations.claim_job())
+        generations.generate(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJobStatus.DONE)
+        artifact = self.attack.artifacts.get()
+        self.assertEqual(job.artifact, artifact)
+        self.assertTrue(artifact.tokens.filter(type=TokenType.CREDENTIALS).exists())
+
+        # The next artifact gets its own job.
+        generations.enqueue_generation(self.attack)
+        self.assertEqual(GenerationJob.objects.count(), 2)
+
+    @patch("core.attack_agent.generations.core_utils.send_slack_message")
+    def test_retries_and_dead_letters(self, mock_slack, mock_generate):
+        mock_generate.side_effect = ValueError()
+
+        generations.enqueue_generation(self.attack)
+        generations.generate(generations.claim_job())
+
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.status, GenerationJobStatus.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError", job.last_error)
+        self.assertIsNone(generations.claim_job())
+
+        GenerationJob.objects.update(
+            attempts=generations._MAX_ATTEMPTS - 1,  # pylint: disable=W0212
+            next_attempt_at=timezone.now(),
+        )
+        generations.generate(generations.claim_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJobStatus.DEAD)
+        self.assertFalse(self.attack.artifacts.exists())
+        # The attack doesn't wait for the artifact forever.
+        self.attack.refresh_from_db()
+        self.assertEqual(self.attack.status, AttackStatus.FAILED)
+        mock_slack.assert_called_once()
+
+    def test_drops_reclaimed_jobs(self, mock_generate):
+        mock_generate.side_effect = _generated_email
+
+        generations.enqueue_generation(self.attack)
+        job = generations.claim_job()
+        # The lease expired and another worker claimed the job.
+        GenerationJob.objects.update(locked_until=timezone.now())
+        generations.claim_job()
+
+        generations.generate(job)
+
+        self.assertFalse(self.attack.artifacts.exists())
+        self.assertEqual(
+            GenerationJob.objects.get().status, GenerationJobStatus.PENDING
+        )
+
+    def test_doesnt_fail_reclaimed_jobs(self, mock_generate):
+        mock_generate.side_effect = ValueError()
+
+        generations.enqueue_generation(self.attack)
+        job = generations.claim_job()
+        GenerationJob.objects.update(locked_until=timezone.now())
+        generations.claim_job()
+
+        generations.generate(job)
+
+        # Left to the worker that reclaimed it.
+        current = GenerationJob.objects.get()
+        self.assertEqual(current.attempts, 2)
+        self.assertIsNotNone(current.locked_until)
+        self.assertEqual(current.last_error, "")
+
+    def test_skips_ended_attacks(self, mock_generate):
+        generations.enqueue_generation(self.attack)
+        Attack.objects.update(status=AttackStatus.FAILED)
+
+        generations.generate(generations.claim_job())
+
+        mock_generate.assert_not_called()
+        self.assertEqual(GenerationJob.objects.get().status, GenerationJobStatus.DONE)
+        self.assertFalse(self.attack.artifacts.exists())
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.attack_agent import generations, llm_usage
+from core.models import (
+    Attack,
+    AttackStatus,
+    GenerationJob,
+    GenerationJobStatus,
+    Goal,
+    Objective,
+)
+from core.text_generation import LLMCallStats
+
+
+@override_settings(LLM_COSTS={"gpt-4": (0.03, 0.06)})
+class LLMUsageTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["test@email.com"],
+            goal=Goal.CREDENTIALS,
+        )
+        self.attack = Attack.objects.create(
+            target_email="test@email.com",
+            objective=self.objective,
+            org_id=self.objective.org_id,
+            status=AttackStatus.ONGOING,
+        )
+
+    def _save_calls(self):
+        llm_usage.save_calls(
+            [
+                LLMCallStats("gpt-4", 1000, 500, 2.0, retries=1, succeeded=True),
+                LLMCallStats("gpt-4", 0, 0, 1.0, succeeded=False),
+                LLMCallStats("fake:gpt-4", 1000, 500, 0.5, succeeded=True),
+            ],
+            self.attack,
+            phishing_email_id=uuid4(),
+        )
+
+    def test_aggregates_usage(self):
+        self._save_calls()
+
+        for usage in [
+            llm_usage.get_usage(org_id=self.objective.org_id),
+            llm_usage.get_usage(objective=self.objective),
+        ]:
+            self.assertEqual(usage["calls"], 3)
+            self.assertEqual(usage["failures"], 1)
+            self.assertEqual(usage["retries"], 1)
+            self.assertEqual(usage["prompt_tokens"], 2000)
+            self.assertEqual(usage["cost"], Decimal("0.06"))
+        self.assertEqual(llm_usage.get_usage(org_id=uuid4())["cost"], 0)
+
+    @patch("core.attack_agent.generations.generate_attack_artifact_content")
+    def test_pauses_generation_over_budget(self, mock_generate):
+        self._save_calls()
+
+        with override_settings(LLM_DEFAULT_ORG_BUDGET=1):
+            self.assertFalse(llm_usage.is_over_budget(self.attack.org_id))
+        with override_settings(
+            LLM_DEFAULT_ORG_BUDGET=1,
+            LLM_ORG_BUDGETS={str(self.attack.org_id): 0.05},
+        ):
+            self.assertTrue(llm_usage.is_over_budget(self.attack.org_id))
+
+            generations.enqueue_generation(self.attack)
+            generations.generate(generations.claim_job())
+
+        mock_generate.assert_not_called()
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.status, GenerationJobStatus.PENDING)
+        self.assertEqual(job.attempts, 0)
+        self.assertGreater(job.next_attempt_at, timezone.now())
@@ -1,9 +1,9 @@
-import uuid
+from typing import List
 
-from django.db import transaction
 from pydantic import EmailStr
 
-from core.attack_agent.attack_artifacts import create_attack_artifact, deliver_artifacts
+from core.attack_agent.deliveries import enqueue_deliveries
+from core.attack_agent.generations import enqueue_generation
 from core.coordinators.objective_coordinator import (
     plan_new_attacks,
     update_objectives_status_by_time,
@@ -14,18 +14,23 @@ from core.coordinators.profile_data_requirements import (
 )
 from core.models import (
     Attack,
+    AttackArtifact,
     AttackStatus,
     AttackStatusEndStates,
     Goal,
     ObjectiveStatus,
-    PhishingToken,
-    TokenType,
 )
-from core.profile_data import get_profile_data
+from core.profile_data.cache import ProfileDataCache
 from core.types import ProfileData
+from core.utils import workspaces
+
+# Profile data of the targets is only fetched again when it changes.
+_profile_data_cache = ProfileDataCache()
 
 
 def monitor_attacks():
+    _profile_data_cache.sync()
+
     # Set Objectives as ONGOING or EXPIRED.
     # When EXPIRED, all associated attacks are also set as FAILED.
     update_objectives_status_by_time()
@@ -40,6 +45,8 @@ def monitor_attacks():
 
     # Collect the emails that already belong to the ongoing attacks.
     occupied_individuals = set()
+    # Deliverable artifacts are handed over to the delivery workers.
+    artifacts = []
 
     for attack in active_attacks:
         occupied_individuals.add(attack.target_email)
@@ -48,9 +55,11 @@ def monitor_attacks():
             continue
 
         if attack.status == AttackStatus.ONGOING:
-            process_artifacts(attack)
+            artifacts.extend(process_artifacts(attack))
             continue
 
+    enqueue_deliveries(artifacts)
+
 
 def _profile_data_requirements_satisfied(
     attack: Attack, profile_data: ProfileData
@@ -74,33 +83,38 @@ def check_profile_data(attack: Attack):
     objective = attack.objective
     email = EmailStr(attack.target_email)
 
-    profile_data = get_profile_data(org_id=objective.org_id, email=email)
+    profile_data = _profile_data_cache.get(org_id=objective.org_id, email=email)
 
     if profile_data is None:
         return
 
+    # The target email is picked among the emails of the target, based
+    # on their workspace, see create_phishing_email.
+    workspaces.warm_up_in_background(
+        [email.value.split("@")[1] for email in profile_data.emails]
+        + profile_data.organization.domains
+    )
+
     if _profile_data_requirements_satisfied(attack, profile_data):
         attack.status = AttackStatus.ONGOING
         attack.save()
 
 
-def process_artifacts(attack: Attack):
-    """Check the status of the associated artifacts and act upon it."""
-    with transaction.atomic():
-        #  - if Attack has no artifact, create the first artifact.
-        if attack.artifacts.count() == 0:
-            artifact = create_attack_artifact(attack)
-            # TODO
-            if attack.objective.goal == Goal.CREDENTIALS:
-                PhishingToken.objects.create(
-                    attack_artifact=artifact,
-                    type=TokenType.CREDENTIALS,
-                    token=uuid.uuid4().hex,
-                )
-            return
-
-        #  - if Attack has approved artifacts, deliver them.
-        deliver_artifacts(list(attack.artifacts))
+def process_artifacts(attack: Attack) -> List[AttackArtifact]:
+    """Check the status of the associated artifacts and act upon it.
+
+    Returns:
+        The artifacts of the attack that should be delivered.
+    """
+    #  - if Attack has no artifact, have the first artifact generated
+    #    (see core.attack_agent.generations).
+    if attack.artifacts.count() == 0:
+        enqueue_generation(attack)
+        return []
+
+    #  - if Attack has approved artifacts, deliver them (see
+    #    core.attack_agent.deliveries).
+    return list(attack.artifacts)
 
 
 __all__ = ["monitor_attacks"]
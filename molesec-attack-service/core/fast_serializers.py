@@ -0,0 +1,65 @@
+"""Plain dict serializers for the hot read models.
+
+Used instead of the DRF serializers in serializers.py when
+settings.FAST_JSON_RENDERING is enabled. They produce the same payloads
+but skip the field machinery of DRF, leaving UUIDs, datetimes etc. to
+the renderer (see app/renderers.py). Keep them in sync with the
+corresponding serializers, core/tests/test_fast_serializers.py checks
+that the outputs match.
+
+"""
+from typing import Any, Dict
+
+from core.models import Attack, AttackLog, PhishingEmail
+
+
+def attack_log_to_dict(log: AttackLog) -> Dict[str, Any]:
+    """See serializers.AttackLogSerializer."""
+    return {
+        "id": log.id,
+        "created_at": log.created_at,
+        "type": log.type,
+        "payload": log.payload,
+    }
+
+
+def attack_to_dict(attack: Attack) -> Dict[str, Any]:
+    """See serializers.AttackListItemSerializer."""
+    return {
+        "id": attack.id,
+        # Iterate over all() to make use of the prefetched logs.
+        "logs": [attack_log_to_dict(log) for log in attack.logs.all()],
+        "created_at": attack.created_at,
+        "target_email": attack.target_email,
+        "status": attack.status,
+        "org_id": attack.org_id,
+    }
+
+
+def phishing_email_to_dict(email: PhishingEmail) -> Dict[str, Any]:
+    """See serializers.PhishingEmailSerializer."""
+    return {
+        "id": email.id,
+        "subject": email.subject,
+        "body": email.body,
+        "opened_at": email.opened_at,
+    }
+
+
+def attack_with_artifacts_to_dict(attack: Attack) -> Dict[str, Any]:
+    """See serializers.AttackDetailsSerializer."""
+    artifacts = []
+    for artifact in attack.artifacts:
+        content_object = artifact.content_object
+        if isinstance(content_object, PhishingEmail):
+            artifacts.append(
+                {"type": content_object.type, **phishing_email_to_dict(content_object)}
+            )
+    data = attack_to_dict(attack)
+    # Declared fields come first in DRF, right after the id.
+    return {
+        "id": data.pop("id"),
+        "logs": data.pop("logs"),
+        "artifacts": artifacts,
+        **data,
+    }
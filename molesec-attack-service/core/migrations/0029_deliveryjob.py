@@ -0,0 +1,66 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0028_rename_phishingtokens_phishingtoken"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryJob",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("idempotency_key", models.CharField(max_length=200, unique=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("SENT", "Sent"),
+                            ("DEAD", "Dead"),
+                        ],
+                        default="PENDING",
+                        max_length=200,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField()),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "artifact",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delivery_job",
+                        to="core.attackartifact",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "attack_service_delivery_jobs",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="deliveryjob",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["next_attempt_at"],
+                name="delivery_jobs_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0029_deliveryjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=300, primary_key=True, serialize=False),
+                ),
+                ("tokens", models.FloatField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "attack_service_rate_limit_buckets",
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0030_ratelimitbucket"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailDomainWorkspace",
+            fields=[
+                (
+                    "domain",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                (
+                    "workspace",
+                    models.CharField(
+                        blank=True,
+                        choices=[("GOOGLE", "Google"), ("M365", "M365")],
+                        max_length=200,
+                        null=True,
+                    ),
+                ),
+                ("resolved_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "attack_service_email_domain_workspaces",
+            },
+        ),
+    ]
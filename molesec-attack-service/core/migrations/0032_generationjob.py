@@ -0,0 +1,76 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0031_emaildomainworkspace"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GenerationJob",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("idempotency_key", models.CharField(max_length=200, unique=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("DONE", "Done"),
+                            ("DEAD", "Dead"),
+                        ],
+                        default="PENDING",
+                        max_length=200,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField()),
+                ("locked_until", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "artifact",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="generation_job",
+                        to="core.attackartifact",
+                    ),
+                ),
+                (
+                    "attack",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="generation_jobs",
+                        to="core.attack",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "attack_service_generation_jobs",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="generationjob",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["next_attempt_at"],
+                name="generation_jobs_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0032_generationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GenerationCacheEntry",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("output", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(db_index=True)),
+                ("hits", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "attack_service_generation_cache",
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0033_generationcacheentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailTemplate",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("request_type", models.CharField(max_length=200)),
+                ("with_sender", models.BooleanField()),
+                ("subject", models.TextField()),
+                ("body", models.TextField()),
+                ("generation_parameters", models.JSONField()),
+                (
+                    "objective",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="email_templates",
+                        to="core.objective",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "attack_service_email_templates",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="emailtemplate",
+            index=models.Index(
+                fields=["objective", "request_type", "with_sender"],
+                name="attack_serv_objecti_e43916_idx",
+            ),
+        ),
+    ]
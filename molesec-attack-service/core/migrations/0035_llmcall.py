@@ -0,0 +1,65 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0034_emailtemplate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LLMCall",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("org_id", models.UUIDField(null=True)),
+                ("phishing_email_id", models.UUIDField(db_index=True, null=True)),
+                ("model", models.CharField(max_length=200)),
+                ("prompt_tokens", models.PositiveIntegerField()),
+                ("completion_tokens", models.PositiveIntegerField()),
+                ("cost", models.DecimalField(decimal_places=6, max_digits=12)),
+                ("latency_seconds", models.FloatField()),
+                ("retries", models.PositiveIntegerField(default=0)),
+                ("succeeded", models.BooleanField()),
+                (
+                    "attack",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="llm_calls",
+                        to="core.attack",
+                    ),
+                ),
+                (
+                    "objective",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="llm_calls",
+                        to="core.objective",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "attack_service_llm_calls",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="llmcall",
+            index=models.Index(
+                fields=["org_id", "created_at"], name="attack_serv_org_id_97965d_idx"
+            ),
+        ),
+    ]
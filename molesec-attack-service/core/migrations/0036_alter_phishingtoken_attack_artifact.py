@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0035_llmcall"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="phishingtoken",
+            name="attack_artifact",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tokens",
+                to="core.attackartifact",
+            ),
+        ),
+    ]
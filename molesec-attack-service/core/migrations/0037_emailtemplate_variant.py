@@ -0,0 +1,39 @@
+# Generated by Django 4.1.7 on 2026-10-19 16:55
+
+from django.db import migrations, models
+
+
+def number_variants(apps, schema_editor):
+    EmailTemplate = apps.get_model("core", "EmailTemplate")
+    variants = {}
+    for template in EmailTemplate.objects.order_by("created_at", "id"):
+        key = (template.objective_id, template.request_type, template.with_sender)
+        template.variant = variants.get(key, 0)
+        variants[key] = template.variant + 1
+        template.save(update_fields=["variant"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0036_alter_phishingtoken_attack_artifact"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="emailtemplate",
+            name="attack_serv_objecti_e43916_idx",
+        ),
+        migrations.AddField(
+            model_name="emailtemplate",
+            name="variant",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(number_variants, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="emailtemplate",
+            constraint=models.UniqueConstraint(
+                fields=("objective", "request_type", "with_sender", "variant"),
+                name="unique_email_template_variant",
+            ),
+        ),
+    ]
@@ -221,6 +221,269 @@ class AttackArtifact(BaseModel):
         return self.status == AttackArtifactStatus.APPROVED and self.sent_at is None
 
 
+class DeliveryJobStatus(models.TextChoices):
+    # Waiting to be claimed by a delivery worker, possibly after a
+    # failed attempt (see next_attempt_at).
+    PENDING = "PENDING"
+    # The artifact has been delivered.
+    SENT = "SENT"
+    # All the attempts failed, needs a human to look into it.
+    DEAD = "DEAD"
+
+
+class DeliveryJob(BaseModel):
+    """The delivery of an approved AttackArtifact (an outbox entry).
+
+    Jobs are claimed by the delivery workers, see
+    core.attack_agent.deliveries.
+    """
+
+    class Meta:
+        db_table = "attack_service_delivery_jobs"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="delivery_jobs_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+
+    id = models.UUIDField(default=uuid4, editable=False, primary_key=True)
+
+    artifact = models.OneToOneField(
+        AttackArtifact, on_delete=models.CASCADE, related_name="delivery_job"
+    )
+
+    # A job is created at most once per key, whoever enqueues it.
+    idempotency_key = models.CharField(max_length=200, unique=True)
+
+    status = models.CharField(
+        max_length=200,
+        blank=False,
+        null=False,
+        choices=DeliveryJobStatus.choices,
+        default=DeliveryJobStatus.PENDING,
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    next_attempt_at = models.DateTimeField()
+
+    # Set while a worker is delivering the artifact. Jobs whose lease
+    # expired, e.g. because the worker crashed, can be claimed again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True, default="")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class GenerationJobStatus(models.TextChoices):
+    # Waiting to be claimed by a generation worker, possibly after a
+    # failed attempt (see next_attempt_at).
+    PENDING = "PENDING"
+    # The artifact has been generated.
+    DONE = "DONE"
+    # All the attempts failed, needs a human to look into it.
+    DEAD = "DEAD"
+
+
+class GenerationJob(BaseModel):
+    """The generation of an AttackArtifact for an Attack.
+
+    Jobs are claimed by the generation workers, see
+    core.attack_agent.generations.
+    """
+
+    class Meta:
+        db_table = "attack_service_generation_jobs"
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="generation_jobs_pending_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+
+    id = models.UUIDField(default=uuid4, editable=False, primary_key=True)
+
+    attack = models.ForeignKey(
+        Attack, on_delete=models.CASCADE, related_name="generation_jobs"
+    )
+
+    # A job is created at most once per key, whoever enqueues it.
+    idempotency_key = models.CharField(max_length=200, unique=True)
+
+    status = models.CharField(
+        max_length=200,
+        blank=False,
+        null=False,
+        choices=GenerationJobStatus.choices,
+        default=GenerationJobStatus.PENDING,
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    next_attempt_at = models.DateTimeField()
+
+    # Set while a worker is generating the artifact. Jobs whose lease
+    # expired, e.g. because the worker crashed, can be claimed again.
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True, default="")
+
+    # The generated artifact, once DONE.
+    artifact = models.OneToOneField(
+        AttackArtifact,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="generation_job",
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class EmailTemplate(BaseModel):
+    """An email generated once for all the targets of an objective.
+
+    Names are placeholders, replaced for every target, see
+    core.attack_agent.email_templates.
+    """
+
+    class Meta:
+        db_table = "attack_service_email_templates"
+        constraints = [
+            # Templates are generated without holding any lock, whoever
+            # inserts them second loses, see
+            # core.attack_agent.email_templates.
+            models.UniqueConstraint(
+                name="unique_email_template_variant",
+                fields=["objective", "request_type", "with_sender", "variant"],
+            ),
+        ]
+
+    id = models.UUIDField(default=uuid4, editable=False, primary_key=True)
+
+    objective = models.ForeignKey(
+        Objective, on_delete=models.CASCADE, related_name="email_templates"
+    )
+
+    request_type = models.CharField(max_length=200)
+
+    # Whether the email is signed by an impersonated individual.
+    with_sender = models.BooleanField()
+
+    # Position of the template among those of the same objective,
+    # request type and sender.
+    variant = models.PositiveSmallIntegerField(default=0)
+
+    subject = models.TextField()
+
+    body = models.TextField()
+
+    generation_parameters = models.JSONField()
+
+
+class GenerationCacheEntry(models.Model):
+    """A cached LLM output, see core.text_generation._cache."""
+
+    class Meta:
+        db_table = "attack_service_generation_cache"
+
+    # Hash of the prompt template, the model and the inputs.
+    key = models.CharField(max_length=64, primary_key=True)
+
+    output = models.TextField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    last_used_at = models.DateTimeField(db_index=True)
+
+    hits = models.PositiveIntegerField(default=0)
+
+
+class LLMCall(BaseModel):
+    """A request made to an LLM, see core.attack_agent.llm_usage."""
+
+    class Meta:
+        db_table = "attack_service_llm_calls"
+        indexes = [
+            models.Index(fields=["org_id", "created_at"]),
+        ]
+
+    id = models.UUIDField(default=uuid4, editable=False, primary_key=True)
+
+    org_id = models.UUIDField(null=True)
+
+    objective = models.ForeignKey(
+        Objective, on_delete=models.SET_NULL, null=True, related_name="llm_calls"
+    )
+
+    attack = models.ForeignKey(
+        Attack, on_delete=models.SET_NULL, null=True, related_name="llm_calls"
+    )
+
+    # Not a foreign key, failed generations never save their email but
+    # their calls are accounted for all the same.
+    phishing_email_id = models.UUIDField(null=True, db_index=True)
+
+    model = models.CharField(max_length=200)
+
+    prompt_tokens = models.PositiveIntegerField()
+
+    completion_tokens = models.PositiveIntegerField()
+
+    # In USD, see settings.LLM_COSTS.
+    cost = models.DecimalField(max_digits=12, decimal_places=6)
+
+    latency_seconds = models.FloatField()
+
+    retries = models.PositiveIntegerField(default=0)
+
+    succeeded = models.BooleanField()
+
+
+class RateLimitBucket(models.Model):
+    """A token bucket, see core.utils.rate_limits."""
+
+    class Meta:
+        db_table = "attack_service_rate_limit_buckets"
+
+    key = models.CharField(max_length=300, primary_key=True)
+
+    tokens = models.FloatField()
+
+    updated_at = models.DateTimeField()
+
+
+class MailWorkspace(models.TextChoices):
+    GOOGLE = "GOOGLE"
+    M365 = "M365"
+
+
+class EmailDomainWorkspace(models.Model):
+    """The workspace an email domain belongs to, as per its DNS records.
+
+    See core.utils.workspaces.
+    """
+
+    class Meta:
+        db_table = "attack_service_email_domain_workspaces"
+
+    domain = models.CharField(max_length=255, primary_key=True)
+
+    # Null if the domain doesn't belong to a known workspace, or if it
+    # has no records at all.
+    workspace = models.CharField(
+        max_length=200, null=True, blank=True, choices=MailWorkspace.choices
+    )
+
+    resolved_at = models.DateTimeField()
+
+    expires_at = models.DateTimeField()
+
+
 class AttackArtifactContent(BaseModel):
     """Content object of AttackArtifact.
 
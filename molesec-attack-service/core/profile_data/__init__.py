@@ -7,7 +7,7 @@ from pydantic import UUID4, BaseModel, EmailStr
 
 from core import errors as core_errors
 from core import utils as core_utils
-from core.types import ProfileData
+from core.types import ProfileData, ProfileDataChanges
 
 
 class _ProfileDataRequest(BaseModel):
@@ -18,6 +18,7 @@ class _ProfileDataRequest(BaseModel):
 _PROFILE_DATA_URL = settings.PROFILE_DATA_URL
 _API_KEY = settings.PROFILE_DATA_API_KEY
 _INDIVIDUALS_ENDPOINT = "/api/v1/organizations/{org_id}/individuals"
+_CHANGES_ENDPOINT = "/api/v1/changes"
 
 
 def get_profile_data(org_id: UUID4, email: EmailStr) -> Optional[ProfileData]:
@@ -49,4 +50,36 @@ def get_profile_data(org_id: UUID4, email: EmailStr) -> Optional[ProfileData]:
     return ProfileData(**data[0])
 
 
-__all__ = ["get_profile_data"]
+def get_profile_data_changes(
+    cursor: Optional[int], limit: int = 1000
+) -> ProfileDataChanges:
+    """Fetches the changes to the profile data after a cursor.
+
+    Args:
+        cursor: the cursor returned by the previous call, or None to
+            only get the current cursor.
+        limit: max number of changes to return.
+
+    Raises:
+        ProfileDataError: if the changes couldn't be fetched or parsed.
+    """
+    url = f"{_PROFILE_DATA_URL}{_CHANGES_ENDPOINT}"
+
+    params = {"limit": limit}
+    if cursor is not None:
+        params["cursor"] = cursor
+    headers = {"Authorization": f"Api-Key {_API_KEY}"}
+    session = core_utils.get_requests_session_with_retries()
+    try:
+        response = session.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return ProfileDataChanges(**response.json())
+    except (requests.RequestException, ValueError, TypeError) as e:
+        # Connection errors and timeouts included, along with responses
+        # that don't parse (pydantic's ValidationError is a ValueError).
+        raise core_errors.ProfileDataError(
+            "Failed to fetch profile data changes."
+        ) from e
+
+
+__all__ = ["get_profile_data", "get_profile_data_changes"]
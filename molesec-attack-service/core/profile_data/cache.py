@@ -0,0 +1,67 @@
+"""Cache of profile data, kept up to date with the change feed.
+
+Profile data of a target embeds the organization and all the peers of
+the target, so any change in an organization invalidates the cached
+profile data of all of its targets. Organizations without changes are
+not fetched again. Deleted organizations come as a single ORGANIZATION
+DELETED change, which drops them like any other change.
+
+If the change feed can't be read, the cache is dropped and profile data
+is fetched on every call until the feed is back.
+"""
+import logging
+from typing import Optional, Set, Tuple
+
+from cachetools import LRUCache
+from pydantic import UUID4, EmailStr
+
+from core import errors as core_errors
+from core.profile_data import get_profile_data, get_profile_data_changes
+from core.types import ProfileData
+
+_CHANGES_PAGE_SIZE = 1000
+
+
+class ProfileDataCache:
+    def __init__(self, maxsize: int = 10_000):
+        # None until the first successful sync, nothing is cached
+        # without a cursor.
+        self._cursor: Optional[int] = None
+        self._entries: "LRUCache[Tuple[UUID4, str], Optional[ProfileData]]" = LRUCache(
+            maxsize=maxsize
+        )
+
+    def sync(self) -> None:
+        """Drops the profile data of the organizations that changed."""
+        changed_org_ids: Set[UUID4] = set()
+        cursor = self._cursor
+        try:
+            while True:
+                page = get_profile_data_changes(cursor, limit=_CHANGES_PAGE_SIZE)
+                changed_org_ids.update(c.organization_id for c in page.changes)
+                cursor = page.cursor
+                if len(page.changes) < _CHANGES_PAGE_SIZE:
+                    break
+        except core_errors.ProfileDataError:
+            logging.exception("Failed to sync profile data changes.")
+            self._cursor = None
+            self._entries.clear()
+            return
+
+        for key in [key for key in self._entries if key[0] in changed_org_ids]:
+            del self._entries[key]
+        self._cursor = cursor
+
+    def get(self, org_id: UUID4, email: EmailStr) -> Optional[ProfileData]:
+        """Like get_profile_data, but cached until the next change."""
+        key = (org_id, email.lower())
+        if self._cursor is not None and key in self._entries:
+            return self._entries[key]
+
+        profile_data = get_profile_data(org_id=org_id, email=email)
+        if self._cursor is not None:
+            self._entries[key] = profile_data
+        return profile_data
+
+
+__all__ = ["ProfileDataCache"]
@@ -0,0 +1,91 @@
+from datetime import datetime
+from unittest.mock import patch
+from uuid import uuid4
+
+import requests
+from django.test import SimpleTestCase
+
+from core import errors as core_errors
+from core.profile_data import get_profile_data_changes
+from core.profile_data.cache import ProfileDataCache
+from core.types import ProfileDataChange, ProfileDataChanges
+
+org_id = uuid4()
+other_org_id = uuid4()
+
+
+def changes(cursor: int, *org_ids, operation: str = "SAVED") -> ProfileDataChanges:
+    return ProfileDataChanges(
+        changes=[
+            ProfileDataChange(
+                id=cursor,
+                organization_id=org_id_,
+                individual_id=None,
+                model="ORGANIZATION",
+                operation=operation,
+                time_created=datetime.now(),
+                emails=[],
+            )
+            for org_id_ in org_ids
+        ],
+        cursor=cursor,
+    )
+
+
+@patch("core.profile_data.cache.get_profile_data")
+@patch("core.profile_data.cache.get_profile_data_changes")
+class ProfileDataCacheTestCase(SimpleTestCase):
+    def test_fetches_again_only_on_changes(self, mock_changes, mock_get):
+        cache = ProfileDataCache()
+        mock_changes.return_value = changes(1)
+        cache.sync()
+
+        cache.get(org_id, "a@acme.com")
+        cache.get(other_org_id, "b@acme.com")
+        cache.get(org_id, "A@acme.com")
+        self.assertEqual(mock_get.call_count, 2)
+
+        mock_changes.return_value = changes(2, org_id)
+        cache.sync()
+        mock_changes.assert_called_with(1, limit=1000)
+
+        cache.get(org_id, "a@acme.com")
+        cache.get(other_org_id, "b@acme.com")
+        self.assertEqual(mock_get.call_count, 3)
+
+    def test_drops_deleted_organizations(self, mock_changes, mock_get):
+        cache = ProfileDataCache()
+        mock_changes.return_value = changes(1)
+        cache.sync()
+
+        cache.get(org_id, "a@acme.com")
+        self.assertEqual(mock_get.call_count, 1)
+
+        mock_changes.return_value = changes(2, org_id, operation="DELETED")
+        cache.sync()
+
+        mock_get.return_value = None
+        self.assertIsNone(cache.get(org_id, "a@acme.com"))
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_doesnt_cache_without_feed(self, mock_changes, mock_get):
+        cache = ProfileDataCache()
+        mock_changes.side_effect = core_errors.ProfileDataError()
+        cache.sync()
+
+        cache.get(org_id, "a@acme.com")
+        cache.get(org_id, "a@acme.com")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("core.profile_data.core_utils.get_requests_session_with_retries")
+    def test_doesnt_cache_when_feed_is_unreachable(
+        self, mock_session, mock_changes, mock_get
+    ):
+        cache = ProfileDataCache()
+        mock_changes.side_effect = get_profile_data_changes
+        mock_session.return_value.get.side_effect = requests.ConnectionError()
+        cache.sync()
+
+        cache.get(org_id, "a@acme.com")
+        cache.get(org_id, "a@acme.com")
+        self.assertEqual(mock_get.call_count, 2)
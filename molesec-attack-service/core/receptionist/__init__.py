@@ -11,7 +11,7 @@ from django.db import transaction
 
 from core.coordinators import attacks
 from core.models import Attack, Objective
-from core.utils import validate_dates, validate_targets
+from core.utils import validate_dates, validate_targets, workspaces
 
 
 def process_objective_payload(payload: dict) -> Tuple[Objective, List[Attack]]:
@@ -32,4 +32,7 @@ def process_objective_payload(payload: dict) -> Tuple[Objective, List[Attack]]:
             objective=objective, emails=target_emails
         )
 
+    # Classify the target domains before the first emails need it.
+    workspaces.warm_up_in_background(email.split("@")[1] for email in target_emails)
+
     return objective, attack_records
@@ -0,0 +1,52 @@
+"""Benchmarks email generation offline, on the fake LLM backend.
+
+Generates emails through generate_email_with_llm (scheduler, speculative
+candidates, streaming, validation) from a number of threads at once,
+like the generation workers do, and reports the throughput and latency
+percentiles. Latency, failure rate and tokens of the fake LLM are set
+through the FAKE_LLM_* settings (no db needed).
+
+Usage:
+    python manage.py runscript bench_generation
+    python manage.py runscript bench_generation --script-args 200 16
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.test import override_settings
+
+from core import errors as core_errors
+from core.text_generation import _scheduler, generate_email_with_llm
+
+
+def _generate() -> Optional[float]:
+    started_at = time.monotonic()
+    try:
+        # Sampled, so that the db cache isn't involved.
+        generate_email_with_llm(to_name="John", temperature=0.7, model="gpt-4")
+    except core_errors.TextGenerationFailureError:
+        return None
+    return time.monotonic() - started_at
+
+
+def run(*args):
+    count = int(args[0]) if len(args) > 0 else 100
+    threads = int(args[1]) if len(args) > 1 else 8
+
+    with override_settings(LLM_BACKEND="fake"):
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = list(executor.map(lambda _: _generate(), range(count)))
+        elapsed = time.monotonic() - started_at
+
+    succeeded = sorted(latency for latency in latencies if latency is not None)
+    print(f"{count} emails from {threads} threads in {elapsed:.2f}s")
+    print(f"  throughput {len(succeeded) / elapsed:8.2f} emails/s")
+    print(f"  failures   {count - len(succeeded):8d}")
+    if len(succeeded) > 1:
+        percentiles = statistics.quantiles(succeeded, n=100)
+        print(f"  p50        {percentiles[49]:8.2f}s")
+        print(f"  p99        {percentiles[98]:8.2f}s")
+    print(f"  metrics    {_scheduler.metrics().get('fake:gpt-4')}")
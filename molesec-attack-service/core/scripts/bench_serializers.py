@@ -0,0 +1,77 @@
+"""Benchmarks the DRF serializers against the fast path.
+
+Compares AttackListItemSerializer + JSONRenderer with fast_serializers +
+ORJSONRenderer on in-memory records (no db needed) for objectives with
+different numbers of attacks, checking that the outputs match.
+
+Usage:
+    python manage.py runscript bench_serializers
+    python manage.py runscript bench_serializers --script-args 2000
+"""
+import json
+import timeit
+from typing import List
+from uuid import uuid4
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from app.renderers import ORJSONRenderer
+from core import fast_serializers
+from core.models import Attack, AttackLog, AttackLogType, AttackStatus
+from core.serializers import AttackListItemSerializer
+
+
+def _make_attacks(size: int) -> List[Attack]:
+    now = timezone.now()
+    org_id = uuid4()
+    attacks = []
+    for i in range(size):
+        attack = Attack(
+            target_email=f"person{i}@acme.com",
+            status=AttackStatus.ONGOING,
+            org_id=org_id,
+            created_at=now,
+        )
+        logs = [
+            AttackLog(
+                type=AttackLogType.EMAIL_SENT,
+                payload={"message_id": f"<{i}@acme.com>"},
+                attack=attack,
+                created_at=now,
+            ),
+            AttackLog(type=AttackLogType.EMAIL_OPENED, payload=None, created_at=now),
+        ]
+        # Equivalent to a prefetch_related("logs").
+        attack._prefetched_objects_cache = {"logs": logs}  # pylint: disable=W0212
+        attacks.append(attack)
+    return attacks
+
+
+def _drf(attacks: List[Attack]) -> bytes:
+    data = AttackListItemSerializer(attacks, many=True).data
+    return JSONRenderer().render(data)
+
+
+def _fast(attacks: List[Attack]) -> bytes:
+    data = [fast_serializers.attack_to_dict(attack) for attack in attacks]
+    return ORJSONRenderer().render(data)
+
+
+def run(*args):
+    sizes = [int(arg) for arg in args[:1]] or [20, 200, 1000]
+
+    for size in sizes:
+        attacks = _make_attacks(size)
+        if json.loads(_drf(attacks)) != json.loads(_fast(attacks)):
+            raise AssertionError("Fast serializers output doesn't match DRF.")
+
+        number = max(1, 2000 // size)
+        drf = timeit.timeit(lambda: _drf(attacks), number=number)
+        fast = timeit.timeit(lambda: _fast(attacks), number=number)
+        print(
+            f"{size:>5} attacks: "
+            f"drf {drf / number * 1000:8.2f}ms, "
+            f"fast {fast / number * 1000:8.2f}ms, "
+            f"speedup x{drf / fast:.1f}"
+        )
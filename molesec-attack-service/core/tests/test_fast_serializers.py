@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from app.renderers import ORJSONRenderer
+from core import fast_serializers
+from core.models import (
+    Attack,
+    AttackArtifact,
+    AttackLog,
+    AttackLogType,
+    Objective,
+    PhishingEmail,
+)
+from core.serializers import AttackDetailsSerializer, AttackListItemSerializer
+
+
+class FastSerializersTestCase(TestCase):
+    def setUp(self):
+        now = datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc)
+        objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["t@email.com"],
+        )
+        self.attack = Attack.objects.create(
+            target_email="t@email.com", objective=objective, org_id=objective.org_id
+        )
+        AttackLog.objects.create(
+            attack=self.attack,
+            type=AttackLogType.EMAIL_SENT,
+            payload={"note": "Grüße", "count": 1.5, "nested": [None, True]},
+        )
+        AttackLog.objects.create(attack=self.attack, type=AttackLogType.EMAIL_OPENED)
+        opened = PhishingEmail.objects.create(
+            token=uuid4().hex,
+            subject="Hi ✉",
+            body="<p>Body</p>",
+            sender="s@gmail.com",
+            recipients=["t@email.com"],
+            # Without microseconds, which both leave out.
+            opened_at=now.replace(microsecond=0),
+        )
+        unopened = PhishingEmail.objects.create(
+            token=uuid4().hex,
+            subject="Hi again",
+            sender="s@gmail.com",
+            recipients=["t@email.com"],
+        )
+        for email in [opened, unopened]:
+            AttackArtifact.objects.create(attack=self.attack, content_object=email)
+        # Dates as they come out of the db.
+        self.attack = Attack.objects.prefetch_related("logs").get(id=self.attack.id)
+
+    def assertRendersSame(self, fast, drf):
+        self.assertEqual(ORJSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_attack_to_dict(self):
+        self.assertRendersSame(
+            fast_serializers.attack_to_dict(self.attack),
+            AttackListItemSerializer(self.attack).data,
+        )
+
+    def test_attack_with_artifacts_to_dict(self):
+        self.assertRendersSame(
+            fast_serializers.attack_with_artifacts_to_dict(self.attack),
+            AttackDetailsSerializer(self.attack).data,
+        )
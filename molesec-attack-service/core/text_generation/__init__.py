@@ -1,5 +1,16 @@
+from core.text_generation._scheduler import LLMCallStats, record_calls
 from core.text_generation.emails import generate_email_with_llm
+from core.text_generation.routing import pick_model
+from core.text_generation.templates import (
+    generate_email_templates_with_llm,
+    personalize,
+)
 
 __all__ = [
+    "LLMCallStats",
+    "generate_email_templates_with_llm",
     "generate_email_with_llm",
+    "personalize",
+    "pick_model",
+    "record_calls",
 ]
@@ -0,0 +1,57 @@
+"""Cache of LLM outputs.
+
+With a temperature of 0, the output of the LLM only depends on the
+model, the prompt template and the inputs, and the same inputs come up
+all the time (formality, urgency, reason etc. are mostly fixed). Outputs
+are cached in the db under a hash of all of those, so that the template
+itself acts as its version: changing it invalidates its entries.
+
+The cache is bounded to _MAX_ENTRIES, the least recently used entries
+are evicted when new ones come in.
+"""
+import hashlib
+import json
+from typing import Any, Mapping, Optional
+
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import GenerationCacheEntry
+
+_MAX_ENTRIES = 10_000
+
+
+def cache_key(
+    model: str, temperature: float, prompt_template: str, inputs: Mapping[str, Any]
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "prompt_template": hashlib.sha256(prompt_template.encode()).hexdigest(),
+            "inputs": inputs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    entry = GenerationCacheEntry.objects.filter(key=key).only("output").first()
+    if entry is None:
+        return None
+    GenerationCacheEntry.objects.filter(key=key).update(
+        last_used_at=timezone.now(), hits=F("hits") + 1
+    )
+    return entry.output
+
+
+def put(key: str, output: str) -> None:
+    GenerationCacheEntry.objects.update_or_create(
+        key=key, defaults={"output": output, "last_used_at": timezone.now()}
+    )
+    stale = GenerationCacheEntry.objects.order_by("-last_used_at").values_list(
+        "key", flat=True
+    )[_MAX_ENTRIES:]
+    GenerationCacheEntry.objects.filter(key__in=list(stale)).delete()
@@ -0,0 +1,91 @@
+"""A local stand-in for the OpenAI models.
+
+FakeLLM answers any prompt with an email in the format of the email
+prompt, after settings.FAKE_LLM_LATENCY_SECONDS. A share of its answers
+(settings.FAKE_LLM_FAILURE_RATE) are malformed, as LLMs sometimes do,
+and every answer is about settings.FAKE_LLM_COMPLETION_TOKENS tokens.
+
+It's used instead of OpenAI with LLM_BACKEND=fake, so that generations
+can be tested and benchmarked offline, see
+core.scripts.bench_generation.
+"""
+import asyncio
+import random
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from langchain.llms.base import BaseLLM
+from langchain.schema import Generation, LLMResult
+
+# See core.text_generation.emails.
+_DIVIDER = "[divider]"
+_LINK = "[link_for_user]"
+# Roughly, for English text.
+_CHARACTERS_PER_TOKEN = 4
+
+
+class FakeLLM(BaseLLM):
+    model_name: str = "fake"
+    streaming: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _email(self) -> List[str]:
+        """Returns the tokens of an email."""
+        tokens = [
+            "Quick",
+            " question",
+            f" {_DIVIDER}",
+            " Hi,",
+            " could",
+            " you",
+            " check",
+            " this",
+            " link",
+            f" {_LINK}",
+            " Thanks!",
+        ]
+        filler = settings.FAKE_LLM_COMPLETION_TOKENS - len(tokens)
+        tokens[-1:-1] = [" please"] * max(filler, 0)
+        if random.random() < settings.FAKE_LLM_FAILURE_RATE:
+            # The usual mistake, the divider is left out.
+            tokens.remove(f" {_DIVIDER}")
+        return tokens
+
+    def _generate(
+        self, prompts: List[str], stop: Optional[List[str]] = None
+    ) -> LLMResult:
+        generations = []
+        prompt_tokens = completion_tokens = 0
+        for prompt in prompts:
+            tokens = self._email()
+            delay = settings.FAKE_LLM_LATENCY_SECONDS / len(tokens)
+            for token in tokens:
+                time.sleep(delay)
+                if self.streaming:
+                    self.callback_manager.on_llm_new_token(token, verbose=self.verbose)
+            generations.append([Generation(text="".join(tokens))])
+            prompt_tokens += len(prompt) // _CHARACTERS_PER_TOKEN
+            completion_tokens += len(tokens)
+        return LLMResult(
+            generations=generations,
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+                "model_name": self.model_name,
+            },
+        )
+
+    async def _agenerate(
+        self, prompts: List[str], stop: Optional[List[str]] = None
+    ) -> LLMResult:
+        # The latency is slept through, keep it off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._generate, prompts, stop
+        )
@@ -1,38 +1,99 @@
-from typing import Dict, List, Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from django.conf import settings
 from langchain import OpenAI, PromptTemplate
+from langchain.callbacks.base import CallbackManager
+from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.chains.base import Chain
 from langchain.chains.llm import LLMChain
 from langchain.chat_models import ChatOpenAI
-from langchain.llms.base import BaseLLM
+from langchain.schema import BaseLanguageModel
 from pydantic import BaseModel, root_validator
 
-from core.text_generation import _prompts
+from core.text_generation import _prompts, _scheduler
+from core.text_generation._fake import FakeLLM
+
+# The listener of the tokens streamed on the current thread, see
+# SimpleTextGenerationChain.stream.
+_stream = threading.local()
+
+
+class _TokenHandler(StreamingStdOutCallbackHandler):
+    @property
+    def always_verbose(self) -> bool:
+        return True
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        _scheduler.count_streamed(token)
+        on_token = getattr(_stream, "on_token", None)
+        if on_token is not None:
+            on_token(token)
+
+
+def _openai_llm(model_name: str, temperature: float, **kwargs) -> BaseLanguageModel:
+    # Retries are up to the scheduler, see _scheduler.
+    if "gpt" in model_name:
+        return ChatOpenAI(
+            client=None,
+            model_name=model_name,
+            temperature=temperature,
+            max_retries=1,
+            **kwargs,
+        )
+    return OpenAI(
+        client=None,
+        temperature=temperature,
+        model_name=model_name,
+        frequency_penalty=0,
+        presence_penalty=0,
+        max_retries=1,
+        **kwargs,
+    )
+
+
+def _fake_llm(model_name: str, temperature: float, **kwargs) -> BaseLanguageModel:
+    return FakeLLM(model_name=model_name, **kwargs)
+
+
+# The backends the LLMs can run on, settings.LLM_BACKEND picks one. A
+# backend builds the langchain model of the given name and temperature,
+# passing the other kwargs (streaming, callback_manager) to it.
+BACKENDS: Dict[str, Callable[..., BaseLanguageModel]] = {
+    "openai": _openai_llm,
+    "fake": _fake_llm,
+}
+
+
+def scheduled_model(model: str, backend: str) -> str:
+    """Returns the name of a model for the scheduler.
+
+    Budgets and metrics are per model, models of other backends than
+    OpenAI are told apart.
+    """
+    if backend == "openai":
+        return model
+    return f"{backend}:{model}"
 
 
 class ChainWithLLM(Chain, BaseModel):
-    _llm: Optional[BaseLLM] = None
+    _llm: Optional[BaseLanguageModel] = None
 
     @root_validator
     def setup_llm(cls, values):  # noqa pylint: disable=no-self-argument
         llm = values.get("_llm")
         if llm is not None:
             return values
-        model_name = values["feature_flags"].model
-        temperature = values["feature_flags"].temperature
-        if "gpt" in model_name:
-            model = ChatOpenAI(
-                client=None, model_name=model_name, temperature=temperature
-            )
-        else:
-            model = OpenAI(
-                client=None,
-                temperature=temperature,
-                model_name=model_name,
-                frequency_penalty=0,
-                presence_penalty=0,
-            )
-        values["_llm"] = model
+        flags = values["feature_flags"]
+        streaming = {}
+        if flags.streaming:
+            streaming = {
+                "streaming": True,
+                "callback_manager": CallbackManager([_TokenHandler()]),
+            }
+        values["_llm"] = BACKENDS[flags.backend](
+            flags.model, flags.temperature, **streaming
+        )
         return values
 
 
@@ -40,6 +101,23 @@ class TextGenerationChainFeatureFlags(BaseModel):
     model: str = "gpt-3.5-turbo"
     temperature: float = 0
     prompt_template: str = _prompts.email_prompt
+    streaming: bool = False
+    backend: str = "openai"
+
+
+_INPUT_KEYS = [
+    "from_name",
+    "from_last_name",
+    "to_name",
+    "to_last_name",
+    "formal_level",
+    "urgency_level",
+    "text_request_type",
+    "text_request_reason",
+    "subject_body_divider",
+    "include_link",
+    "text_request_length",
+]
 
 
 class SimpleTextGenerationChain(ChainWithLLM):
@@ -47,33 +125,94 @@ class SimpleTextGenerationChain(ChainWithLLM):
 
     feature_flags: TextGenerationChainFeatureFlags = TextGenerationChainFeatureFlags()
 
-    def _call(self, inputs: Dict[str, str]) -> Dict[str, str]:
+    _llm_chain: Optional[LLMChain] = None
+
+    @root_validator
+    def setup_llm_chain(cls, values):  # noqa pylint: disable=no-self-argument
+        # Built once, chains are reused across calls, see get_chain.
         prompt = PromptTemplate(
-            input_variables=self.input_keys,
-            template=self.feature_flags.prompt_template,
+            input_variables=_INPUT_KEYS,
+            template=values["feature_flags"].prompt_template,
         )
+        values["_llm_chain"] = LLMChain(llm=values["_llm"], prompt=prompt)
+        return values
+
+    def _generate(
+        self, inputs: Dict[str, str], on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        def call():
+            # Tokens are streamed on the scheduler's thread.
+            _stream.on_token = on_token
+            try:
+                return self._llm_chain.generate([inputs])
+            finally:
+                _stream.on_token = None
+
+        flags = self.feature_flags
+        prompts, _ = self._llm_chain.prep_prompts([inputs])
+        result = _scheduler.run(
+            scheduled_model(flags.model, flags.backend),
+            call,
+            tokens=_scheduler.estimate_tokens(prompts[0].to_string()),
+        )
+        return self._llm_chain.create_outputs(result)[0][self._llm_chain.output_key]
+
+    def _call(self, inputs: Dict[str, str]) -> Dict[str, str]:
+        return {self.output_key: self._generate(inputs)}
+
+    def stream(self, inputs: Dict[str, str], on_token: Callable[[str], None]) -> str:
+        """Generates the output, streaming the tokens to on_token.
 
-        llm_chain = LLMChain(llm=self._llm, prompt=prompt)
-        output = llm_chain.predict(**inputs)
-        output = {self.output_key: output}
-        return output
+        on_token can raise to abort the generation, the exception is
+        then raised back. Without feature_flags.streaming, on_token gets
+        the whole output at once.
+        """
+        if not self.feature_flags.streaming:
+            output = self._generate(inputs)
+            on_token(output)
+            return output
+        return self._generate(inputs, on_token)
 
     @property
     def input_keys(self) -> List[str]:
-        return [
-            "from_name",
-            "from_last_name",
-            "to_name",
-            "to_last_name",
-            "formal_level",
-            "urgency_level",
-            "text_request_type",
-            "text_request_reason",
-            "subject_body_divider",
-            "include_link",
-            "text_request_length",
-        ]
+        return _INPUT_KEYS
 
     @property
     def output_keys(self) -> List[str]:
         return [self.output_key]
+
+
+_chains_lock = threading.Lock()
+_chains: Dict[Tuple[str, float, str, bool, str], SimpleTextGenerationChain] = {}
+
+
+def get_chain(
+    model: str,
+    temperature: float,
+    prompt_template: str = _prompts.email_prompt,
+    streaming: bool = False,
+) -> SimpleTextGenerationChain:
+    """Returns the chain for the given flags, built once per process.
+
+    The LLM runs on settings.LLM_BACKEND.
+
+    Chains hold no state across calls, so they are shared by all the
+    threads. Reusing them skips building the LLM client, the prompt and
+    the LLMChain on every generation.
+    """
+    backend = settings.LLM_BACKEND
+    key = (model, temperature, prompt_template, streaming, backend)
+    with _chains_lock:
+        chain = _chains.get(key)
+        if chain is None:
+            chain = SimpleTextGenerationChain(
+                feature_flags=TextGenerationChainFeatureFlags(
+                    model=model,
+                    temperature=temperature,
+                    prompt_template=prompt_template,
+                    streaming=streaming,
+                    backend=backend,
+                )
+            )
+            _chains[key] = chain
+        return chain
@@ -0,0 +1,412 @@
+"""Scheduling of LLM requests.
+
+All the requests to the LLM go through run, which queues them on a pool
+of settings.LLM_MAX_CONCURRENT_REQUESTS threads. Before being sent, a
+request waits for budget under the requests per minute and tokens per
+minute limits of its model (settings.LLM_RATE_LIMITS), which are token
+buckets shared through the db, see core.utils.rate_limits. The tokens of
+a request are estimated from its prompt, as the actual usage is only
+known afterwards.
+
+Rate limited requests (429) are retried after the Retry-After the API
+asks for, other transient errors with exponential backoff, up to
+_MAX_ATTEMPTS times. The LLM clients themselves don't retry, see
+_llms.
+
+Requests made within cancellable are dropped once their event is set,
+without being sent if they're still queued, waiting for budget or for a
+retry, e.g. the requests of speculative candidates that lost.
+
+Latency and token usage are logged for every request, and aggregated
+per model in metrics. Callers can also get the stats of their own
+requests with record_calls, late ones included. The requests of the
+last _WINDOW_SECONDS are kept to tell how models are doing right now,
+see recent_stats.
+"""
+import contextlib
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import openai
+from django.conf import settings
+from django.db import connection
+from langchain.schema import LLMResult
+
+from core.utils import rate_limits
+
+_MAX_ATTEMPTS = 5
+_BACKOFF_BASE_SECONDS = 2
+_BACKOFF_MAX_SECONDS = 60
+# Roughly, for English text.
+_CHARACTERS_PER_TOKEN = 4
+# Emails are short, completions are counted as that many tokens until
+# the actual usage is known.
+_COMPLETION_TOKENS_ESTIMATE = 500
+_WINDOW_SECONDS = 10 * 60
+
+_TRANSIENT_ERRORS = (
+    openai.error.Timeout,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+)
+
+
+@dataclass
+class ModelMetrics:
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    queued_seconds: float = 0
+    latency_seconds: float = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class LLMCallStats:
+    """The stats of a request, see record_calls."""
+
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0
+    retries: int = 0
+    succeeded: bool = False
+    # Requests cancelled before being sent cost nothing.
+    sent: bool = False
+
+
+class Cancelled(Exception):
+    """Raised by requests made within cancellable once cancelled."""
+
+
+class _Recorder:
+    def __init__(self, on_late_call: Optional[Callable[[LLMCallStats], None]]):
+        self.calls: List[LLMCallStats] = []
+        self.on_late_call = on_late_call
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def add(self, stats: LLMCallStats) -> None:
+        with self.lock:
+            if not self.closed:
+                self.calls.append(stats)
+                return
+        if self.on_late_call is None:
+            return
+        try:
+            self.on_late_call(stats)
+        except Exception:
+            logging.exception("Failed to record a late LLM call.")
+        finally:
+            # Late calls come from threads of their own, see
+            # record_calls.
+            connection.close()
+
+
+_calls: ContextVar[Optional[_Recorder]] = ContextVar("llm_calls", default=None)
+_cancelled: ContextVar[Optional[threading.Event]] = ContextVar(
+    "llm_cancelled", default=None
+)
+
+
+@contextlib.contextmanager
+def record_calls(
+    on_late_call: Optional[Callable[[LLMCallStats], None]] = None
+) -> Iterator[List[LLMCallStats]]:
+    """Collects the stats of the requests made within the block.
+
+    Requests made from other threads are collected as well as long as
+    they run in a copy of the context, see contextvars.copy_context.
+
+    Args:
+        on_late_call: called with the stats of the requests that
+            complete after the block exits, e.g. of speculative
+            candidates that lost, from the thread that made them.
+    """
+    recorder = _Recorder(on_late_call)
+    token = _calls.set(recorder)
+    try:
+        yield recorder.calls
+    finally:
+        _calls.reset(token)
+        with recorder.lock:
+            recorder.closed = True
+
+
+@contextlib.contextmanager
+def cancellable(cancelled: threading.Event) -> Iterator[None]:
+    """Cancels the requests made within the block once the event is set.
+
+    Requests not sent yet raise Cancelled instead. Requests already
+    sent complete, unless they're streamed and their listener raises,
+    see _llms.SimpleTextGenerationChain.stream.
+    """
+    token = _cancelled.set(cancelled)
+    try:
+        yield
+    finally:
+        _cancelled.reset(token)
+
+
+def _wait(seconds: float, cancelled: Optional[threading.Event]) -> None:
+    if cancelled is None:
+        time.sleep(seconds)
+        return
+    # Woken up as soon as cancelled.
+    if cancelled.wait(seconds):
+        raise Cancelled()
+
+
+def _check(cancelled: Optional[threading.Event]) -> None:
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled()
+
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, ModelMetrics] = {}
+
+
+def metrics() -> Dict[str, ModelMetrics]:
+    """Returns a snapshot of the metrics of every model so far."""
+    with _metrics_lock:
+        return {model: replace(m) for model, m in _metrics.items()}
+
+
+def _record(model: str, **values) -> None:
+    with _metrics_lock:
+        model_metrics = _metrics.setdefault(model, ModelMetrics())
+        for name, value in values.items():
+            setattr(model_metrics, name, getattr(model_metrics, name) + value)
+
+
+class RecentStats(NamedTuple):
+    requests: int
+    failure_rate: float
+    # 90th percentile.
+    latency_seconds: float
+
+
+_recent_lock = threading.Lock()
+# (finished at, latency, succeeded) of the requests of the window.
+_recent: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+
+
+def _record_recent(stats: LLMCallStats) -> None:
+    now = time.monotonic()
+    with _recent_lock:
+        recent = _recent.setdefault(stats.model, deque())
+        recent.append((now, stats.latency_seconds, stats.succeeded))
+        while recent and recent[0][0] < now - _WINDOW_SECONDS:
+            recent.popleft()
+
+
+def recent_stats(model: str) -> RecentStats:
+    """Returns the stats of the requests of the last _WINDOW_SECONDS."""
+    since = time.monotonic() - _WINDOW_SECONDS
+    with _recent_lock:
+        recent = [r for r in _recent.get(model, ()) if r[0] >= since]
+    if not recent:
+        return RecentStats(0, 0, 0)
+    latencies = [latency for _, latency, _ in recent]
+    failures = sum(1 for _, _, succeeded in recent if not succeeded)
+    latency = latencies[0]
+    if len(latencies) > 1:
+        latency = statistics.quantiles(latencies, n=10)[-1]
+    return RecentStats(len(recent), failures / len(recent), latency)
+
+
+def estimate_tokens(prompt: str) -> int:
+    return len(prompt) // _CHARACTERS_PER_TOKEN + _COMPLETION_TOKENS_ESTIMATE
+
+
+# Characters streamed by the request running on the current thread, see
+# count_streamed.
+_streamed = threading.local()
+
+
+def count_streamed(text: str) -> None:
+    """Counts text streamed by the request running on this thread.
+
+    Requests failing halfway through a stream, e.g. aborted by their
+    listener, are then charged for what they generated.
+    """
+    _streamed.characters = getattr(_streamed, "characters", 0) + len(text)
+
+
+def _estimate_usage(stats: LLMCallStats, tokens: int) -> None:
+    # For requests that come without usage: the prompt as estimated when
+    # queued, and what has been streamed of the completion.
+    stats.prompt_tokens = tokens - _COMPLETION_TOKENS_ESTIMATE
+    stats.completion_tokens = (
+        getattr(_streamed, "characters", 0) // _CHARACTERS_PER_TOKEN
+    )
+
+
+def _backoff(attempts: int) -> float:
+    return min(_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), _BACKOFF_MAX_SECONDS)
+
+
+def _retry_after(error: openai.error.RateLimitError) -> Optional[float]:
+    try:
+        return float(error.headers["retry-after"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _acquire(model: str, tokens: int, cancelled: Optional[threading.Event]) -> None:
+    _check(cancelled)
+    limits = settings.LLM_RATE_LIMITS.get(model)
+    if limits is None:
+        return
+    requests_rate = rate_limits.Rate(*limits["REQUESTS"])
+    tokens_rate = rate_limits.Rate(*limits["TOKENS"])
+    budget = {
+        f"LLM_REQUESTS:{model}": requests_rate,
+        f"LLM_TOKENS:{model}": tokens_rate,
+    }
+    # Requests larger than the burst would never fit.
+    tokens = min(tokens, tokens_rate.burst)
+    while True:
+        wait = rate_limits.try_acquire(
+            budget, tokens={f"LLM_REQUESTS:{model}": 1, f"LLM_TOKENS:{model}": tokens}
+        )
+        if wait == 0:
+            return
+        _wait(wait, cancelled)
+
+
+def _run(
+    stats: LLMCallStats,
+    call: Callable[[], LLMResult],
+    tokens: int,
+    queued_at: float,
+    cancelled: Optional[threading.Event],
+) -> LLMResult:
+    model = stats.model
+    _record(model, queued_seconds=time.monotonic() - queued_at)
+    started_at = time.monotonic()
+    was_cancelled = False
+    try:
+        attempts = 0
+        while True:
+            attempts += 1
+            _acquire(model, tokens, cancelled)
+            stats.sent = True
+            _streamed.characters = 0
+            try:
+                result = call()
+            except Cancelled:
+                raise
+            except (openai.error.RateLimitError, *_TRANSIENT_ERRORS) as e:
+                if attempts >= _MAX_ATTEMPTS:
+                    _estimate_usage(stats, tokens)
+                    _record(model, failures=1)
+                    raise
+                wait = None
+                if isinstance(e, openai.error.RateLimitError):
+                    wait = _retry_after(e)
+                wait = wait if wait is not None else _backoff(attempts)
+                logging.warning(
+                    f"LLM request to {model} failed ({e!r}), retrying in {wait}s."
+                )
+                _record(model, retries=1)
+                stats.retries += 1
+                _wait(wait, cancelled)
+                continue
+            except Exception:
+                _estimate_usage(stats, tokens)
+                _record(model, failures=1)
+                raise
+            break
+
+        latency = time.monotonic() - started_at
+        usage = (result.llm_output or {}).get("token_usage")
+        if usage:
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        else:
+            # Streamed completions come without usage.
+            prompt_tokens = tokens - _COMPLETION_TOKENS_ESTIMATE
+            completion_tokens = sum(
+                len(generation.text) // _CHARACTERS_PER_TOKEN
+                for generations in result.generations
+                for generation in generations
+            )
+        stats.prompt_tokens = prompt_tokens
+        stats.completion_tokens = completion_tokens
+        stats.succeeded = True
+        logging.info(
+            f"LLM request to {model} took {latency:.2f}s, {prompt_tokens} prompt"
+            f" and {completion_tokens} completion tokens."
+        )
+        _record(
+            model,
+            requests=1,
+            latency_seconds=latency,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+        return result
+    except Cancelled:
+        was_cancelled = True
+        raise
+    finally:
+        stats.latency_seconds = time.monotonic() - started_at
+        # Cancelled requests say nothing about how the model is doing.
+        if not was_cancelled:
+            _record_recent(stats)
+        # Rate limits are in the db, the threads are kept around though.
+        connection.close()
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LLM_MAX_CONCURRENT_REQUESTS,
+                thread_name_prefix="llm",
+            )
+        return _executor
+
+
+def run(model: str, call: Callable[[], LLMResult], tokens: int) -> LLMResult:
+    """Runs an LLM request once it fits in the budget of its model.
+
+    Blocks until the request is done, callers on different threads run
+    concurrently.
+
+    Args:
+        model: the model the request is for.
+        call: makes the request.
+        tokens: the estimated tokens of the request, see
+            estimate_tokens.
+
+    Raises:
+        Cancelled: if cancelled before completion, see cancellable.
+    """
+    stats = LLMCallStats(model)
+    cancelled = _cancelled.get()
+    _check(cancelled)
+    future = _get_executor().submit(
+        _run, stats, call, tokens, time.monotonic(), cancelled
+    )
+    try:
+        return future.result()
+    finally:
+        recorder = _calls.get()
+        if recorder is not None and stats.sent:
+            recorder.add(stats)
@@ -1,11 +1,148 @@
+import contextvars
 import logging
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
 
 from core import errors as core_errors
 from core import types
-from core.text_generation import _llms
+from core.text_generation import _cache, _llms, _scheduler
+from core.utils import with_default
 
 subject_body_divider = "[divider]"
+# Subjects are one-liners, an output without divider past that many
+# characters won't get one.
+_MAX_SUBJECT_LENGTH = 300
+
+
+def _parse_email(email: str, include_link: bool) -> Tuple[str, str]:
+    try:
+        subject, body = tuple(
+            text.strip() for text in email.split(subject_body_divider)
+        )
+    except ValueError as e:
+        raise core_errors.TextGenerationFailureError(
+            "Divider not correctly generated."
+        ) from e
+
+    if (
+        include_link
+        # TODO: make this a constant, perhaps use curly brackets since
+        # it's more python native (will probably need some toying around
+        # because of the prompt formatting).
+        and ("[link_for_user]" not in body or "[link_for_user]" in subject)
+    ):
+        logging.error(f"Invalid email: {email}")
+        raise core_errors.TextGenerationFailureError()
+
+    return subject, body
+
+
+class _EmailStreamParser:
+    """Parses an email as it's streamed, see _llms.
+
+    Raises TextGenerationFailureError as soon as the email can't be
+    valid anymore, which aborts the generation.
+    """
+
+    def __init__(
+        self, include_link: bool, on_subject: Optional[Callable[[str], None]] = None
+    ):
+        self.include_link = include_link
+        self.on_subject = on_subject
+        self.email = ""
+        self.subject: Optional[str] = None
+
+    def feed(self, token: str) -> None:
+        self.email += token
+        if self.subject is None:
+            subject, divider, _ = self.email.partition(subject_body_divider)
+            if not divider:
+                if len(self.email) > _MAX_SUBJECT_LENGTH + len(subject_body_divider):
+                    raise core_errors.TextGenerationFailureError(
+                        "Divider not generated after the subject."
+                    )
+                return
+            self.subject = subject.strip()
+            if not self.subject or (
+                self.include_link and "[link_for_user]" in self.subject
+            ):
+                raise core_errors.TextGenerationFailureError(
+                    f"Invalid subject: {self.subject}"
+                )
+            if self.on_subject is not None:
+                self.on_subject(self.subject)
+        elif self.email.count(subject_body_divider) > 1:
+            raise core_errors.TextGenerationFailureError("Divider generated twice.")
+
+
+def _generate_one(
+    chain: _llms.SimpleTextGenerationChain,
+    inputs: Dict[str, Any],
+    include_link: bool,
+    on_subject: Optional[Callable[[str], None]],
+    cancelled: Optional[threading.Event] = None,
+) -> Tuple[str, Tuple[str, str]]:
+    if not settings.LLM_STREAMING:
+        email = chain(inputs)[chain.output_key]
+        subject, body = _parse_email(email, include_link)
+        if on_subject is not None:
+            on_subject(subject)
+        return email, (subject, body)
+
+    parser = _EmailStreamParser(include_link, on_subject)
+
+    def on_token(token: str) -> None:
+        if cancelled is not None and cancelled.is_set():
+            raise _scheduler.Cancelled()
+        parser.feed(token)
+
+    email = chain.stream(inputs, on_token)
+    return email, _parse_email(email, include_link)
+
+
+def _generate(
+    chains: List[_llms.SimpleTextGenerationChain],
+    inputs: Dict[str, Any],
+    include_link: bool,
+    on_subject: Optional[Callable[[str], None]],
+) -> Tuple[int, str, Tuple[str, str]]:
+    """Returns the first valid email of concurrent generations.
+
+    Generates a candidate per chain, and returns the index of the chain
+    of the email along with it.
+    """
+    if len(chains) == 1:
+        return (0, *_generate_one(chains[0], inputs, include_link, on_subject))
+
+    cancelled = threading.Event()
+
+    def generate_candidate(chain):
+        with _scheduler.cancellable(cancelled):
+            return _generate_one(chain, inputs, include_link, on_subject, cancelled)
+
+    executor = ThreadPoolExecutor(max_workers=len(chains))
+    # Candidates run in copies of the context, see record_calls.
+    futures = {
+        executor.submit(contextvars.copy_context().run, generate_candidate, chain): i
+        for i, chain in enumerate(chains)
+    }
+    try:
+        error = None
+        for future in as_completed(futures):
+            try:
+                return (futures[future], *future.result())
+            except Exception as e:
+                error = e
+        raise error
+    finally:
+        # The other candidates are dropped if they haven't been sent to
+        # the LLM yet, and aborted if they're being streamed. The ones
+        # being generated without streaming complete in the background.
+        cancelled.set()
+        executor.shutdown(wait=False)
 
 
 def generate_email_with_llm(
@@ -21,6 +158,9 @@ def generate_email_with_llm(
     include_link: bool = True,
     temperature: float = 0,
     model: str = "gpt-3.5-turbo",
+    use_cache: bool = True,
+    candidates: Optional[int] = None,
+    on_subject: Optional[Callable[[str], None]] = None,
 ) -> Tuple[str, str]:
     """Generate an email with the given parameters.
 
@@ -28,45 +168,68 @@ def generate_email_with_llm(
         text_request_type: The type of request to make in the email. If
         include_link, the email will contain a [link_for_user]
         placeholder that can be substituted with a link.
+        use_cache: with a temperature of 0, whether to return the
+        email generated before with the same parameters, if any. The
+        newly generated email replaces the cached one otherwise.
+        candidates: the number of emails to generate concurrently, the
+        first valid one is returned. Defaults to
+        settings.LLM_SPECULATIVE_CANDIDATES. With a temperature of 0,
+        the extra candidates are sampled at
+        settings.LLM_SPECULATIVE_TEMPERATURE, they'd all be the same
+        otherwise.
+        on_subject: called with the subject as soon as it's generated,
+        before the body when streaming (settings.LLM_STREAMING). With
+        candidates, it can be called for every one of them.
     """
-    feature_flags = _llms.TextGenerationChainFeatureFlags(
-        temperature=temperature, model=model
+    chain = _llms.get_chain(
+        model=model, temperature=temperature, streaming=settings.LLM_STREAMING
     )
-    chain = _llms.SimpleTextGenerationChain(feature_flags=feature_flags)
-    email: str = chain(
-        {
-            "from_name": from_name,
-            "from_last_name": from_last_name,
-            "to_name": to_name,
-            "to_last_name": to_last_name,
-            "formal_level": formal_level,
-            "urgency_level": urgency_level,
-            "text_request_type": text_request_type,
-            "text_request_reason": text_request_reason,
-            "subject_body_divider": subject_body_divider,
-            "include_link": include_link,
-            "text_request_length": text_request_length,
-        }
-    )[chain.output_key]
+    inputs = {
+        "from_name": from_name,
+        "from_last_name": from_last_name,
+        "to_name": to_name,
+        "to_last_name": to_last_name,
+        "formal_level": formal_level,
+        "urgency_level": urgency_level,
+        "text_request_type": text_request_type,
+        "text_request_reason": text_request_reason,
+        "subject_body_divider": subject_body_divider,
+        "include_link": include_link,
+        "text_request_length": text_request_length,
+    }
 
-    try:
-        subject, body = tuple(
-            text.strip() for text in email.split(subject_body_divider)
+    # Outputs are only deterministic, and worth caching, without
+    # sampling.
+    cache_key = None
+    if temperature == 0:
+        cache_key = _cache.cache_key(
+            model, temperature, chain.feature_flags.prompt_template, inputs
         )
-    except ValueError as e:
-        raise core_errors.TextGenerationFailureError(
-            "Divider not correctly generated."
-        ) from e
+    cached = _cache.get(cache_key) if cache_key is not None and use_cache else None
 
-    if (
-        include_link
-        # TODO: make this a constant, perhaps use curly brackets since
-        # it's more python native (will probably need some toying around
-        # because of the prompt formatting).
-        and ("[link_for_user]" not in body or "[link_for_user]" in subject)
-    ):
-        logging.error(f"Invalid email: {email}")
-        raise core_errors.TextGenerationFailureError()
+    if cached is not None:
+        subject, body = _parse_email(cached, include_link)
+        if on_subject is not None:
+            on_subject(subject)
+        return subject, body
+
+    candidates = with_default(candidates, settings.LLM_SPECULATIVE_CANDIDATES)
+    chains = [chain]
+    if candidates > 1:
+        extra_chain = chain
+        if temperature == 0:
+            extra_chain = _llms.get_chain(
+                model=model,
+                temperature=settings.LLM_SPECULATIVE_TEMPERATURE,
+                streaming=settings.LLM_STREAMING,
+            )
+        chains += [extra_chain] * (candidates - 1)
+    index, email, (subject, body) = _generate(chains, inputs, include_link, on_subject)
+
+    # Sampled candidates aren't what the parameters deterministically
+    # give, they aren't cached.
+    if cache_key is not None and index == 0:
+        _cache.put(cache_key, email)
 
     return subject, body
 
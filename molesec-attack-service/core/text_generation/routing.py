@@ -0,0 +1,57 @@
+"""Routing of generations to models.
+
+Every request type has a route (settings.LLM_ROUTES), the models it can
+be generated with by order of preference. pick_model returns the first
+model of the route that's healthy, judging by its requests of the last
+minutes (see _scheduler.recent_stats):
+
+- its 90th percentile latency is within its SLO
+    (settings.LLM_LATENCY_SLOS), retries and rate limits included.
+- its failure rate is at most settings.LLM_MAX_FAILURE_RATE.
+
+Models with fewer than _MIN_REQUESTS recent requests are assumed to be
+healthy, so that degraded models get traffic again once their window is
+over. If no model is healthy, the last one, the fallback, is used.
+"""
+import logging
+
+from django.conf import settings
+
+from core import types
+from core.text_generation import _llms, _scheduler
+
+_MIN_REQUESTS = 5
+
+
+def _is_healthy(model: str) -> bool:
+    stats = _scheduler.recent_stats(_llms.scheduled_model(model, settings.LLM_BACKEND))
+    if stats.requests < _MIN_REQUESTS:
+        return True
+    slo = settings.LLM_LATENCY_SLOS.get(model)
+    if slo is not None and stats.latency_seconds > slo:
+        logging.warning(
+            f"{model} is degraded, p90 latency of {stats.latency_seconds:.1f}s"
+            f" over its {slo}s SLO."
+        )
+        return False
+    if stats.failure_rate > settings.LLM_MAX_FAILURE_RATE:
+        logging.warning(
+            f"{model} is degraded, {stats.failure_rate:.0%} of its requests failed."
+        )
+        return False
+    return True
+
+
+def pick_model(request_type: types.TextGenerationRequestType) -> str:
+    """Returns the model to generate requests of the given type with."""
+    route = settings.LLM_ROUTES.get(
+        types.TextGenerationRequestType(request_type).value,
+        settings.LLM_ROUTES["DEFAULT"],
+    )
+    for model in route:
+        if _is_healthy(model):
+            return model
+    return route[-1]
+
+
+__all__ = ["pick_model"]
@@ -0,0 +1,80 @@
+"""Email templates, generated once and personalized per target.
+
+Templates are generated with placeholders in place of the names of the
+sender and the recipient, which are then substituted by personalize.
+Placeholders are made to look like names to the LLM, rather than like
+parameters, so that it writes them as it would write names.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+
+from core import errors as core_errors
+from core.text_generation.emails import generate_email_with_llm
+
+NAME_PLACEHOLDERS = {
+    "from_name": "__FROM_NAME__",
+    "from_last_name": "__FROM_LAST_NAME__",
+    "to_name": "__TO_NAME__",
+    "to_last_name": "__TO_LAST_NAME__",
+}
+
+
+def generate_email_templates_with_llm(
+    variants: int, with_sender: bool, **parameters
+) -> List[Tuple[str, str]]:
+    """Generates templates of emails, concurrently.
+
+    Args:
+        variants: the number of templates to generate. Only generations
+            with a temperature above 0 will actually differ.
+        with_sender: whether the email is signed by someone.
+        parameters: generate_email_with_llm parameters, but the names.
+
+    Returns:
+        (subject, body) templates, failed generations are left out.
+
+    Raises:
+        TextGenerationFailureError: if all generations failed.
+    """
+    names = {
+        key: placeholder
+        for key, placeholder in NAME_PLACEHOLDERS.items()
+        if with_sender or key.startswith("to_")
+    }
+
+    def generate(_) -> Optional[Tuple[str, str]]:
+        try:
+            return generate_email_with_llm(**parameters, **names)
+        except core_errors.TextGenerationFailureError:
+            logging.exception("Could not generate an email template.")
+            return None
+        finally:
+            # Generations are cached in the db, see _cache.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=variants) as executor:
+        # See _scheduler.record_calls.
+        futures = [
+            executor.submit(contextvars.copy_context().run, generate, variant)
+            for variant in range(variants)
+        ]
+        templates = [t for t in (future.result() for future in futures) if t]
+    if not templates:
+        raise core_errors.TextGenerationFailureError("No template generated.")
+    return templates
+
+
+def personalize(subject: str, body: str, names: Dict[str, str]) -> Tuple[str, str]:
+    """Replaces the placeholders of a template with the given names."""
+    for key, placeholder in NAME_PLACEHOLDERS.items():
+        value = names.get(key) or ""
+        subject = subject.replace(placeholder, value)
+        body = body.replace(placeholder, value)
+    return subject, body
+
+
+__all__ = ["generate_email_templates_with_llm", "personalize"]
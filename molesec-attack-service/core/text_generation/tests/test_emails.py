@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.errors import TextGenerationFailureError
+from core.models import GenerationCacheEntry
+from core.text_generation import generate_email_with_llm
+
+
+@patch("core.text_generation.emails._llms.get_chain")
+class GenerateEmailCacheTestCase(TestCase):
+    def setUp(self):
+        self.chain = MagicMock(output_key="output")
+        self.chain.feature_flags.prompt_template = "template"
+        self.chain.return_value = {"output": "Hi [divider] Click [link_for_user]"}
+
+    def test_caches_deterministic_generations(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+
+        expected = ("Hi", "Click [link_for_user]")
+        self.assertEqual(generate_email_with_llm(to_name="John"), expected)
+        self.assertEqual(generate_email_with_llm(to_name="John"), expected)
+        self.assertEqual(self.chain.call_count, 1)
+        self.assertEqual(GenerationCacheEntry.objects.get().hits, 1)
+
+        generate_email_with_llm(to_name="Jane")
+        self.assertEqual(self.chain.call_count, 2)
+
+        # Changing the prompt invalidates the entries.
+        self.chain.feature_flags.prompt_template = "better template"
+        generate_email_with_llm(to_name="John")
+        self.assertEqual(self.chain.call_count, 3)
+
+    def test_bypasses_the_cache(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+
+        generate_email_with_llm(to_name="John")
+        self.chain.return_value = {"output": "Yo [divider] See [link_for_user]"}
+        self.assertEqual(
+            generate_email_with_llm(to_name="John", use_cache=False),
+            ("Yo", "See [link_for_user]"),
+        )
+        # The regenerated email replaces the cached one.
+        self.assertEqual(
+            generate_email_with_llm(to_name="John"), ("Yo", "See [link_for_user]")
+        )
+        self.assertEqual(self.chain.call_count, 2)
+
+        generate_email_with_llm(to_name="John", temperature=0.7)
+        generate_email_with_llm(to_name="John", temperature=0.7)
+        self.assertEqual(self.chain.call_count, 4)
+
+    def test_samples_extra_candidates(self, mock_get_chain):
+        sampled_chain = MagicMock(output_key="output")
+        sampled_chain.return_value = {"output": "Yo [divider] See [link_for_user]"}
+        self.chain.return_value = {"output": "Hi [divider] Click"}
+        mock_get_chain.side_effect = lambda temperature, **kwargs: (
+            self.chain if temperature == 0 else sampled_chain
+        )
+
+        self.assertEqual(
+            generate_email_with_llm(to_name="John", candidates=3),
+            ("Yo", "See [link_for_user]"),
+        )
+        self.assertEqual(mock_get_chain.call_args.kwargs["temperature"], 0.7)
+        # Only the deterministic candidate is cached.
+        self.assertFalse(GenerationCacheEntry.objects.exists())
+
+
+@patch("core.text_generation.emails._llms.get_chain")
+class GenerateEmailCandidatesTestCase(SimpleTestCase):
+    def setUp(self):
+        self.chain = MagicMock(output_key="output")
+        self.chain.feature_flags.prompt_template = "template"
+
+    def test_returns_a_valid_candidate(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+        self.chain.side_effect = [
+            {"output": "Hi, click [link_for_user]"},
+            {"output": "Hi [divider] Click [link_for_user]"},
+            {"output": "Hi [divider] Click"},
+        ]
+
+        self.assertEqual(
+            generate_email_with_llm(temperature=0.7, candidates=3),
+            ("Hi", "Click [link_for_user]"),
+        )
+
+    def test_all_candidates_invalid(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+        self.chain.return_value = {"output": "Hi [divider] Click"}
+
+        with self.assertRaises(TextGenerationFailureError):
+            generate_email_with_llm(temperature=0.7, candidates=2)
+        self.assertEqual(self.chain.call_count, 2)
+
+
+@override_settings(LLM_STREAMING=True)
+@patch("core.text_generation.emails._llms.get_chain")
+class GenerateEmailStreamingTestCase(SimpleTestCase):
+    def setUp(self):
+        self.chain = MagicMock(output_key="output")
+        self.chain.feature_flags.prompt_template = "template"
+
+    def test_hands_the_subject_early(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+        subjects = []
+
+        def stream(inputs, on_token):
+            for token in ("Hi ", "[divider]"):
+                on_token(token)
+            # The subject comes before the body.
+            self.assertEqual(subjects, ["Hi"])
+            on_token(" Click [link_for_user]")
+            return "Hi [divider] Click [link_for_user]"
+
+        self.chain.stream.side_effect = stream
+
+        self.assertEqual(
+            generate_email_with_llm(temperature=0.7, on_subject=subjects.append),
+            ("Hi", "Click [link_for_user]"),
+        )
+        self.assertEqual(subjects, ["Hi"])
+
+    def test_aborts_broken_emails(self, mock_get_chain):
+        mock_get_chain.return_value = self.chain
+        for tokens in [
+            ("Click [link_for_user] ", "[divider]", " Body", "[link_for_user]"),
+            ("Hi ", "[divider]", " Body ", "[divider]", "[link_for_user]"),
+            ("Hi " * 200, "[divider]", " Body ", "[link_for_user]"),
+        ]:
+            consumed = []
+
+            def stream(inputs, on_token, tokens=tokens):
+                for token in tokens:
+                    consumed.append(token)
+                    on_token(token)
+
+            self.chain.stream.side_effect = stream
+            with self.assertRaises(TextGenerationFailureError):
+                generate_email_with_llm(temperature=0.7)
+            # Aborted before the last token.
+            self.assertLess(len(consumed), len(tokens))
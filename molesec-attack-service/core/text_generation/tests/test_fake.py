@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from core.errors import TextGenerationFailureError
+from core.text_generation import _scheduler, generate_email_with_llm, record_calls
+from core.text_generation._fake import FakeLLM
+
+
+@override_settings(
+    LLM_BACKEND="fake", FAKE_LLM_LATENCY_SECONDS=0, FAKE_LLM_COMPLETION_TOKENS=20
+)
+class FakeBackendTestCase(SimpleTestCase):
+    def test_generates_valid_emails(self):
+        for streaming in [False, True]:
+            with override_settings(LLM_STREAMING=streaming):
+                subject, body = generate_email_with_llm(temperature=0.7)
+            self.assertEqual(subject, "Quick question")
+            self.assertIn("[link_for_user]", body)
+        self.assertGreater(_scheduler.metrics()["fake:gpt-3.5-turbo"].requests, 0)
+
+    @override_settings(FAKE_LLM_FAILURE_RATE=1)
+    def test_fails(self):
+        with self.assertRaises(TextGenerationFailureError):
+            generate_email_with_llm(temperature=0.7)
+
+    @override_settings(FAKE_LLM_FAILURE_RATE=1)
+    def test_records_calls(self):
+        with record_calls() as calls:
+            with self.assertRaises(TextGenerationFailureError):
+                generate_email_with_llm(temperature=0.7, candidates=2)
+        # Candidates run on threads of their own.
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0].model, "fake:gpt-3.5-turbo")
+        self.assertEqual(calls[0].completion_tokens, 19)
+
+    @override_settings(FAKE_LLM_LATENCY_SECONDS=0.05)
+    def test_records_late_calls(self):
+        late = []
+        with record_calls(on_late_call=late.append) as calls:
+            generate_email_with_llm(temperature=0.7, candidates=2)
+        # The loser might still be running.
+        for _ in range(100):
+            if len(calls) + len(late) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(calls) + len(late), 2)
+
+    def test_generates_asynchronously(self):
+        result = asyncio.run(FakeLLM().agenerate(["prompt"]))
+        self.assertIn("[link_for_user]", result.generations[0][0].text)
+        self.assertEqual(result.llm_output["token_usage"]["completion_tokens"], 20)
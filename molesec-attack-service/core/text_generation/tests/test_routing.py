@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.text_generation import _scheduler, pick_model
+from core.text_generation._scheduler import LLMCallStats, RecentStats
+from core.types import TextGenerationRequestType
+
+
+@override_settings(
+    LLM_BACKEND="openai",
+    LLM_ROUTES={
+        "DEFAULT": ["slow", "fast"],
+        "LOOK_INTO_THIS": ["fast"],
+    },
+    LLM_LATENCY_SLOS={"slow": 10, "fast": 5},
+    LLM_MAX_FAILURE_RATE=0.2,
+)
+@patch("core.text_generation.routing._scheduler.recent_stats")
+class PickModelTestCase(SimpleTestCase):
+    def _stats(self, **stats):
+        return lambda model: stats.get(model, RecentStats(0, 0, 0))
+
+    def test_routes_per_request_type(self, mock_stats):
+        mock_stats.side_effect = self._stats()
+        self.assertEqual(pick_model(TextGenerationRequestType.CLICK_LINK), "slow")
+        self.assertEqual(pick_model(TextGenerationRequestType.LOOK_INTO_THIS), "fast")
+
+    def test_falls_back_when_degraded(self, mock_stats):
+        click_link = TextGenerationRequestType.CLICK_LINK
+
+        mock_stats.side_effect = self._stats(slow=RecentStats(20, 0, 12))
+        self.assertEqual(pick_model(click_link), "fast")
+
+        mock_stats.side_effect = self._stats(slow=RecentStats(20, 0.5, 1))
+        self.assertEqual(pick_model(click_link), "fast")
+
+        # Too few requests to tell.
+        mock_stats.side_effect = self._stats(slow=RecentStats(2, 1, 60))
+        self.assertEqual(pick_model(click_link), "slow")
+
+        # All degraded, the last model is the fallback.
+        mock_stats.side_effect = self._stats(
+            slow=RecentStats(20, 1, 60), fast=RecentStats(20, 1, 60)
+        )
+        self.assertEqual(pick_model(click_link), "fast")
+
+
+class RecentStatsTestCase(SimpleTestCase):
+    def test_window(self):
+        for latency in range(1, 11):
+            _scheduler._record_recent(
+                LLMCallStats("window", latency_seconds=latency, succeeded=latency > 2)
+            )
+
+        stats = _scheduler.recent_stats("window")
+        self.assertEqual(stats.requests, 10)
+        self.assertAlmostEqual(stats.failure_rate, 0.2)
+        self.assertGreater(stats.latency_seconds, 9)
+
+        with patch(
+            "core.text_generation._scheduler.time.monotonic",
+            return_value=_scheduler.time.monotonic() + _scheduler._WINDOW_SECONDS + 1,
+        ):
+            self.assertEqual(_scheduler.recent_stats("window").requests, 0)
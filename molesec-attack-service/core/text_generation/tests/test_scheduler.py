@@ -0,0 +1,111 @@
+import threading
+from unittest.mock import Mock, patch
+
+import openai
+from django.test import SimpleTestCase, override_settings
+from langchain.schema import LLMResult
+
+from core.text_generation import _scheduler
+
+
+def _result(prompt_tokens=10, completion_tokens=5):
+    return LLMResult(
+        generations=[],
+        llm_output={
+            "token_usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+        },
+    )
+
+
+@override_settings(
+    LLM_RATE_LIMITS={"model": {"REQUESTS": (60, 1), "TOKENS": (600, 100)}}
+)
+@patch("core.text_generation._scheduler.time.sleep")
+@patch("core.text_generation._scheduler.rate_limits.try_acquire", return_value=0)
+class SchedulerTestCase(SimpleTestCase):
+    def test_waits_for_budget(self, mock_acquire, mock_sleep):
+        mock_acquire.side_effect = [2.5, 0]
+
+        _scheduler.run("model", _result, tokens=1000)
+
+        mock_sleep.assert_called_once_with(2.5)
+        # Capped to the burst, it would never fit otherwise.
+        self.assertEqual(
+            mock_acquire.call_args.kwargs["tokens"],
+            {"LLM_REQUESTS:model": 1, "LLM_TOKENS:model": 100},
+        )
+
+    def test_retries_rate_limited_requests(self, mock_acquire, mock_sleep):
+        call = Mock(
+            side_effect=[
+                openai.error.RateLimitError(headers={"retry-after": "7"}),
+                openai.error.Timeout(),
+                _result(),
+            ]
+        )
+        before = _scheduler.metrics().get("model", _scheduler.ModelMetrics())
+
+        _scheduler.run("model", call, tokens=10)
+
+        self.assertEqual(call.call_count, 3)
+        self.assertEqual(
+            [c.args[0] for c in mock_sleep.call_args_list],
+            [7.0, _scheduler._backoff(2)],
+        )
+        after = _scheduler.metrics()["model"]
+        self.assertEqual(after.requests - before.requests, 1)
+        self.assertEqual(after.retries - before.retries, 2)
+        self.assertEqual(after.prompt_tokens - before.prompt_tokens, 10)
+
+    def test_gives_up(self, mock_acquire, mock_sleep):
+        call = Mock(side_effect=openai.error.RateLimitError())
+
+        with self.assertRaises(openai.error.RateLimitError):
+            _scheduler.run("model", call, tokens=10)
+        self.assertEqual(call.call_count, _scheduler._MAX_ATTEMPTS)
+
+    def test_estimates_usage_of_failed_streams(self, mock_acquire, mock_sleep):
+        def call():
+            _scheduler.count_streamed("a" * 40)
+            # E.g. aborted by the listener of the tokens.
+            raise ValueError()
+
+        with _scheduler.record_calls() as calls:
+            with self.assertRaises(ValueError):
+                _scheduler.run("model", call, tokens=600)
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(calls[0].sent)
+        self.assertFalse(calls[0].succeeded)
+        self.assertEqual(calls[0].prompt_tokens, 100)
+        self.assertEqual(calls[0].completion_tokens, 10)
+
+    def test_models_without_limits(self, mock_acquire, mock_sleep):
+        _scheduler.run("other", _result, tokens=10)
+        mock_acquire.assert_not_called()
+
+    def test_cancels_requests_not_sent_yet(self, mock_acquire, mock_sleep):
+        call = Mock(return_value=_result())
+        cancelled = threading.Event()
+
+        def acquire(*args, **kwargs):
+            # Cancelled while waiting for budget.
+            cancelled.set()
+            return 60
+
+        mock_acquire.side_effect = acquire
+        with _scheduler.record_calls() as calls:
+            with _scheduler.cancellable(cancelled):
+                with self.assertRaises(_scheduler.Cancelled):
+                    _scheduler.run("model", call, tokens=10)
+                # Not even queued.
+                with self.assertRaises(_scheduler.Cancelled):
+                    _scheduler.run("model", call, tokens=10)
+
+        call.assert_not_called()
+        mock_sleep.assert_not_called()
+        self.assertEqual(mock_acquire.call_count, 1)
+        self.assertEqual(calls, [])
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from enum import Enum
 from typing import Any, List, Literal, Optional, TypedDict
 
@@ -100,6 +100,24 @@ class ProfileData(Individual):
     organization: Organization
 
 
+class ProfileDataChange(BaseModel):
+    id: int
+    organization_id: UUID4
+    individual_id: Optional[UUID4]
+    model: str
+    operation: str
+    time_created: datetime
+    # Current emails of the individual, along with the email of the
+    # handle for changes of email handles.
+    emails: List[str]
+
+
+class ProfileDataChanges(BaseModel):
+    changes: List[ProfileDataChange]
+    # To pass to the next call.
+    cursor: int
+
+
 class IndividualName(TypedDict):
     first_name: Optional[str]
     last_name: Optional[str]
@@ -65,22 +65,31 @@ email.
 import base64
 import logging
 import smtplib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
-import dns
-import dns.resolver
 import requests
-from cachetools import Cache, cached
 from django.conf import settings
 from django.core import mail as django_mail
 from google.auth import exceptions as google_auth_exceptions
-from google.oauth2 import service_account
-from googleapiclient.discovery import build as google_service_build
 from pydantic import EmailStr
 
 from core import errors as core_errors
+from core.models import MailWorkspace
+from core.utils import gmail, senders, smtp, workspaces
 
 
 def send_or_insert_email(
@@ -134,11 +143,7 @@ def send_or_insert_email(
         extra_headers: extra headers to add to the email.
     """
 
-    if extra_headers is not None:
-        # Subject, From, Bcc, To, Cc
-        forbidden = {"subject", "from", "bcc", "to", "cc"}
-        if any(k.lower() in forbidden for k in extra_headers.keys()):
-            raise ValueError(f"Cannot set forbidden headers: {forbidden}.")
+    _validate_extra_headers(extra_headers)
 
     # In this case it doesn't matter if we control the from email
     # address, since we are inserting the email in the inbox directly.
@@ -169,6 +174,131 @@ def send_or_insert_email(
         )
 
 
+class EmailProvider(str, Enum):
+    """How send_or_insert_email gets an email out."""
+
+    GOOGLE_INSERTION = "GOOGLE_INSERTION"
+    GMAIL_SMTP = "GMAIL_SMTP"
+    MAILGUN = "MAILGUN"
+
+
+def get_email_provider(from_email: EmailStr, to_email: EmailStr) -> EmailProvider:
+    """Returns the provider send_or_insert_email would go through."""
+    if supports_insertion(to_email):
+        return EmailProvider.GOOGLE_INSERTION
+    if from_email in settings.COMMON_GMAIL_EMAIL_ADDRESSES:
+        return EmailProvider.GMAIL_SMTP
+    return EmailProvider.MAILGUN
+
+
+class OutgoingEmail(NamedTuple):
+    """Arguments of send_or_insert_email."""
+
+    from_email: EmailStr
+    from_name: Optional[str]
+    from_last_name: Optional[str]
+    to_email: EmailStr
+    subject: str
+    body: str
+    is_html: bool
+    extra_headers: Optional[Dict[str, str]] = None
+
+
+K = TypeVar("K", bound=Hashable)
+
+_MAX_CONCURRENT_SENDERS = 8
+
+
+def send_or_insert_emails(
+    emails: Mapping[K, OutgoingEmail]
+) -> Dict[K, Optional[Exception]]:
+    """Sends or inserts many emails, see send_or_insert_email.
+
+    Emails that can be inserted are inserted in batches, see
+    gmail.insert_messages, the others are sent in parallel across the
+    sender accounts. Failing to get an email out doesn't prevent the
+    others from going out.
+
+    Args:
+        emails: emails by an arbitrary key, e.g. the id of the artifact
+            they belong to.
+
+    Returns:
+        The emails keys, mapped to None if the email went out or to the
+        exception raised otherwise.
+    """
+    results: Dict[K, Optional[Exception]] = {}
+    to_insert = {}
+    to_send = {}
+    for key, email in emails.items():
+        try:
+            _validate_extra_headers(email.extra_headers)
+            if supports_insertion(email.to_email):
+                to_insert[key] = (
+                    email.to_email,
+                    _insertion_body(
+                        from_email=email.from_email,
+                        from_name=email.from_name,
+                        from_last_name=email.from_last_name,
+                        to_email=email.to_email,
+                        subject=email.subject,
+                        body=email.body,
+                        is_html=email.is_html,
+                        extra_headers=email.extra_headers,
+                    ),
+                )
+            else:
+                to_send[key] = email
+        except Exception as e:
+            results[key] = e
+
+    logging.info(f"Inserting {len(to_insert)} emails.")
+    for key, response in gmail.insert_messages(to_insert).items():
+        if isinstance(response, google_auth_exceptions.GoogleAuthError):
+            response = core_errors.EmailInsertionAuthError(response)
+        results[key] = response if isinstance(response, Exception) else None
+
+    # Every sender account goes through its own quota and connections,
+    # so accounts send in parallel, each one an email at a time.
+    by_sender: Dict[str, List[Tuple[K, OutgoingEmail]]] = defaultdict(list)
+    for key, email in to_send.items():
+        by_sender[email.from_email].append((key, email))
+    if by_sender:
+        with ThreadPoolExecutor(
+            max_workers=min(_MAX_CONCURRENT_SENDERS, len(by_sender))
+        ) as executor:
+            for sender_results in executor.map(_send_emails, by_sender.values()):
+                results.update(sender_results)
+
+    return results
+
+
+def _send_emails(emails: List[Tuple[K, OutgoingEmail]]) -> Dict[K, Optional[Exception]]:
+    results: Dict[K, Optional[Exception]] = {}
+    for key, email in emails:
+        try:
+            _send_email_to_recipients(
+                from_email=email.from_email,
+                recipients=[email.to_email],
+                subject=email.subject,
+                body=email.body,
+                is_html=email.is_html,
+                extra_headers=email.extra_headers,
+            )
+            results[key] = None
+        except Exception as e:
+            results[key] = e
+    return results
+
+
+def _validate_extra_headers(extra_headers: Optional[Dict[str, str]]) -> None:
+    if extra_headers is not None:
+        # Subject, From, Bcc, To, Cc
+        forbidden = {"subject", "from", "bcc", "to", "cc"}
+        if any(k.lower() in forbidden for k in extra_headers.keys()):
+            raise ValueError(f"Cannot set forbidden headers: {forbidden}.")
+
+
 def _send_email_to_recipients(
     from_email: EmailStr,
     recipients: List[EmailStr],
@@ -314,11 +444,13 @@ def _send_smtp_email(
         for k, v in extra_headers.items():
             message[k] = v
 
-    server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
-    server.ehlo()
-    server.login(from_email, from_email_psw)
-    server.send_message(message)
-    server.close()
+    try:
+        # Connections are kept open and reused by the following sends.
+        smtp.send_message("smtp.gmail.com", 465, from_email, from_email_psw, message)
+    except (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused):
+        # Wrong credentials or, usually, the sending quota ran out.
+        senders.report_failure(from_email)
+        raise
 
 
 def _send_email_with_django(
@@ -363,34 +495,9 @@ def supports_insertion(email: EmailStr) -> bool:
     purposes, e.g.  domain delegation etc. See this module docstring for
     more info.
     """
-    return _get_email_workspace(email) == _MailWorkspace.GOOGLE
-
-
-class _MailWorkspace(str, Enum):
-    GOOGLE = "GOOGLE"
-    M365 = "M365"
-
-
-@cached(cache=Cache(maxsize=1e9))
-def _get_email_workspace(email: EmailStr) -> Optional[_MailWorkspace]:
     domain = email.split("@")[1]
-    try:
-        mx_records = dns.resolver.query(domain, "MX")
-
-        for mx in mx_records:
-            mx_exchange = str(mx.exchange)
-            if "google.com" in mx_exchange:
-                # Check SPF record for Google Workspace
-                spf_records = dns.resolver.query(domain, "TXT")
-                for spf in spf_records:
-                    if "v=spf1 include:_spf.google.com ~all" in str(spf):
-                        return _MailWorkspace.GOOGLE
-            if "protection.outlook.com" in mx_exchange:
-                return _MailWorkspace.M365
-
-    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
-        logging.warning(f"Could not find MX records for domain {domain}: {e}")
-    return None
+    # Cached, see the workspaces module.
+    return workspaces.get_workspace(domain) == MailWorkspace.GOOGLE
 
 
 def _insert_email_to_recipients(
@@ -428,7 +535,7 @@ def _insert_email_to_recipients(
         )
 
 
-def _insert_email(
+def _insertion_body(
     from_email: EmailStr,
     from_name: Optional[str],
     from_last_name: Optional[str],
@@ -438,8 +545,8 @@ def _insert_email(
     is_html: bool,
     cc_list: Optional[List[EmailStr]] = None,
     extra_headers: Optional[Dict[str, str]] = None,
-) -> None:
-    logging.info(f"Inserting email to {to_email} from {from_email}.")
+) -> Dict[str, Any]:
+    """Returns the body of a messages.insert request."""
     message = MIMEText(body, "html" if is_html else "plain")
     message["Subject"] = subject
 
@@ -461,30 +568,36 @@ def _insert_email(
 
     message.as_string()
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    return {"raw": raw_message, "labelIds": ["INBOX", "UNREAD"]}
 
-    credentials = service_account.Credentials.from_service_account_info(
-        settings.GCP_GMAIL_SERVICE_KEY,
-        scopes=["https://www.googleapis.com/auth/gmail.insert"],
-    )
-    # "Acts" as the email recipient to insert.
-    credentials = credentials.with_subject(to_email)
-    service = google_service_build(
-        "gmail",
-        "v1",
-        credentials=credentials,
-        # https://stackoverflow.com/questions/40154672/importerror-file-cache-is-unavailable-when-using-python-client-for-google-ser
-        cache_discovery=False,
+
+def _insert_email(
+    from_email: EmailStr,
+    from_name: Optional[str],
+    from_last_name: Optional[str],
+    to_email: EmailStr,
+    subject: str,
+    body: str,
+    is_html: bool,
+    cc_list: Optional[List[EmailStr]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> None:
+    logging.info(f"Inserting email to {to_email} from {from_email}.")
+    body = _insertion_body(
+        from_email=from_email,
+        from_name=from_name,
+        from_last_name=from_last_name,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        is_html=is_html,
+        cc_list=cc_list,
+        extra_headers=extra_headers,
     )
     try:
-        response = (
-            service.users()
-            .messages()
-            .insert(
-                userId=to_email,
-                body={"raw": raw_message, "labelIds": ["INBOX", "UNREAD"]},
-            )
-            .execute()
-        )
+        # "Acts" as the email recipient to insert. Credentials and
+        # client are cached, see the gmail module.
+        response = gmail.insert_message(user_id=to_email, body=body)
     except google_auth_exceptions.GoogleAuthError as e:
         raise core_errors.EmailInsertionAuthError(e) from e
 
@@ -0,0 +1,210 @@
+"""Cached Gmail API clients, used to insert emails.
+
+Building the service account credentials, exchanging them for a token
+on behalf of the recipient and building the Gmail service from its
+discovery document used to be done for every single insertion, taking
+way longer than the insertion itself. Instead:
+
+- the service account credentials are built once.
+- credentials delegated to a subject (the recipient, see with_subject)
+  are cached per subject, and only refreshed when their token is about
+  to expire.
+- the Gmail service is built once and shared. It isn't bound to any
+  credentials, requests are executed with an http client authorized
+  with the credentials of the subject. The underlying httplib2 clients
+  are not thread safe, there's one per thread (greenlet, when running
+  with eventlet).
+
+"""
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Mapping, Tuple, TypeVar, Union
+
+import google_auth_httplib2
+import httplib2
+from cachetools import LRUCache
+from django.conf import settings
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from googleapiclient.discovery import build as google_service_build
+
+_SCOPES = ["https://www.googleapis.com/auth/gmail.insert"]
+_HTTP_TIMEOUT_SECONDS = 30
+# Gmail recommends batches of at most 50 requests.
+_MAX_BATCH_SIZE = 50
+_MAX_CONCURRENT_BATCHES = 10
+# Number of subjects for which credentials are kept.
+_MAX_CACHED_SUBJECTS = 1024
+
+_lock = threading.Lock()
+_base_credentials = None
+_service = None
+_subject_credentials: "LRUCache[str, Tuple[Any, threading.Lock]]" = LRUCache(
+    maxsize=_MAX_CACHED_SUBJECTS
+)
+_local = threading.local()
+
+
+def _get_base_credentials() -> service_account.Credentials:
+    global _base_credentials
+    with _lock:
+        if _base_credentials is None:
+            _base_credentials = service_account.Credentials.from_service_account_info(
+                settings.GCP_GMAIL_SERVICE_KEY, scopes=_SCOPES
+            )
+        return _base_credentials
+
+
+def _get_service():
+    global _service
+    with _lock:
+        if _service is None:
+            _service = google_service_build(
+                "gmail",
+                "v1",
+                # Passing an http client skips looking up default
+                # credentials, requests are authorized when executed.
+                http=httplib2.Http(timeout=_HTTP_TIMEOUT_SECONDS),
+                # https://stackoverflow.com/questions/40154672/importerror-file-cache-is-unavailable-when-using-python-client-for-google-ser
+                cache_discovery=False,
+            )
+        return _service
+
+
+def _get_subject_credentials(subject: str) -> service_account.Credentials:
+    """Returns valid credentials delegated to a subject.
+
+    Raises:
+        google.auth.exceptions.RefreshError: if the token exchange
+            fails, e.g. when domain delegation is not enabled.
+    """
+    base_credentials = _get_base_credentials()
+    with _lock:
+        entry = _subject_credentials.get(subject)
+        if entry is None:
+            entry = (base_credentials.with_subject(subject), threading.Lock())
+            _subject_credentials[subject] = entry
+    credentials, refresh_lock = entry
+
+    # valid accounts for clock skew, tokens are refreshed a bit before
+    # they expire.
+    if not credentials.valid:
+        with refresh_lock:
+            if not credentials.valid:
+                credentials.refresh(Request())
+    return credentials
+
+
+def _get_thread_http() -> httplib2.Http:
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = httplib2.Http(timeout=_HTTP_TIMEOUT_SECONDS)
+        _local.http = http
+    return http
+
+
+def insert_message(user_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Inserts a message in the mailbox of a user.
+
+    See users.messages.insert in the Gmail API reference.
+
+    Raises:
+        google.auth.exceptions.GoogleAuthError: if the user can't be
+            impersonated.
+    """
+    credentials = _get_subject_credentials(user_id)
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=_get_thread_http())
+    request = _get_service().users().messages().insert(userId=user_id, body=body)
+    return request.execute(http=http)
+
+
+K = TypeVar("K", bound=Hashable)
+
+
+def insert_messages(
+    messages: Mapping[K, Tuple[str, Dict[str, Any]]]
+) -> Dict[K, Union[Dict[str, Any], Exception]]:
+    """Inserts many messages, in batches where possible.
+
+    A batch request is authorized as a single subject, so messages are
+    grouped by user and each group is inserted through batches of at
+    most _MAX_BATCH_SIZE messages. Batches are sent concurrently.
+
+    Args:
+        messages: key to the (user id, body) of the message, as passed
+            to insert_message.
+
+    Returns:
+        Key to the inserted message, or to the exception raised when
+        inserting it.
+    """
+    by_user: Dict[str, List[Tuple[K, Dict[str, Any]]]] = defaultdict(list)
+    for key, (user_id, body) in messages.items():
+        by_user[user_id].append((key, body))
+
+    chunks = [
+        (user_id, items[i : i + _MAX_BATCH_SIZE])
+        for user_id, items in by_user.items()
+        for i in range(0, len(items), _MAX_BATCH_SIZE)
+    ]
+    results: Dict[K, Union[Dict[str, Any], Exception]] = {}
+    if not chunks:
+        return results
+
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_CONCURRENT_BATCHES, len(chunks))
+    ) as executor:
+        for chunk_results in executor.map(lambda chunk: _insert_chunk(*chunk), chunks):
+            results.update(chunk_results)
+    return results
+
+
+def _insert_chunk(
+    user_id: str, items: List[Tuple[K, Dict[str, Any]]]
+) -> Dict[K, Union[Dict[str, Any], Exception]]:
+    if len(items) == 1:
+        key, body = items[0]
+        try:
+            return {key: insert_message(user_id, body)}
+        except Exception as e:
+            return {key: e}
+
+    responses: Dict[str, Union[Dict[str, Any], Exception]] = {}
+
+    def callback(request_id, response, exception):
+        responses[request_id] = exception if exception is not None else response
+
+    try:
+        credentials = _get_subject_credentials(user_id)
+        service = _get_service()
+        batch = service.new_batch_http_request(callback=callback)
+        for i, (_, body) in enumerate(items):
+            batch.add(
+                service.users().messages().insert(userId=user_id, body=body),
+                request_id=str(i),
+            )
+        batch.execute(
+            http=google_auth_httplib2.AuthorizedHttp(
+                credentials, http=_get_thread_http()
+            )
+        )
+    except Exception as e:
+        return {key: e for key, _ in items}
+
+    return {
+        key: responses.get(str(i), RuntimeError("No response in the batch."))
+        for i, (key, _) in enumerate(items)
+    }
+
+
+def clear_cache() -> None:
+    """Drops the cached credentials and service."""
+    global _base_credentials, _service
+    with _lock:
+        _base_credentials = None
+        _service = None
+        _subject_credentials.clear()
+
+
+__all__ = ["clear_cache", "insert_message", "insert_messages"]
@@ -0,0 +1,93 @@
+"""Token bucket rate limits, shared through the db.
+
+Every bucket holds up to `burst` tokens and is refilled at `per_minute`
+tokens per minute. Buckets are rows of RateLimitBucket, locked while
+being updated, so that limits hold across threads and processes.
+
+Usage:
+
+    wait = rate_limits.try_acquire(
+        {"mailgun": Rate(per_minute=120, burst=20)}
+    )
+    if wait > 0:
+        # Try again in `wait` seconds.
+
+"""
+from typing import Mapping, NamedTuple, Union
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import RateLimitBucket
+
+
+class Rate(NamedTuple):
+    per_minute: float
+    burst: int
+
+
+def try_acquire(
+    limits: Mapping[str, Rate], tokens: Union[float, Mapping[str, float]] = 1
+) -> float:
+    """Takes tokens from all the given buckets, or from none of them.
+
+    Args:
+        limits: bucket key to the rate of the bucket. Buckets are
+            created, full, the first time they are used.
+        tokens: the number of tokens to take from every bucket, or
+            bucket key to the number of tokens to take from it.
+
+    Returns:
+        0 if the tokens have been taken, otherwise the number of
+        seconds after which they will be available.
+
+    Raises:
+        ValueError: if a bucket is never refilled, i.e. its per_minute
+            isn't positive.
+    """
+    if not limits:
+        return 0
+    for key, rate in limits.items():
+        if rate.per_minute <= 0:
+            raise ValueError(f"Rate of {key} must be positive, got {rate}.")
+
+    if not isinstance(tokens, Mapping):
+        tokens = {key: tokens for key in limits}
+
+    now = timezone.now()
+    with transaction.atomic():
+        RateLimitBucket.objects.bulk_create(
+            [
+                RateLimitBucket(key=key, tokens=rate.burst, updated_at=now)
+                for key, rate in limits.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # Locking in a consistent order prevents deadlocks between
+        # callers acquiring overlapping buckets.
+        buckets = list(
+            RateLimitBucket.objects.select_for_update()
+            .filter(key__in=list(limits))
+            .order_by("key")
+        )
+
+        wait = 0.0
+        for bucket in buckets:
+            rate = limits[bucket.key]
+            elapsed = max((now - bucket.updated_at).total_seconds(), 0)
+            bucket.tokens = min(
+                bucket.tokens + elapsed * rate.per_minute / 60, rate.burst
+            )
+            bucket.updated_at = max(now, bucket.updated_at)
+            needed = tokens[bucket.key]
+            if bucket.tokens < needed:
+                wait = max(wait, (needed - bucket.tokens) * 60 / rate.per_minute)
+
+        if wait == 0:
+            for bucket in buckets:
+                bucket.tokens -= tokens[bucket.key]
+        RateLimitBucket.objects.bulk_update(buckets, ["tokens", "updated_at"])
+    return wait
+
+
+__all__ = ["Rate", "try_acquire"]
@@ -0,0 +1,99 @@
+"""Pool of the Gmail accounts we send emails from.
+
+Every account has its own sending quota (settings.
+GMAIL_SENDER_DAILY_QUOTA), so emails are spread over all the accounts in
+settings.COMMON_GMAIL_EMAIL_ADDRESSES: new emails that are sent, rather
+than inserted, get the least loaded account as sender. The load of an
+account is the number of emails it has sent in the last day, along with
+the ones it's been given but hasn't sent yet, whether they're still
+under review or their delivery is pending (see
+core.attack_agent.deliveries). Emails get their sender when they're
+generated, long before they're sent, so without the latter all the
+emails generated at the same time would get the same account.
+
+Accounts that fail to send, e.g. because their password changed or
+their quota ran out anyway, are reported through report_failure and
+left out for _UNHEALTHY_SECONDS.
+
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core.models import AttackStatusEndStates, DeliveryJobStatus, PhishingEmail
+
+_UNHEALTHY_SECONDS = 15 * 60
+
+_lock = threading.Lock()
+_unhealthy_until: Dict[str, float] = {}
+
+
+def report_failure(account: str) -> None:
+    """Leaves the account out for a while."""
+    logging.warning(f"Sender account {account} is unhealthy.")
+    with _lock:
+        _unhealthy_until[account] = time.monotonic() + _UNHEALTHY_SECONDS
+
+
+def _is_healthy(account: str) -> bool:
+    with _lock:
+        return _unhealthy_until.get(account, 0) <= time.monotonic()
+
+
+def get_usage() -> Dict[str, int]:
+    """Returns the load of every account, see the module docstring."""
+    usage = {account: 0 for account in settings.COMMON_GMAIL_EMAIL_ADDRESSES}
+    sent = Q(
+        artifacts__delivery_job__status=DeliveryJobStatus.SENT,
+        artifacts__sent_at__gte=timezone.now() - timedelta(days=1),
+    )
+    # Neither failed to be delivered nor part of an attack that's over.
+    unsent = Q(
+        Q(artifacts__delivery_job__isnull=True)
+        | Q(artifacts__delivery_job__status=DeliveryJobStatus.PENDING),
+        artifacts__sent_at__isnull=True,
+    ) & ~Q(artifacts__attack__status__in=AttackStatusEndStates)
+    counts = (
+        PhishingEmail.objects.filter(sender__in=list(usage))
+        .filter(sent | unsent)
+        .values("sender")
+        .annotate(count=Count("id", distinct=True))
+    )
+    for row in counts:
+        usage[row["sender"]] = row["count"]
+    return usage
+
+
+def pick_sender() -> str:
+    """Returns the least loaded healthy account.
+
+    If every account is either unhealthy or over its quota, the least
+    loaded account is returned anyway, the email will be retried on
+    delivery.
+    """
+    usage = get_usage()
+    available = [
+        account
+        for account, count in usage.items()
+        if _is_healthy(account) and count < settings.GMAIL_SENDER_DAILY_QUOTA
+    ]
+    if not available:
+        logging.warning("No sender account available, using the least loaded.")
+        available = list(usage)
+    # Sorted first so that ties are broken the same way every time.
+    return min(sorted(available), key=lambda account: usage[account])
+
+
+def clear_health() -> None:
+    """Marks all the accounts as healthy."""
+    with _lock:
+        _unhealthy_until.clear()
+
+
+__all__ = ["clear_health", "get_usage", "pick_sender", "report_failure"]
@@ -0,0 +1,168 @@
+"""Pool of authenticated SMTP connections.
+
+Opening an SMTP connection means a TLS handshake, EHLO and LOGIN, which
+take way longer than sending the message itself. Connections are kept
+open per (host, port, user) and reused by the following sends, e.g.
+consecutive emails sent from the same COMMON_GMAIL_EMAIL_ADDRESS_*.
+
+Servers close connections left idle for a while (Gmail after a few
+minutes), so idle connections are evicted after _MAX_IDLE_SECONDS and
+the ones idle for more than _HEALTH_CHECK_AFTER_SECONDS are checked with
+a NOOP before being reused.
+
+"""
+import logging
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from email.message import Message
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+_TIMEOUT_SECONDS = 30
+_HEALTH_CHECK_AFTER_SECONDS = 30
+_MAX_IDLE_SECONDS = 120
+# Idle connections kept per account, Gmail limits the number of
+# simultaneous connections of an account.
+_MAX_IDLE_PER_ACCOUNT = 4
+
+_Key = Tuple[str, int, str]
+
+
+class _IdleConnection(NamedTuple):
+    server: smtplib.SMTP
+    idle_since: float
+
+
+_lock = threading.Lock()
+_idle: Dict[_Key, List[_IdleConnection]] = defaultdict(list)
+
+
+def _close(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        # Quitting a broken connection fails, just drop the socket.
+        server.close()
+
+
+def _connect(host: str, port: int, user: str, password: str) -> smtplib.SMTP:
+    logging.info(f"Opening SMTP connection to {host}:{port} for {user}.")
+    server = smtplib.SMTP_SSL(host, port, timeout=_TIMEOUT_SECONDS)
+    try:
+        server.ehlo()
+        server.login(user, password)
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def _is_healthy(server: smtplib.SMTP) -> bool:
+    try:
+        return server.noop()[0] == 250
+    except smtplib.SMTPException:
+        return False
+
+
+def _evict_idle(now: float) -> List[smtplib.SMTP]:
+    """Removes expired idle connections, returning them. Needs _lock."""
+    expired = []
+    for key in list(_idle):
+        fresh = []
+        for connection in _idle[key]:
+            if now - connection.idle_since > _MAX_IDLE_SECONDS:
+                expired.append(connection.server)
+            else:
+                fresh.append(connection)
+        if fresh:
+            _idle[key] = fresh
+        else:
+            del _idle[key]
+    return expired
+
+
+def _acquire(key: _Key, password: str) -> Tuple[smtplib.SMTP, bool]:
+    """Returns a connection and whether it has been reused."""
+    while True:
+        now = time.monotonic()
+        with _lock:
+            expired = _evict_idle(now)
+            connection = _idle[key].pop() if _idle.get(key) else None
+        for server in expired:
+            _close(server)
+
+        if connection is None:
+            host, port, user = key
+            return _connect(host, port, user, password), False
+        if now - connection.idle_since <= _HEALTH_CHECK_AFTER_SECONDS or _is_healthy(
+            connection.server
+        ):
+            return connection.server, True
+        _close(connection.server)
+
+
+def _release(key: _Key, server: smtplib.SMTP) -> None:
+    with _lock:
+        if len(_idle[key]) < _MAX_IDLE_PER_ACCOUNT:
+            _idle[key].append(_IdleConnection(server, time.monotonic()))
+            return
+    _close(server)
+
+
+@contextmanager
+def connection(
+    host: str, port: int, user: str, password: str
+) -> Iterator[Tuple[smtplib.SMTP, bool]]:
+    """Borrows an authenticated connection from the pool.
+
+    The connection goes back to the pool if the block doesn't raise,
+    otherwise it's closed.
+
+    Yields:
+        The connection and whether it has been used before.
+    """
+    key = (host, port, user)
+    server, reused = _acquire(key, password)
+    try:
+        yield server, reused
+    except Exception:
+        _close(server)
+        raise
+    _release(key, server)
+
+
+def send_message(
+    host: str, port: int, user: str, password: str, message: Message
+) -> None:
+    """Sends a message through a pooled connection.
+
+    A reused connection might have been closed by the server in the
+    meantime, in which case the message is sent again through a new
+    connection. Dead connections fail on the first command, before the
+    message is transferred, so it isn't sent twice.
+    """
+    reused = False
+    try:
+        with connection(host, port, user, password) as (server, reused):
+            server.send_message(message)
+            return
+    except smtplib.SMTPServerDisconnected:
+        if not reused:
+            raise
+    logging.info(f"SMTP connection for {user} got closed, reconnecting.")
+    with connection(host, port, user, password) as (server, _):
+        server.send_message(message)
+
+
+def close_all() -> None:
+    """Closes all the idle connections."""
+    with _lock:
+        servers = [c.server for connections in _idle.values() for c in connections]
+        _idle.clear()
+    for server in servers:
+        _close(server)
+
+
+__all__ = ["close_all", "connection", "send_message"]
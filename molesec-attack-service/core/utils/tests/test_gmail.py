@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from core.utils import gmail
+
+
+@patch("core.utils.gmail.google_auth_httplib2.AuthorizedHttp")
+@patch("core.utils.gmail.google_service_build")
+@patch("core.utils.gmail.service_account.Credentials.from_service_account_info")
+class InsertMessageTestCase(SimpleTestCase):
+    def setUp(self):
+        gmail.clear_cache()
+
+    def tearDown(self):
+        gmail.clear_cache()
+
+    def test_caches_clients_and_credentials(
+        self, mock_from_info, mock_build, mock_authorized_http
+    ):
+        subject_credentials = {}
+
+        def with_subject(subject):
+            credentials = MagicMock(valid=False)
+            credentials.refresh.side_effect = lambda request: setattr(
+                credentials, "valid", True
+            )
+            subject_credentials[subject] = credentials
+            return credentials
+
+        mock_from_info.return_value.with_subject.side_effect = with_subject
+
+        gmail.insert_message("a@acme.com", {"raw": ""})
+        gmail.insert_message("a@acme.com", {"raw": ""})
+        gmail.insert_message("b@acme.com", {"raw": ""})
+
+        mock_from_info.assert_called_once()
+        mock_build.assert_called_once()
+        self.assertEqual(set(subject_credentials), {"a@acme.com", "b@acme.com"})
+        for credentials in subject_credentials.values():
+            credentials.refresh.assert_called_once()
+
+        # Expired tokens are refreshed.
+        subject_credentials["a@acme.com"].valid = False
+        gmail.insert_message("a@acme.com", {"raw": ""})
+        self.assertEqual(subject_credentials["a@acme.com"].refresh.call_count, 2)
+        self.assertEqual(
+            mock_build.return_value.users().messages().insert().execute.call_count, 4
+        )
+
+    def test_inserts_in_batches_per_user(
+        self, mock_from_info, mock_build, mock_authorized_http
+    ):
+        mock_from_info.return_value.with_subject.return_value = MagicMock(valid=True)
+        service = mock_build.return_value
+        batches = []
+
+        def new_batch_http_request(callback):
+            batch = MagicMock()
+            requests = []
+            batch.add.side_effect = lambda request, request_id: requests.append(
+                request_id
+            )
+
+            def execute(http):
+                for request_id in requests:
+                    if request_id == "1":
+                        callback(request_id, None, ValueError("Nope."))
+                    else:
+                        callback(request_id, {"id": request_id}, None)
+
+            batch.execute.side_effect = execute
+            batches.append(requests)
+            return batch
+
+        service.new_batch_http_request.side_effect = new_batch_http_request
+
+        messages = {i: ("a@acme.com", {"raw": str(i)}) for i in range(60)}
+        messages["single"] = ("b@acme.com", {"raw": ""})
+        results = gmail.insert_messages(messages)
+
+        self.assertEqual(sorted(len(requests) for requests in batches), [10, 50])
+        # A single message doesn't need a batch.
+        service.users().messages().insert().execute.assert_called_once()
+        self.assertEqual(set(results), set(messages))
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[51], ValueError)
+        self.assertEqual(results[2], {"id": "2"})
+        self.assertEqual(gmail.insert_messages({}), {})
@@ -0,0 +1,46 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import RateLimitBucket
+from core.utils import rate_limits
+from core.utils.rate_limits import Rate
+
+
+class TryAcquireTestCase(TestCase):
+    def test_refills_over_time(self):
+        now = timezone.now()
+        limits = {"a": Rate(per_minute=60, burst=2)}
+
+        with patch("core.utils.rate_limits.timezone.now", return_value=now):
+            self.assertEqual(rate_limits.try_acquire(limits), 0)
+            self.assertEqual(rate_limits.try_acquire(limits), 0)
+            self.assertAlmostEqual(rate_limits.try_acquire(limits), 1)
+
+        later = now + timedelta(seconds=1)
+        with patch("core.utils.rate_limits.timezone.now", return_value=later):
+            self.assertEqual(rate_limits.try_acquire(limits), 0)
+            self.assertAlmostEqual(rate_limits.try_acquire(limits), 1)
+
+        # Never refilled past the burst.
+        much_later = now + timedelta(hours=1)
+        with patch("core.utils.rate_limits.timezone.now", return_value=much_later):
+            rate_limits.try_acquire(limits, tokens=0)
+        self.assertEqual(RateLimitBucket.objects.get(key="a").tokens, 2)
+
+    def test_takes_from_all_buckets_or_none(self):
+        limits = {"a": Rate(per_minute=60, burst=5), "b": Rate(per_minute=6, burst=1)}
+
+        # Frozen, buckets would refill between the calls otherwise.
+        with patch("core.utils.rate_limits.timezone.now", return_value=timezone.now()):
+            self.assertEqual(rate_limits.try_acquire(limits), 0)
+            self.assertAlmostEqual(rate_limits.try_acquire(limits), 10)
+
+        self.assertEqual(RateLimitBucket.objects.get(key="a").tokens, 4)
+
+    def test_rejects_rates_never_refilled(self):
+        with self.assertRaises(ValueError):
+            rate_limits.try_acquire({"a": Rate(per_minute=0, burst=1)})
+        self.assertFalse(RateLimitBucket.objects.exists())
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from typing import Optional
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import (
+    Attack,
+    AttackArtifact,
+    AttackStatus,
+    DeliveryJob,
+    DeliveryJobStatus,
+    Objective,
+    PhishingEmail,
+)
+from core.utils import senders
+
+
+@override_settings(
+    COMMON_GMAIL_EMAIL_ADDRESSES={"a@gmail.com", "b@gmail.com", "c@gmail.com"},
+    GMAIL_SENDER_DAILY_QUOTA=2,
+)
+class PickSenderTestCase(TestCase):
+    def setUp(self):
+        senders.clear_health()
+        now = timezone.now()
+        objective = Objective.objects.create(
+            id=uuid4(),
+            begins_at=now,
+            expires_at=now + timedelta(1),
+            org_id=uuid4(),
+            target_emails=["t@email.com"],
+        )
+        self.attack = Attack.objects.create(
+            target_email="t@email.com", objective=objective, org_id=objective.org_id
+        )
+
+    def tearDown(self):
+        senders.clear_health()
+
+    def _create_email(
+        self,
+        sender: str,
+        status: Optional[DeliveryJobStatus] = DeliveryJobStatus.SENT,
+        sent_at_days_ago: int = 0,
+    ) -> PhishingEmail:
+        email = PhishingEmail.objects.create(
+            token=uuid4().hex, subject="Hi", sender=sender, recipients=["t@email.com"]
+        )
+        sent = status == DeliveryJobStatus.SENT
+        artifact = AttackArtifact.objects.create(
+            attack=self.attack,
+            content_object=email,
+            sent_at=timezone.now() - timedelta(sent_at_days_ago) if sent else None,
+        )
+        if status is not None:
+            DeliveryJob.objects.create(
+                artifact=artifact,
+                idempotency_key=uuid4().hex,
+                status=status,
+                next_attempt_at=timezone.now(),
+            )
+        return email
+
+    def test_picks_least_loaded_healthy_account(self):
+        self.assertEqual(senders.pick_sender(), "a@gmail.com")
+
+        self._create_email("a@gmail.com")
+        self.assertEqual(senders.pick_sender(), "b@gmail.com")
+
+        self._create_email("b@gmail.com", status=DeliveryJobStatus.PENDING)
+        senders.report_failure("c@gmail.com")
+        self.assertEqual(senders.pick_sender(), "a@gmail.com")
+        self.assertEqual(
+            senders.get_usage(), {"a@gmail.com": 1, "b@gmail.com": 1, "c@gmail.com": 0}
+        )
+
+    def test_counts_sent_and_unsent_emails(self):
+        # Failed to be delivered, sent before the last day or part of an
+        # attack that's over.
+        self._create_email("b@gmail.com", status=DeliveryJobStatus.DEAD)
+        self._create_email("b@gmail.com", sent_at_days_ago=2)
+        self._create_email("b@gmail.com", status=None)
+        self.attack.status = AttackStatus.FAILED
+        self.attack.save()
+        self.attack = Attack.objects.create(
+            target_email="t@email.com",
+            objective=self.attack.objective,
+            org_id=self.attack.org_id,
+        )
+        # Under review or pending, not sent yet.
+        self._create_email("a@gmail.com", status=None)
+        self._create_email("a@gmail.com", status=DeliveryJobStatus.PENDING)
+
+        self.assertEqual(
+            senders.get_usage(), {"a@gmail.com": 2, "b@gmail.com": 0, "c@gmail.com": 0}
+        )
+
+    def test_spreads_emails_generated_together(self):
+        # Emails get their sender when generated, long before they have
+        # a delivery job.
+        picked = []
+        for _ in range(3):
+            picked.append(senders.pick_sender())
+            self._create_email(picked[-1], status=None)
+
+        self.assertEqual(sorted(picked), ["a@gmail.com", "b@gmail.com", "c@gmail.com"])
+
+    def test_falls_back_when_all_over_quota(self):
+        for sender in ["a@gmail.com", "a@gmail.com", "b@gmail.com", "b@gmail.com"]:
+            self._create_email(sender)
+        senders.report_failure("c@gmail.com")
+
+        self.assertEqual(senders.pick_sender(), "c@gmail.com")
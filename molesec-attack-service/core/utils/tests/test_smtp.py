@@ -0,0 +1,71 @@
+import smtplib
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from core.utils import smtp
+
+
+@patch("core.utils.smtp.smtplib.SMTP_SSL")
+class SendMessageTestCase(SimpleTestCase):
+    def setUp(self):
+        smtp.close_all()
+
+    def tearDown(self):
+        smtp.close_all()
+
+    def test_reuses_connections_per_account(self, mock_smtp):
+        servers = []
+
+        def connect(*args, **kwargs):
+            servers.append(MagicMock())
+            return servers[-1]
+
+        mock_smtp.side_effect = connect
+
+        smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", MagicMock())
+        smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", MagicMock())
+        self.assertEqual(len(mock_smtp.call_args_list), 1)
+        # Logged in once, both messages went through that connection.
+        servers[0].login.assert_called_once_with("a@acme.com", "psw")
+        self.assertEqual(servers[0].send_message.call_count, 2)
+
+        smtp.send_message("smtp.acme.com", 465, "b@acme.com", "psw", MagicMock())
+        self.assertEqual(len(mock_smtp.call_args_list), 2)
+        servers[1].login.assert_called_once_with("b@acme.com", "psw")
+        self.assertEqual(servers[0].login.call_count, 1)
+
+    def test_reconnects_when_disconnected(self, mock_smtp):
+        stale, fresh = MagicMock(), MagicMock()
+        stale.send_message.side_effect = smtplib.SMTPServerDisconnected()
+        mock_smtp.side_effect = [stale, fresh]
+
+        with smtp.connection("smtp.acme.com", 465, "a@acme.com", "psw"):
+            pass
+        message = MagicMock()
+        smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", message)
+
+        stale.quit.assert_called_once()
+        fresh.send_message.assert_called_once_with(message)
+
+    def test_evicts_idle_connections(self, mock_smtp):
+        mock_smtp.side_effect = lambda *args, **kwargs: MagicMock()
+
+        with patch("core.utils.smtp.time.monotonic", return_value=0):
+            smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", MagicMock())
+        server = smtp._idle[  # pylint: disable=W0212
+            ("smtp.acme.com", 465, "a@acme.com")
+        ][0].server
+
+        # Checked before being reused.
+        server.noop.return_value = (250, b"OK")
+        with patch("core.utils.smtp.time.monotonic", return_value=60):
+            smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", MagicMock())
+        server.noop.assert_called_once()
+        self.assertEqual(mock_smtp.call_count, 1)
+
+        # Dropped once idle for too long.
+        with patch("core.utils.smtp.time.monotonic", return_value=1000):
+            smtp.send_message("smtp.acme.com", 465, "a@acme.com", "psw", MagicMock())
+        server.quit.assert_called_once()
+        self.assertEqual(mock_smtp.call_count, 2)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import dns.exception
+import dns.resolver
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import EmailDomainWorkspace, MailWorkspace
+from core.utils import workspaces
+
+
+def _answer(ttl, records):
+    answer = MagicMock()
+    answer.rrset.ttl = ttl
+    answer.__iter__.return_value = iter(records)
+    return answer
+
+
+def _google_records(domain, rdtype):
+    if rdtype == "MX":
+        return _answer(3600, [MagicMock(exchange="aspmx.l.google.com.")])
+    return _answer(600, ['"v=spf1 include:_spf.google.com ~all"'])
+
+
+@patch("core.utils.workspaces.dns.resolver.query")
+class GetWorkspaceTestCase(TestCase):
+    def setUp(self):
+        workspaces.clear_memory_cache()
+
+    def tearDown(self):
+        workspaces.clear_memory_cache()
+
+    def test_caches_in_memory_and_db(self, mock_query):
+        mock_query.side_effect = _google_records
+
+        self.assertEqual(workspaces.get_workspace("Acme.com"), MailWorkspace.GOOGLE)
+        self.assertEqual(workspaces.get_workspace("acme.com"), MailWorkspace.GOOGLE)
+        self.assertEqual(mock_query.call_count, 2)
+
+        # Expires with the shortest TTL among the records.
+        record = EmailDomainWorkspace.objects.get(domain="acme.com")
+        self.assertEqual(record.expires_at - record.resolved_at, timedelta(seconds=600))
+
+        workspaces.clear_memory_cache()
+        self.assertEqual(workspaces.get_workspace("acme.com"), MailWorkspace.GOOGLE)
+        self.assertEqual(mock_query.call_count, 2)
+
+    def test_caches_missing_records(self, mock_query):
+        mock_query.side_effect = dns.resolver.NXDOMAIN()
+
+        self.assertIsNone(workspaces.get_workspace("nope.com"))
+        self.assertIsNone(workspaces.get_workspace("nope.com"))
+        mock_query.assert_called_once()
+
+    def test_doesnt_cache_failures_of_new_domains(self, mock_query):
+        mock_query.side_effect = dns.exception.Timeout()
+
+        with self.assertRaises(dns.exception.Timeout):
+            workspaces.get_workspace("acme.com")
+        self.assertFalse(EmailDomainWorkspace.objects.exists())
+
+        mock_query.side_effect = _google_records
+        self.assertEqual(workspaces.get_workspace("acme.com"), MailWorkspace.GOOGLE)
+
+    @patch("core.utils.workspaces._refresh_in_background")
+    def test_serves_expired_entries_while_refreshing(
+        self, mock_refresh_in_background, mock_query
+    ):
+        EmailDomainWorkspace.objects.create(
+            domain="acme.com",
+            workspace=MailWorkspace.M365,
+            resolved_at=timezone.now() - timedelta(days=2),
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+
+        self.assertEqual(workspaces.get_workspace("acme.com"), MailWorkspace.M365)
+        mock_query.assert_not_called()
+        mock_refresh_in_background.assert_called_once_with("acme.com")
+
+        # Failing to resolve keeps what we knew.
+        mock_query.side_effect = dns.exception.Timeout()
+        self.assertEqual(workspaces.refresh("acme.com"), MailWorkspace.M365)
+
+        mock_query.side_effect = _google_records
+        self.assertEqual(workspaces.refresh("acme.com"), MailWorkspace.GOOGLE)
+        self.assertEqual(
+            EmailDomainWorkspace.objects.get(domain="acme.com").workspace,
+            MailWorkspace.GOOGLE,
+        )
+
+    @patch("core.utils.workspaces.refresh")
+    def test_warm_up_resolves_missing_and_expired_domains(
+        self, mock_refresh, mock_query
+    ):
+        now = timezone.now()
+        for domain, expires_at in [
+            ("fresh.com", now + timedelta(days=1)),
+            ("expired.com", now - timedelta(days=1)),
+        ]:
+            EmailDomainWorkspace.objects.create(
+                domain=domain, resolved_at=now, expires_at=expires_at
+            )
+
+        workspaces.warm_up(["fresh.com", "Expired.com", "new.com", "new.com"])
+
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_refresh.call_args_list),
+            ["expired.com", "new.com"],
+        )
+
+    @patch("core.utils.workspaces.scheduler")
+    def test_warm_up_in_background_skips_domains_in_memory(
+        self, mock_scheduler, mock_query
+    ):
+        mock_query.side_effect = _google_records
+        workspaces.get_workspace("acme.com")
+
+        workspaces.warm_up_in_background(["acme.com", "Other.com"])
+
+        mock_scheduler.add_job.assert_called_once_with(
+            workspaces.warm_up, args=[["other.com"]]
+        )
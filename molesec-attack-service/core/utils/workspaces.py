@@ -0,0 +1,244 @@
+"""Classification of email domains into mail workspaces.
+
+Whether an email supports insertion depends on the workspace its domain
+belongs to, which is found through the MX and TXT records of the
+domain. Lookups are cached:
+
+- in memory, in an LRU of recent domains.
+- in the db (EmailDomainWorkspace), so that they're shared and survive
+    restarts.
+
+Entries expire after the TTL of the DNS records they've been derived
+from (clamped between _MIN_TTL_SECONDS and _MAX_TTL_SECONDS), so that
+domains moving e.g. from M365 to Google are eventually noticed. Domains
+without records (NXDOMAIN, no answer) are cached as well, for
+_NEGATIVE_TTL_SECONDS.
+
+Expired entries are still returned while being refreshed in the
+background, so only the very first lookup of a domain waits on DNS.
+That's taken out of the critical path by warming up domains as soon as
+they're known, e.g. when an objective comes in, see
+warm_up_in_background.
+
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, NamedTuple, Optional, Set, Tuple
+
+import dns
+import dns.exception
+import dns.resolver
+from cachetools import LRUCache
+from django.db import connection
+from django.utils import timezone
+
+from core.models import EmailDomainWorkspace, MailWorkspace
+from core.scheduler import scheduler
+
+_MIN_TTL_SECONDS = 5 * 60
+_MAX_TTL_SECONDS = 24 * 60 * 60
+_NEGATIVE_TTL_SECONDS = 60 * 60
+# Failures other than missing records (timeouts, unreachable
+# nameservers) keep the previous classification, if any, for a bit.
+_ERROR_TTL_SECONDS = 60
+_MAX_CACHED_DOMAINS = 10_000
+# Domains resolved at the same time when warming up.
+_MAX_CONCURRENT_LOOKUPS = 16
+
+
+class _Entry(NamedTuple):
+    workspace: Optional[MailWorkspace]
+    expires_at: float
+
+
+_lock = threading.Lock()
+_memory: "LRUCache[str, _Entry]" = LRUCache(maxsize=_MAX_CACHED_DOMAINS)
+# Domains being refreshed in the background.
+_refreshing: Set[str] = set()
+
+
+def _clamp_ttl(ttl: int) -> int:
+    return max(_MIN_TTL_SECONDS, min(ttl, _MAX_TTL_SECONDS))
+
+
+def _resolve(domain: str) -> Tuple[Optional[MailWorkspace], int]:
+    """Returns the workspace of the domain and for how long it's valid.
+
+    Raises:
+        dns.exception.DNSException: if the records of the domain
+            couldn't be resolved, e.g. on timeouts.
+    """
+    try:
+        mx_records = dns.resolver.query(domain, "MX")
+        ttl = mx_records.rrset.ttl
+
+        for mx in mx_records:
+            mx_exchange = str(mx.exchange)
+            if "google.com" in mx_exchange:
+                # Check SPF record for Google Workspace
+                spf_records = dns.resolver.query(domain, "TXT")
+                ttl = min(ttl, spf_records.rrset.ttl)
+                for spf in spf_records:
+                    if "v=spf1 include:_spf.google.com ~all" in str(spf):
+                        return MailWorkspace.GOOGLE, _clamp_ttl(ttl)
+            if "protection.outlook.com" in mx_exchange:
+                return MailWorkspace.M365, _clamp_ttl(ttl)
+        return None, _clamp_ttl(ttl)
+
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        logging.warning(f"Could not find MX records for domain {domain}: {e}")
+        return None, _NEGATIVE_TTL_SECONDS
+
+
+def _store(domain: str, workspace: Optional[MailWorkspace], ttl: int) -> _Entry:
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    EmailDomainWorkspace.objects.update_or_create(
+        domain=domain,
+        defaults={
+            "workspace": workspace,
+            "resolved_at": now,
+            "expires_at": expires_at,
+        },
+    )
+    entry = _Entry(workspace, expires_at.timestamp())
+    with _lock:
+        _memory[domain] = entry
+    return entry
+
+
+def refresh(domain: str) -> Optional[MailWorkspace]:
+    """Resolves the workspace of a domain, updating the caches.
+
+    Raises:
+        dns.exception.DNSException: if the domain couldn't be resolved
+            and has never been before, there's nothing to fall back to
+            and nothing is cached, so that the caller can retry.
+    """
+    domain = domain.lower()
+    try:
+        resolved = _resolve(domain)
+    except dns.exception.DNSException as e:
+        logging.warning(f"Could not resolve domain {domain}: {e}")
+        previous = _cached(domain)
+        if previous is None:
+            raise
+        resolved = previous.workspace, _ERROR_TTL_SECONDS
+    return _store(domain, *resolved).workspace
+
+
+def _refresh_in_background(domain: str) -> None:
+    with _lock:
+        if domain in _refreshing:
+            return
+        _refreshing.add(domain)
+
+    def run():
+        try:
+            refresh(domain)
+        except Exception:
+            logging.exception(f"Could not refresh the workspace of {domain}.")
+        finally:
+            with _lock:
+                _refreshing.discard(domain)
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _cached(domain: str) -> Optional[_Entry]:
+    with _lock:
+        entry = _memory.get(domain)
+    if entry is not None:
+        return entry
+
+    record = EmailDomainWorkspace.objects.filter(domain=domain).first()
+    if record is None:
+        return None
+    entry = _Entry(
+        MailWorkspace(record.workspace) if record.workspace else None,
+        record.expires_at.timestamp(),
+    )
+    with _lock:
+        _memory[domain] = entry
+    return entry
+
+
+def get_workspace(domain: str) -> Optional[MailWorkspace]:
+    """Returns the workspace of a domain, None if unknown.
+
+    Only waits on DNS if the domain has never been resolved before.
+
+    Raises:
+        dns.exception.DNSException: see refresh.
+    """
+    domain = domain.lower()
+    entry = _cached(domain)
+    if entry is None:
+        return refresh(domain)
+    if entry.expires_at <= timezone.now().timestamp():
+        _refresh_in_background(domain)
+    return entry.workspace
+
+
+def warm_up(domains: Iterable[str]) -> None:
+    """Resolves, concurrently, the domains that aren't cached yet.
+
+    Expired domains are resolved again as well.
+    """
+    domains = {domain.lower() for domain in domains}
+    now = timezone.now()
+    fresh = set(
+        EmailDomainWorkspace.objects.filter(
+            domain__in=domains, expires_at__gt=now
+        ).values_list("domain", flat=True)
+    )
+    to_resolve = domains - fresh
+    if not to_resolve:
+        return
+
+    def run(domain: str) -> None:
+        try:
+            refresh(domain)
+        finally:
+            connection.close()
+
+    logging.info(f"Warming up the workspaces of {len(to_resolve)} domains.")
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_CONCURRENT_LOOKUPS, len(to_resolve))
+    ) as executor:
+        for future in [executor.submit(run, domain) for domain in to_resolve]:
+            try:
+                future.result()
+            except Exception:
+                logging.exception("Could not warm up a domain.")
+
+
+def warm_up_in_background(domains: Iterable[str]) -> None:
+    """Schedules warm_up for the domains that aren't in memory."""
+    now = timezone.now().timestamp()
+    with _lock:
+        missing = set()
+        for domain in {domain.lower() for domain in domains}:
+            entry = _memory.get(domain)
+            if entry is None or entry.expires_at <= now:
+                missing.add(domain)
+    if missing:
+        scheduler.add_job(warm_up, args=[sorted(missing)])
+
+
+def clear_memory_cache() -> None:
+    """Drops the in-memory entries, the db ones are kept."""
+    with _lock:
+        _memory.clear()
+
+
+__all__ = [
+    "clear_memory_cache",
+    "get_workspace",
+    "refresh",
+    "warm_up",
+    "warm_up_in_background",
+]
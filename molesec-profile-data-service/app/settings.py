@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
 import ast
+import logging
 import os
 import sentry_sdk
 from pathlib import Path
@@ -76,6 +77,22 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Opt-in fast path: plain dict serializers for the hot read models and
+# orjson rendering, see profile_data/fast_serializers.py.
+FAST_JSON_RENDERING = ast.literal_eval(os.getenv("FAST_JSON_RENDERING", "False"))
+if FAST_JSON_RENDERING:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "app.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+
+# Only changes older than this are served by the change feed, so that
+# changes committed out of order aren't skipped, see
+# profile_data/changes.py.
+CHANGE_FEED_SETTLE_SECONDS = int(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "5"))
+# Changes older than this are deleted, see profile_data/changes.py.
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "30"))
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
@@ -207,7 +224,8 @@ LOGGING = {
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        # Postgres with in-process connection pooling, see app/db_pool.
+        "ENGINE": "app.db_pool",
         "NAME": "postgres",
         "HOST": os.getenv("DB_HOST"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
@@ -217,6 +235,14 @@ DATABASES = {
         "USER": "postgres",
         "CERT": os.getenv("DB_CERT"),
         "OPTIONS": {"sslmode": "require"},
+        # On top of the Supabase pooler, see app/db_pool for why.
+        "POOL": {
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        },
+        # Connections are given back to the pool at the end of every
+        # request, the pool keeps them open.
+        "CONN_MAX_AGE": 0,
     },
 }
 
@@ -226,9 +252,6 @@ if DEBUG:
     DATABASES["default"].pop("CERT", None)
     DATABASES["default"].pop("OPTIONS", None)
 
-
-CONN_MAX_AGE = 0
-
 # End of database connectivity.
 
 # Sentry configuration
@@ -247,3 +270,14 @@ sentry_sdk.init(
 )
 
 # End sentry configuration
+
+# Scheduler
+
+USE_SCHEDULER = True
+SCHEDULER_LOG_LEVEL = logging.WARNING
+
+# Number of rows deleted per statement when deleting an organization,
+# see profile_data/deletions.py.
+ORGANIZATION_DELETION_CHUNK_SIZE = int(
+    os.getenv("ORGANIZATION_DELETION_CHUNK_SIZE", "1000")
+)
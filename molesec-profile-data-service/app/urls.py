@@ -25,9 +25,19 @@ urlpatterns = [
         pd_api.OrganizationDetail.as_view(),
         name="api_v1_organizations",
     ),
+    path(
+        "api/v1/organizations/<uuid:organization_id>/deletion",
+        pd_api.OrganizationDeletionDetail.as_view(),
+        name="api_v1_organization_deletion",
+    ),
     path(
         "api/v1/organizations/<uuid:organization_id>/individuals",
         pd_api.IndividualsList.as_view(),
         name="api_v1_individuals",
     ),
+    path(
+        "api/v1/changes",
+        pd_api.ProfileDataChangeList.as_view(),
+        name="api_v1_changes",
+    ),
 ]
@@ -11,8 +11,8 @@ The rest of the module is dedicated to the actual API views.
 
 import logging
 
-from django.db.models import Prefetch
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import OpenApiExample, extend_schema
 from rest_framework import status
@@ -22,6 +22,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from app import utils as app_utils
+from profile_data import changes as pd_changes
+from profile_data import deletions as pd_deletions
+from profile_data import filters as pd_filters
+from profile_data import fragments as pd_fragments
 from profile_data import models as pd_models
 from profile_data import serializers as pd_serializers
 from profile_data import types as pd_types
@@ -66,12 +70,40 @@ class OrganizationDetail(APIView):
     permission_classes = (app_utils.HasAPIKeyCached | IsAdminUser,)
 
     @extend_schema(
-        responses={200: {}},
+        responses={
+            200: {},
+            202: pd_serializers.OrganizationDeletionSerializer,
+        },
     )
     def delete(self, request, organization_id: str, format=None):
-        """Idempotent."""
-        pd_models.Organization.objects.filter(id=organization_id).delete()
-        return Response(status=status.HTTP_200_OK)
+        """Idempotent.
+
+        Records of the organization are deleted in the background, the
+        progress of the deletion is returned with a 202, and can be
+        followed through the deletion endpoint. Returns a 200 if there
+        was nothing to delete.
+        """
+        deletion = pd_deletions.request_organization_deletion(organization_id)
+        if deletion is None:
+            return Response(status=status.HTTP_200_OK)
+
+        output_data = pd_serializers.OrganizationDeletionSerializer(deletion).data
+        return Response(output_data, status=status.HTTP_202_ACCEPTED)
+
+
+class OrganizationDeletionDetail(APIView):
+    permission_classes = (app_utils.HasAPIKeyCached | IsAdminUser,)
+
+    @extend_schema(
+        responses={200: pd_serializers.OrganizationDeletionSerializer},
+    )
+    def get(self, request, organization_id: str, format=None):
+        """Progress of the deletion of an organization."""
+        deletion = get_object_or_404(
+            pd_models.OrganizationDeletion, organization_id=organization_id
+        )
+        output_data = pd_serializers.OrganizationDeletionSerializer(deletion).data
+        return Response(output_data)
 
 
 class IndividualsList(ListAPIView):
@@ -81,10 +113,7 @@ class IndividualsList(ListAPIView):
 
     serializer_class = pd_serializers.IndividualSerializerWithOrg
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        "handles__value": ["exact"],
-        "handles__type": ["exact"],
-    }
+    filterset_class = pd_filters.IndividualFilterSet
 
     def _infer_org_data_from_request(self, request) -> None:
         """Infers organization data from a request.
@@ -101,13 +130,18 @@ class IndividualsList(ListAPIView):
 
         org_id = self.kwargs["organization_id"]
 
-        org_exists = pd_models.Organization.objects.filter(id=org_id).exists()
+        # Don't add individuals to organizations being deleted.
+        org_exists = (
+            pd_deletions.organizations_not_being_deleted().filter(id=org_id).exists()
+        )
         if not org_exists:
             return
 
-        individual_handle_exists = pd_models.IndividualHandle.objects.filter(
-            value=value, type=type_, individual__organization=org_id
-        ).exists()
+        individual_handle_exists = (
+            pd_models.IndividualHandle.objects.filter(organization=org_id, type=type_)
+            .matching(value)
+            .exists()
+        )
 
         if not individual_handle_exists:
             serializer = pd_serializers.EmailHandleSerializer(data={"value": value})
@@ -134,25 +168,51 @@ class IndividualsList(ListAPIView):
         queryset = pd_models.Individual.objects
         org_id = self.kwargs.get("organization_id")
         if org_id is not None:
-            queryset = queryset.filter(organization=org_id)
+            # Organizations being deleted are gone as far as consumers
+            # are concerned, see deletions.py.
+            queryset = queryset.filter(
+                organization=org_id,
+                organization__in=pd_deletions.organizations_not_being_deleted(),
+            )
         return queryset
 
     def list(self, request, *args, **kwargs):
         self._infer_org_data_from_request(request)
 
         queryset = self.filter_queryset(self.get_queryset())
-        queryset = queryset.select_related("organization")
+        individual_ids = list(queryset.values_list("id", flat=True))
 
-        # Spent a bit too much time trying to do a prefetch related
-        # which would filter out the current record from the peers list,
-        # this will suffice for now.
-        queryset = queryset.prefetch_related(
-            Prefetch("organization__individual_set", to_attr="peers")
+        # The organization and the peers are the same for every lookup
+        # in an organization, stitch together pre-serialized fragments
+        # rather than serializing them on every call.
+        content = pd_fragments.render_individuals_with_org(
+            self.kwargs["organization_id"], individual_ids
         )
-        for record in queryset:
-            record.peers = [
-                peer for peer in record.organization.peers if peer.id != record.id
-            ]
+        return HttpResponse(content, content_type="application/json")
+
+
+class ProfileDataChangeList(APIView):
+    """Feed of the changes to the profile data, see changes.py."""
+
+    permission_classes = (app_utils.HasAPIKeyCached | IsAdminUser,)
+
+    @extend_schema(
+        parameters=[pd_serializers.ProfileDataChangeQuerySerializer],
+        responses={200: pd_serializers.ProfileDataChangesSerializer},
+    )
+    def get(self, request, format=None):
+        """Lists the changes after a cursor, oldest first.
+
+        Pass the returned cursor to the next call to get the following
+        changes.
+        """
+        serializer = pd_serializers.ProfileDataChangeQuerySerializer(
+            data=request.query_params
+        )
+        serializer.is_valid(raise_exception=True)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        changes, cursor = pd_changes.list_changes(**serializer.validated_data)
+        output_data = pd_serializers.ProfileDataChangesSerializer(
+            {"changes": changes, "cursor": cursor}
+        ).data
+        return Response(output_data)
@@ -1,6 +1,48 @@
+import logging
+import os
+
+from apscheduler.triggers.cron import CronTrigger
 from django.apps import AppConfig
 
 
 class ProfileDataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "profile_data"
+
+    def ready(self):
+        # Registers the signal receivers invalidating the cached
+        # fragments and recording the changes.
+        from profile_data import (  # noqa pylint: disable=import-outside-toplevel
+            changes,
+            fragments,
+        )
+        from profile_data.changes import (  # noqa pylint: disable=import-outside-toplevel
+            prune_changes,
+        )
+        from profile_data.deletions import (  # noqa pylint: disable=import-outside-toplevel
+            process_organization_deletions,
+        )
+        from profile_data.scheduler import (  # noqa pylint: disable=import-outside-toplevel
+            scheduler,
+        )
+
+        # Same as in the attack service, only start the scheduler when
+        # running with gunicorn or with the dev server, not in other
+        # manage.py commands (migrations, tests etc.).
+        if (
+            "gunicorn" in os.environ.get("SERVER_SOFTWARE", "")
+            or os.environ.get("RUN_MAIN") == "true"
+        ):
+            logging.info("Starting scheduler...")
+            scheduler.start()
+
+            scheduler.add_job(
+                process_organization_deletions,
+                trigger=CronTrigger(second="*/10"),
+                id="organization_deletions",
+            )
+            scheduler.add_job(
+                prune_changes,
+                trigger=CronTrigger(hour=3),
+                id="prune_changes",
+            )
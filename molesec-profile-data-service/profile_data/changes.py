@@ -0,0 +1,176 @@
+"""Feed of the changes to the profile data.
+
+Every save/delete of an Organization, Individual or IndividualHandle is
+recorded as a ProfileDataChange in the same transaction (outbox
+pattern), see the receivers at the bottom of the module. Consumers, e.g.
+the attack service, keep the id of the last change they have seen as a
+cursor and pull only what changed after it, rather than fetching the
+profile data of every target over and over again.
+
+Ids are assigned when changes are inserted, but transactions don't
+necessarily commit in the same order, so a change with a lower id might
+become visible after one with a higher id. To avoid consumers skipping
+those, only changes older than CHANGE_FEED_SETTLE_SECONDS are served.
+
+Changes older than CHANGE_FEED_RETENTION_DAYS are pruned, see
+prune_changes, consumers lagging further behind than that must start
+over from the current cursor.
+
+Changes aren't deleted along with their organization, unlike any other
+record of it. Deleting an organization records a single ORGANIZATION
+DELETED change, a tombstone for consumers to drop everything they have
+of it, rather than one change per deleted record. Bulk operations that
+don't send signals, e.g. QuerySet.update or raw deletes, must call
+record_change explicitly.
+
+"""
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from profile_data import models as pd_models
+
+# Max number of changes returned by list_changes.
+MAX_CHANGES_PER_PAGE = 1000
+
+
+def record_change(
+    organization_id: UUID,
+    model: pd_models.ChangedModel,
+    operation: pd_models.ChangeOperation,
+    individual_id: Optional[UUID] = None,
+    email: Optional[str] = None,
+) -> None:
+    pd_models.ProfileDataChange.objects.create(
+        organization_id=organization_id,
+        individual_id=individual_id,
+        email=email,
+        model=model,
+        operation=operation,
+    )
+
+
+def list_changes(
+    cursor: Optional[int] = None, limit: int = MAX_CHANGES_PER_PAGE
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Lists the changes after a cursor.
+
+    Args:
+        cursor: id of the last change seen by the consumer, 0 to start
+            from the beginning. If None, no changes are returned, only
+            the current cursor, for consumers that are just starting.
+        limit: max number of changes to return.
+
+    Returns:
+        The changes, in order, along with the current emails of the
+        individuals they are about, and the cursor to pass next time.
+    """
+    settled_before = timezone.now() - timedelta(
+        seconds=settings.CHANGE_FEED_SETTLE_SECONDS
+    )
+    settled_changes = pd_models.ProfileDataChange.objects.filter(
+        time_created__lte=settled_before
+    )
+    if cursor is None:
+        latest = settled_changes.order_by("-id").values_list("id", flat=True).first()
+        return [], latest or 0
+
+    changes = list(
+        settled_changes.filter(id__gt=cursor)
+        .order_by("id")
+        .values(
+            "id",
+            "organization_id",
+            "individual_id",
+            "email",
+            "model",
+            "operation",
+            "time_created",
+        )[: min(limit, MAX_CHANGES_PER_PAGE)]
+    )
+
+    individual_ids = {c["individual_id"] for c in changes if c["individual_id"]}
+    emails_by_individual: Dict[UUID, List[str]] = {}
+    for individual_id, value in pd_models.IndividualHandle.objects.filter(
+        individual_id__in=individual_ids, type=pd_models.HandleType.EMAIL
+    ).values_list("individual_id", "value"):
+        emails_by_individual.setdefault(individual_id, []).append(value)
+
+    for change in changes:
+        emails = set(emails_by_individual.get(change["individual_id"], []))
+        email = change.pop("email")
+        if email is not None:
+            emails.add(email)
+        change["emails"] = sorted(emails)
+
+    next_cursor = changes[-1]["id"] if changes else cursor
+    return changes, next_cursor
+
+
+def prune_changes() -> None:
+    """Deletes the expired changes, meant to run periodically."""
+    expired_before = timezone.now() - timedelta(
+        days=settings.CHANGE_FEED_RETENTION_DAYS
+    )
+    deleted, _ = pd_models.ProfileDataChange.objects.filter(
+        time_created__lt=expired_before
+    ).delete()
+    logging.info(f"Pruned {deleted} expired changes.")
+
+
+def _is_organization_deletion(origin) -> bool:
+    # The deletion of the organization itself is recorded, see
+    # _record_organization_change, not the deletion of its records.
+    if isinstance(origin, QuerySet):
+        return origin.model is pd_models.Organization
+    return isinstance(origin, pd_models.Organization)
+
+
+@receiver([post_save, post_delete], sender=pd_models.Organization)
+def _record_organization_change(sender, instance, signal, **kwargs):
+    record_change(
+        instance.id,
+        pd_models.ChangedModel.ORGANIZATION,
+        pd_models.ChangeOperation.SAVED
+        if signal is post_save
+        else pd_models.ChangeOperation.DELETED,
+    )
+
+
+@receiver([post_save, post_delete], sender=pd_models.Individual)
+def _record_individual_change(sender, instance, signal, **kwargs):
+    if signal is post_delete and _is_organization_deletion(kwargs.get("origin")):
+        return
+    record_change(
+        instance.organization_id,
+        pd_models.ChangedModel.INDIVIDUAL,
+        pd_models.ChangeOperation.SAVED
+        if signal is post_save
+        else pd_models.ChangeOperation.DELETED,
+        individual_id=instance.id,
+    )
+
+
+@receiver([post_save, post_delete], sender=pd_models.IndividualHandle)
+def _record_individual_handle_change(sender, instance, signal, **kwargs):
+    if signal is post_delete and _is_organization_deletion(kwargs.get("origin")):
+        return
+    record_change(
+        instance.organization_id,
+        pd_models.ChangedModel.INDIVIDUAL_HANDLE,
+        pd_models.ChangeOperation.SAVED
+        if signal is post_save
+        else pd_models.ChangeOperation.DELETED,
+        individual_id=instance.individual_id,
+        email=instance.value if instance.type == pd_models.HandleType.EMAIL else None,
+    )
+
+
+__all__ = ["list_changes", "prune_changes", "record_change"]
@@ -0,0 +1,152 @@
+"""Background deletion of organizations.
+
+Deleting an Organization through the ORM makes django's collector load
+every record of the organization in memory to cascade the deletion,
+which for large organizations takes a lot of memory and longer than a
+request should, blocking the single worker of the service.
+
+Instead, deleting an organization creates an OrganizationDeletion, which
+is carried out by a recurring job (see apps.py): the records of the
+organization are deleted with set based DELETEs of at most
+ORGANIZATION_DELETION_CHUNK_SIZE rows, each in its own transaction, and
+the progress is stored along with the deletion. A deletion interrupted
+half way, e.g. by a restart, is resumed by the next run of the job.
+
+Raw deletes don't send signals, so the fragments cache is invalidated
+explicitly, and no changes are recorded for the deleted records.
+Instead, requesting the deletion records an ORGANIZATION DELETED change
+right away, for consumers of the change feed to drop the organization,
+whose records are hidden from the API from then on. The changes of the
+organization are kept, they are pruned by age like any other, see
+changes.prune_changes.
+
+"""
+import logging
+import time
+from typing import List, Optional, Tuple, Type
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Exists, F, OuterRef, QuerySet
+from django.utils import timezone
+
+from profile_data import changes as pd_changes
+from profile_data import fragments as pd_fragments
+from profile_data import models as pd_models
+
+# Models holding records of an organization along with the counter of
+# the deleted records, in deletion order.
+_MODELS: List[Tuple[Type[models.Model], str]] = [
+    (pd_models.IndividualHandle, "deleted_individual_handles"),
+    (pd_models.Individual, "deleted_individuals"),
+]
+
+
+def request_organization_deletion(
+    organization_id: UUID,
+) -> Optional[pd_models.OrganizationDeletion]:
+    """Schedules the deletion of an organization, idempotent.
+
+    Returns:
+        The deletion of the organization, or None if the organization
+        doesn't exist and has never been deleted.
+    """
+    with transaction.atomic():
+        organization_exists = pd_models.Organization.objects.filter(
+            id=organization_id
+        ).exists()
+        if not organization_exists:
+            return pd_models.OrganizationDeletion.objects.filter(
+                organization_id=organization_id
+            ).first()
+
+        deletion, created = pd_models.OrganizationDeletion.objects.get_or_create(
+            organization_id=organization_id
+        )
+        if not created and deletion.status == pd_models.OrganizationDeletionStatus.DONE:
+            # The organization has been created again since the last
+            # deletion.
+            deletion.status = pd_models.OrganizationDeletionStatus.PENDING
+            deletion.deleted_individual_handles = 0
+            deletion.deleted_individuals = 0
+            deletion.time_finished = None
+            deletion.save()
+        elif not created:
+            return deletion
+
+        pd_changes.record_change(
+            organization_id,
+            pd_models.ChangedModel.ORGANIZATION,
+            pd_models.ChangeOperation.DELETED,
+        )
+    return deletion
+
+
+def organizations_not_being_deleted() -> "QuerySet[pd_models.Organization]":
+    pending_deletions = pd_models.OrganizationDeletion.objects.filter(
+        organization_id=OuterRef("id"),
+        status=pd_models.OrganizationDeletionStatus.PENDING,
+    )
+    return pd_models.Organization.objects.exclude(Exists(pending_deletions))
+
+
+def _delete_chunk(model: Type[models.Model], organization_id: UUID) -> int:
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {pk} IN "
+            f"(SELECT {pk} FROM {table} WHERE organization_id = %s LIMIT %s)",
+            [organization_id, settings.ORGANIZATION_DELETION_CHUNK_SIZE],
+        )
+        return cursor.rowcount
+
+
+def process_deletion(deletion: pd_models.OrganizationDeletion) -> None:
+    organization_id = deletion.organization_id
+    for model, counter in _MODELS:
+        while True:
+            with transaction.atomic():
+                deleted = _delete_chunk(model, organization_id)
+                pd_models.OrganizationDeletion.objects.filter(id=deletion.id).update(
+                    **{counter: F(counter) + deleted}
+                )
+            pd_fragments.invalidate_organization(organization_id)
+            if deleted < settings.ORGANIZATION_DELETION_CHUNK_SIZE:
+                break
+            # Let requests be served in between chunks.
+            time.sleep(0)
+
+    with transaction.atomic():
+        # Records created in the meantime, if any, are few, let the ORM
+        # cascade them. Records another ORGANIZATION DELETED change, for
+        # consumers that got the organization again in the meantime.
+        pd_models.Organization.objects.filter(id=organization_id).delete()
+        pd_models.OrganizationDeletion.objects.filter(id=deletion.id).update(
+            status=pd_models.OrganizationDeletionStatus.DONE,
+            time_finished=timezone.now(),
+        )
+    logging.info(f"Deleted organization {organization_id}.")
+
+
+def process_organization_deletions() -> None:
+    """Carries out the pending deletions, meant to run periodically."""
+    deletions = pd_models.OrganizationDeletion.objects.filter(
+        status=pd_models.OrganizationDeletionStatus.PENDING
+    ).order_by("time_created")
+    for deletion in deletions:
+        try:
+            process_deletion(deletion)
+        except Exception:
+            # Retried on the next run, don't block the other deletions.
+            logging.exception(
+                f"Failed to delete organization {deletion.organization_id}."
+            )
+
+
+__all__ = [
+    "organizations_not_being_deleted",
+    "process_organization_deletions",
+    "request_organization_deletion",
+]
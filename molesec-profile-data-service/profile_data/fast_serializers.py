@@ -0,0 +1,56 @@
+"""Plain dict serializers for the hot read models.
+
+Used instead of the DRF serializers in serializers.py when
+settings.FAST_JSON_RENDERING is enabled. They produce the same payloads
+but skip the field machinery of DRF, leaving UUIDs, dates etc. to the
+renderer (see app/renderers.py). Keep them in sync with the
+corresponding serializers, profile_data/tests/test_fast_serializers.py
+checks that the outputs match.
+
+"""
+from typing import Any, Dict
+
+from profile_data import models as pd_models
+
+
+def organization_to_dict(organization: pd_models.Organization) -> Dict[str, Any]:
+    """See serializers.OrganizationSerializer."""
+    return {
+        "id": organization.id,
+        "domains": organization.domains,
+        "languages": organization.languages,
+        "time_created": organization.time_created,
+        "name": organization.name,
+        "industry": organization.industry,
+        "timezone": organization.timezone,
+    }
+
+
+def email_handle_to_dict(handle: pd_models.IndividualHandle) -> Dict[str, Any]:
+    """See serializers.EmailHandleSerializer."""
+    return {
+        "value": handle.value,
+        "time_created": handle.time_created,
+        "provided_by_org": handle.provided_by_org,
+    }
+
+
+def individual_with_handles_to_dict(
+    individual: pd_models.Individual,
+) -> Dict[str, Any]:
+    """See serializers.IndividualSerializerWithHandles."""
+    return {
+        "id": individual.id,
+        # Iterate over all() to make use of the prefetched handles.
+        "emails": [
+            email_handle_to_dict(handle)
+            for handle in individual.handles.all()
+            if handle.type == pd_models.HandleType.EMAIL
+        ],
+        "time_created": individual.time_created,
+        "first_name": individual.first_name,
+        "last_name": individual.last_name,
+        "date_of_birth": individual.date_of_birth,
+        "languages": individual.languages,
+        "role_title": individual.role_title,
+    }
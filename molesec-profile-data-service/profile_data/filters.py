@@ -0,0 +1,47 @@
+"""Filter sets for the profile_data API views."""
+import django_filters
+from django.db.models import Exists, OuterRef
+
+from profile_data import models as pd_models
+
+
+class IndividualFilterSet(django_filters.FilterSet):
+    """Filters individuals by their handles.
+
+    Type and value have to match the same handle, values are compared
+    case-insensitively, e.g. emails with a different case than the one
+    they have been stored with still match.
+    """
+
+    handles__type = django_filters.CharFilter(method="filter_handles")
+    handles__value = django_filters.CharFilter(method="filter_handles")
+
+    class Meta:
+        model = pd_models.Individual
+        fields = ["handles__type", "handles__value"]
+
+    def filter_handles(self, queryset, name, value):
+        # Deliberately a no-op, the filters are only declared for the
+        # form validation and the API schema. Type and value have to
+        # match the same handle, which a filter seeing only its own
+        # value can't do, so both are applied at once in
+        # filter_queryset, which replaces the per-filter filtering.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        type_ = self.form.cleaned_data.get("handles__type")
+        value = self.form.cleaned_data.get("handles__value")
+        if not type_ and not value:
+            return queryset
+
+        handles = pd_models.IndividualHandle.objects.filter(
+            organization=OuterRef("organization"), individual=OuterRef("id")
+        )
+        if type_:
+            handles = handles.filter(type=type_)
+        if value:
+            handles = handles.matching(value)
+        return queryset.filter(Exists(handles))
+
+
+__all__ = ["IndividualFilterSet"]
@@ -0,0 +1,228 @@
+"""Cache of pre-serialized profile data fragments.
+
+IndividualsList returns, for every matching individual, the individual
+itself, its organization and all of its peers. Serializing the
+organization and the peers is the exact same work for every lookup done
+in an organization, so the JSON fragments of an organization are
+computed once and then stitched together into responses, without
+running the DRF serializers again, until a record of the organization
+changes.
+
+Fragments are versioned per organization. Every save/delete of an
+Organization, Individual or IndividualHandle bumps the version of the
+related organization (see the receivers at the bottom of the module),
+and fragments are only stored if the version they have been built
+against is still the current one. The version is bumped both when the
+signal is sent and once the transaction commits, so that fragments built
+from the pre-commit state of the db are never served.
+
+The cache lives in memory, which is fine given that we run a single
+worker (see the Procfile). Bulk operations that don't send signals, e.g.
+QuerySet.update or raw deletes, must call invalidate_organization
+explicitly.
+
+"""
+import json
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.utils import encoders
+
+from app import renderers as app_renderers
+from profile_data import fast_serializers as pd_fast_serializers
+from profile_data import models as pd_models
+from profile_data import serializers as pd_serializers
+
+# Number of organizations for which fragments are kept in memory.
+_MAX_CACHED_ORGANIZATIONS = 256
+
+
+class _OrganizationFragments(NamedTuple):
+    organization: str
+    # All individuals of the organization, serialized with
+    # IndividualSerializerWithHandles and joined by commas, so that the
+    # peers of an individual can be obtained by slicing out the
+    # individual itself, see _peers_json.
+    individuals: str
+    # Individual id to the (start, split, end) offsets of its fragment
+    # in `individuals`, the organization and the peers go at split,
+    # right after the emails, where IndividualSerializerWithOrg puts
+    # them.
+    offsets: Dict[UUID, Tuple[int, int, int]]
+
+
+_lock = threading.Lock()
+_versions: Dict[UUID, int] = {}
+_fragments: "LRUCache[UUID, Tuple[int, _OrganizationFragments]]" = LRUCache(
+    maxsize=_MAX_CACHED_ORGANIZATIONS
+)
+
+# Fields of IndividualSerializerWithOrg before the organization.
+_FIELDS_BEFORE_ORGANIZATION = ("id", "emails")
+
+
+def _dumps(data) -> str:
+    if settings.FAST_JSON_RENDERING:
+        return app_renderers.dumps(data).decode("utf-8")
+    # Same output as the DRF JSONRenderer with the default settings.
+    return json.dumps(
+        data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def _serialize_organization(organization: pd_models.Organization):
+    if settings.FAST_JSON_RENDERING:
+        return pd_fast_serializers.organization_to_dict(organization)
+    return pd_serializers.OrganizationSerializer(organization).data
+
+
+def _serialize_individual(individual: pd_models.Individual):
+    if settings.FAST_JSON_RENDERING:
+        return pd_fast_serializers.individual_with_handles_to_dict(individual)
+    return pd_serializers.IndividualSerializerWithHandles(individual).data
+
+
+def _key(organization_id: UUID) -> UUID:
+    # Ids might come in as strings, e.g. when assigned by hand to a FK.
+    return UUID(str(organization_id))
+
+
+def invalidate_organization(organization_id: UUID) -> None:
+    """Invalidates the cached fragments of an organization."""
+    organization_id = _key(organization_id)
+    with _lock:
+        _versions[organization_id] = _versions.get(organization_id, 0) + 1
+        _fragments.pop(organization_id, None)
+
+
+def _build_fragments(organization_id: UUID) -> Optional[_OrganizationFragments]:
+    organization = pd_models.Organization.objects.filter(id=organization_id).first()
+    if organization is None:
+        return None
+
+    individuals = (
+        pd_models.Individual.objects.filter(organization=organization_id)
+        .with_handles(pd_models.HandleType.EMAIL)
+        .order_by("time_created", "id")
+    )
+
+    parts = []
+    offsets = {}
+    position = 0
+    for individual in individuals:
+        data = _serialize_individual(individual)
+        part = _dumps(data)
+        # The fragment starts with the serialization of these fields,
+        # up to its closing brace.
+        head = _dumps({key: data[key] for key in _FIELDS_BEFORE_ORGANIZATION})
+        offsets[individual.id] = (
+            position,
+            position + len(head) - 1,
+            position + len(part),
+        )
+        # +1 for the comma separating the fragments.
+        position += len(part) + 1
+        parts.append(part)
+
+    return _OrganizationFragments(
+        organization=_dumps(_serialize_organization(organization)),
+        individuals=",".join(parts),
+        offsets=offsets,
+    )
+
+
+def _get_fragments(
+    organization_id: UUID, use_cache: bool = True
+) -> Optional[_OrganizationFragments]:
+    organization_id = _key(organization_id)
+    with _lock:
+        version = _versions.get(organization_id, 0)
+        cached = _fragments.get(organization_id)
+    if use_cache and cached is not None and cached[0] == version:
+        return cached[1]
+
+    fragments = _build_fragments(organization_id)
+    if fragments is None:
+        return None
+
+    with _lock:
+        # Don't store fragments if the organization changed while they
+        # were being built.
+        if _versions.get(organization_id, 0) == version:
+            _fragments[organization_id] = (version, fragments)
+    return fragments
+
+
+def _peers_json(fragments: _OrganizationFragments, individual_id: UUID) -> str:
+    start, _, end = fragments.offsets[individual_id]
+    individuals = fragments.individuals
+    if start == 0:
+        # Skip the individual and the following comma, if any.
+        return individuals[end + 1 :]
+    # Skip the preceding comma and the individual.
+    return individuals[: start - 1] + individuals[end:]
+
+
+def render_individuals_with_org(
+    organization_id: UUID, individual_ids: List[UUID]
+) -> str:
+    """Renders individuals as IndividualSerializerWithOrg would.
+
+    Args:
+        organization_id: the organization the individuals belong to.
+        individual_ids: ids of the individuals to render, in order.
+
+    Returns:
+        A JSON array with an entry per individual, along with its
+        organization and peers.
+    """
+    if not individual_ids:
+        return "[]"
+
+    fragments = _get_fragments(organization_id)
+    if fragments is None:
+        return "[]"
+    if any(id_ not in fragments.offsets for id_ in individual_ids):
+        # Individuals created after the fragments were built but before
+        # the invalidation got to us, rebuild from the db.
+        fragments = _get_fragments(organization_id, use_cache=False)
+        if fragments is None:
+            return "[]"
+        individual_ids = [id_ for id_ in individual_ids if id_ in fragments.offsets]
+
+    entries = []
+    for individual_id in individual_ids:
+        start, split, end = fragments.offsets[individual_id]
+        # Open up the individual object to add the org and the peers.
+        entries.append(
+            f"{fragments.individuals[start:split]},"
+            f'"organization":{fragments.organization},'
+            f'"peers":[{_peers_json(fragments, individual_id)}]'
+            f"{fragments.individuals[split:end]}"
+        )
+    return f"[{','.join(entries)}]"
+
+
+def _invalidate_now_and_on_commit(organization_id: UUID) -> None:
+    invalidate_organization(organization_id)
+    transaction.on_commit(lambda: invalidate_organization(organization_id))
+
+
+@receiver([post_save, post_delete], sender=pd_models.Organization)
+def _invalidate_on_organization_change(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(instance.id)
+
+
+@receiver([post_save, post_delete], sender=pd_models.Individual)
+@receiver([post_save, post_delete], sender=pd_models.IndividualHandle)
+def _invalidate_on_individual_change(sender, instance, **kwargs):
+    _invalidate_now_and_on_commit(instance.organization_id)
+
+
+__all__ = ["invalidate_organization", "render_individuals_with_org"]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profile_data", "0005_individualhandle_profile_dat_organiz_ccbc29_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProfileDataChange",
+            fields=[
+                (
+                    "time_created",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("individual_id", models.UUIDField(blank=True, null=True)),
+                ("email", models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("ORGANIZATION", "Organization"),
+                            ("INDIVIDUAL", "Individual"),
+                            ("INDIVIDUAL_HANDLE", "Individual Handle"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[("SAVED", "Saved"), ("DELETED", "Deleted")],
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="profile_data.organization",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "profile_data_changes",
+            },
+        ),
+    ]
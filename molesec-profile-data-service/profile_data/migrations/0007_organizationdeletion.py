@@ -0,0 +1,49 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profile_data", "0006_profiledatachange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganizationDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "time_created",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+                ("organization_id", models.UUIDField(unique=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("PENDING", "Pending"), ("DONE", "Done")],
+                        default="PENDING",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "deleted_individual_handles",
+                    models.PositiveBigIntegerField(default=0),
+                ),
+                ("deleted_individuals", models.PositiveBigIntegerField(default=0)),
+                ("deleted_changes", models.PositiveBigIntegerField(default=0)),
+                ("time_finished", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "profile_data_organization_deletions",
+            },
+        ),
+    ]
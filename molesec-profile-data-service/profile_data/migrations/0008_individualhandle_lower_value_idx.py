@@ -0,0 +1,26 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:05
+
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking the table for writes.
+    atomic = False
+
+    dependencies = [
+        ("profile_data", "0007_organizationdeletion"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="individualhandle",
+            index=models.Index(
+                models.F("organization"),
+                models.F("type"),
+                django.db.models.functions.text.Lower("value"),
+                name="pd_handles_org_type_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profile_data", "0008_individualhandle_lower_value_idx"),
+    ]
+
+    operations = [
+        # Drops the foreign key constraint, keeping the column and its
+        # index, so that changes survive the deletion of their
+        # organization.
+        migrations.AlterField(
+            model_name="profiledatachange",
+            name="organization",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="profile_data.organization",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name="profiledatachange",
+                    name="organization",
+                ),
+                migrations.AddField(
+                    model_name="profiledatachange",
+                    name="organization_id",
+                    field=models.UUIDField(db_index=True),
+                    preserve_default=False,
+                ),
+            ],
+        ),
+    ]
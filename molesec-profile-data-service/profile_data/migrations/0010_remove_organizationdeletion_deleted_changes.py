@@ -0,0 +1,16 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profile_data", "0009_profiledatachange_organization_id"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="organizationdeletion",
+            name="deleted_changes",
+        ),
+    ]
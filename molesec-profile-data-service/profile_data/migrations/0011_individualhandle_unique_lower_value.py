@@ -0,0 +1,47 @@
+# Generated by Django 4.1.5 on 2026-10-19 16:59
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_no_case_duplicates(apps, schema_editor):
+    # Merging the individuals of duplicated handles is up to a human,
+    # fail with something more helpful than an IntegrityError.
+    IndividualHandle = apps.get_model("profile_data", "IndividualHandle")
+    duplicates = list(
+        IndividualHandle.objects.values("organization", "type", lower=Lower("value"))
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"Handles differing only by case, merge them first: {duplicates}"
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profile_data", "0010_remove_organizationdeletion_deleted_changes"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_case_duplicates, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name="individualhandle",
+            name="profile_data_individual_handles_unique_org_type_value",
+        ),
+        migrations.RemoveIndex(
+            model_name="individualhandle",
+            name="pd_handles_org_type_lower_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="individualhandle",
+            constraint=models.UniqueConstraint(
+                models.F("organization"),
+                models.F("type"),
+                Lower("value"),
+                name="pd_handles_unique_org_type_lower_value",
+            ),
+        ),
+    ]
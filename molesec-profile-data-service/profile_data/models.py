@@ -14,6 +14,8 @@ Admin panel notes:
 from uuid import uuid4
 
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 
 
 class BaseModel(models.Model):
@@ -46,17 +48,27 @@ class Organization(BaseModel):
         return f"{self.name} ({self.id})"
 
 
-class _IndividualModelManager(models.Manager):
-    def get_queryset(self):
-        return super().get_queryset().prefetch_related("handles")
+class IndividualQuerySet(models.QuerySet):
+    def with_handles(self, *types: "HandleType") -> "IndividualQuerySet":
+        """Prefetches the handles of the individuals.
+
+        Args:
+            types: if provided, only handles of these types are
+                prefetched, e.g. with_handles(HandleType.EMAIL).
+        """
+        handles = IndividualHandle.objects.all()
+        if types:
+            handles = handles.filter(type__in=types)
+        return self.prefetch_related(models.Prefetch("handles", queryset=handles))
 
 
 class Individual(BaseModel):
     class Meta:
         db_table = "profile_data_individuals"
 
-    _base_manager = _IndividualModelManager
-    objects = _IndividualModelManager()
+    # Handles are not prefetched by default, use with_handles when
+    # needed.
+    objects = IndividualQuerySet.as_manager()
 
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
     id = models.UUIDField(primary_key=True, default=uuid4)
@@ -74,18 +86,39 @@ class HandleType(models.TextChoices):
     EMAIL = "EMAIL"
 
 
+class IndividualHandleQuerySet(models.QuerySet):
+    def matching(self, value: str) -> "IndividualHandleQuerySet":
+        """Filters handles by value, case-insensitively.
+
+        Compares lower(value), which is served by the unique constraint
+        of the model, unlike value__iexact.
+        """
+        return self.filter(
+            Exact(Lower("value"), Lower(models.Value(value, models.CharField())))
+        )
+
+
 class IndividualHandle(BaseModel):
     class Meta:
         db_table = "profile_data_individual_handles"
 
         constraints = [
+            # Values are matched case-insensitively, see matching, so
+            # they're unique case-insensitively as well. Also serves
+            # the lookups of matching.
             models.UniqueConstraint(
-                fields=["organization", "type", "value"],
-                name="profile_data_individual_handles_unique_org_type_value",
+                "organization",
+                "type",
+                Lower("value"),
+                name="pd_handles_unique_org_type_lower_value",
             )
         ]
 
-        indexes = [models.Index(fields=["organization", "type", "value"])]
+        indexes = [
+            models.Index(fields=["organization", "type", "value"]),
+        ]
+
+    objects = IndividualHandleQuerySet.as_manager()
 
     # Redundant given the FK to the individual, but needed to constraint
     # the uniqueness of an email across all individuals of an
@@ -104,3 +137,69 @@ class IndividualHandle(BaseModel):
 
     def __str__(self):
         return f"{self.type} {self.value} ({self.id})"
+
+
+class ChangedModel(models.TextChoices):
+    ORGANIZATION = "ORGANIZATION"
+    INDIVIDUAL = "INDIVIDUAL"
+    INDIVIDUAL_HANDLE = "INDIVIDUAL_HANDLE"
+
+
+class ChangeOperation(models.TextChoices):
+    SAVED = "SAVED"
+    DELETED = "DELETED"
+
+
+class ProfileDataChange(BaseModel):
+    """Outbox of modifications to the profile data, see changes.py.
+
+    The auto incremented id acts as the cursor of the change feed.
+    """
+
+    class Meta:
+        db_table = "profile_data_changes"
+
+    id = models.BigAutoField(primary_key=True)
+    # Not FKs, changes outlive the records they are about, the deletion
+    # of an organization included. An exception to the namespacing rule
+    # at the top of the module.
+    organization_id = models.UUIDField(db_index=True)
+    individual_id = models.UUIDField(null=True, blank=True)
+    # Value of the handle at the time of the change, for changes of
+    # email handles, so that consumers know about removed emails too.
+    email = models.CharField(max_length=255, null=True, blank=True)
+    model = models.CharField(max_length=255, choices=ChangedModel.choices)
+    operation = models.CharField(max_length=255, choices=ChangeOperation.choices)
+
+    def __str__(self):
+        return f"{self.operation} {self.model} ({self.id})"
+
+
+class OrganizationDeletionStatus(models.TextChoices):
+    PENDING = "PENDING"
+    DONE = "DONE"
+
+
+class OrganizationDeletion(BaseModel):
+    """Deletion of an organization, carried out in the background.
+
+    See deletions.py.
+    """
+
+    class Meta:
+        db_table = "profile_data_organization_deletions"
+
+    # Not a FK, the deletion outlives the organization. An exception to
+    # the namespacing rule at the top of the module.
+    organization_id = models.UUIDField(unique=True)
+    status = models.CharField(
+        max_length=255,
+        choices=OrganizationDeletionStatus.choices,
+        default=OrganizationDeletionStatus.PENDING,
+    )
+    deleted_individual_handles = models.PositiveBigIntegerField(default=0)
+    deleted_individuals = models.PositiveBigIntegerField(default=0)
+    time_finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.status} {self.organization_id} ({self.id})"
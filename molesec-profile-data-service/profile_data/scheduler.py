@@ -0,0 +1,47 @@
+"""Scheduler for the application.
+
+Same as the one of the attack service, see its scheduler module for the
+caveats of running a scheduler this way. In short, the server should
+only run a single process (see the Procfile), and recurring jobs are
+set up in apps.py once the scheduler is started.
+
+"""
+import logging
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+
+
+def instantiate():
+    """Instantiate scheduler."""
+
+    if settings.USE_SCHEDULER:
+        scheduler_instance = BackgroundScheduler(
+            job_defaults={
+                "misfire_grace_time": 2**31,
+                "coalesce": False,
+                "max_instances": 1,
+            },
+        )
+        logging.getLogger("apscheduler").setLevel(settings.SCHEDULER_LOG_LEVEL)
+
+    else:
+
+        class SchedulerMock:
+            def add_job(self, *args, **kwargs):
+                pass
+
+            def remove_job(self, *args, **kwargs):
+                pass
+
+            def start(self, *args, **kwargs):
+                pass
+
+        scheduler_instance = SchedulerMock()
+
+    return scheduler_instance
+
+
+scheduler = instantiate()
+
+__all__ = ["scheduler"]
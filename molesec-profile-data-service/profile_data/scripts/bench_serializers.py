@@ -0,0 +1,113 @@
+"""Benchmarks the DRF serializers against the fast path.
+
+Compares IndividualSerializerWithOrg + JSONRenderer with
+fast_serializers + ORJSONRenderer on in-memory records (no db needed)
+for organizations of different sizes, checking that the outputs match.
+
+Usage:
+    python manage.py runscript bench_serializers
+    python manage.py runscript bench_serializers --script-args 2000 50
+"""
+import timeit
+from datetime import date
+from typing import List, Tuple
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from app.renderers import ORJSONRenderer
+from profile_data import fast_serializers as pd_fast_serializers
+from profile_data import models as pd_models
+from profile_data import serializers as pd_serializers
+
+
+def _make_org(
+    size: int,
+) -> Tuple[pd_models.Organization, List[pd_models.Individual]]:
+    now = timezone.now()
+    organization = pd_models.Organization(
+        name="Acme",
+        industry="Software",
+        timezone="Europe/Amsterdam",
+        domains=["acme.com", "acme.io"],
+        languages=[pd_models.LanguageCode.EN],
+        time_created=now,
+    )
+    individuals = []
+    for i in range(size):
+        individual = pd_models.Individual(
+            organization=organization,
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            date_of_birth=date(1990, 1, 1 + i % 28),
+            languages=[pd_models.LanguageCode.EN, pd_models.LanguageCode.NL],
+            role_title="Engineer",
+            time_created=now,
+        )
+        handles = [
+            pd_models.IndividualHandle(
+                organization=organization,
+                individual=individual,
+                type=pd_models.HandleType.EMAIL,
+                value=f"person{i}.{j}@acme.com",
+                time_created=now,
+            )
+            for j in range(2)
+        ]
+        # Equivalent to a prefetch_related("handles").
+        individual._prefetched_objects_cache = {  # pylint: disable=W0212
+            "handles": handles
+        }
+        individuals.append(individual)
+    return organization, individuals
+
+
+def _drf(individuals: List[pd_models.Individual], lookups: int) -> bytes:
+    records = individuals[:lookups]
+    for record in records:
+        record.peers = [peer for peer in individuals if peer.id != record.id]
+    data = pd_serializers.IndividualSerializerWithOrg(records, many=True).data
+    return JSONRenderer().render(data)
+
+
+def _fast(individuals: List[pd_models.Individual], lookups: int) -> bytes:
+    data = []
+    for record in individuals[:lookups]:
+        individual = pd_fast_serializers.individual_with_handles_to_dict(record)
+        # Where IndividualSerializerWithOrg puts them, see fragments.py.
+        data.append(
+            {
+                "id": individual.pop("id"),
+                "emails": individual.pop("emails"),
+                "organization": pd_fast_serializers.organization_to_dict(
+                    record.organization
+                ),
+                "peers": [
+                    pd_fast_serializers.individual_with_handles_to_dict(peer)
+                    for peer in individuals
+                    if peer.id != record.id
+                ],
+                **individual,
+            }
+        )
+    return ORJSONRenderer().render(data)
+
+
+def run(*args):
+    sizes = [int(arg) for arg in args[:1]] or [20, 200, 1000]
+    lookups = int(args[1]) if len(args) > 1 else 1
+
+    for size in sizes:
+        _, individuals = _make_org(size)
+        if _drf(individuals, lookups) != _fast(individuals, lookups):
+            raise AssertionError("Fast serializers output doesn't match DRF.")
+
+        number = max(1, 2000 // size)
+        drf = timeit.timeit(lambda: _drf(individuals, lookups), number=number)
+        fast = timeit.timeit(lambda: _fast(individuals, lookups), number=number)
+        print(
+            f"org size {size:>5}, {lookups} lookup(s): "
+            f"drf {drf / number * 1000:8.2f}ms, "
+            f"fast {fast / number * 1000:8.2f}ms, "
+            f"speedup x{drf / fast:.1f}"
+        )
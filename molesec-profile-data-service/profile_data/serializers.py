@@ -12,6 +12,7 @@ from drf_spectacular.utils import inline_serializer
 from rest_framework import exceptions as rf_exceptions
 from rest_framework import serializers
 
+from profile_data import changes as pd_changes
 from profile_data import errors as pd_errors
 from profile_data import models as pd_models
 from profile_data import types as pd_types
@@ -131,6 +132,12 @@ class OrganizationPUTSerializer(serializers.Serializer):
     languages = LanguageListSerializer(required=False)
 
 
+class OrganizationDeletionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = pd_models.OrganizationDeletion
+        exclude = ["id"]
+
+
 class IndividualHandleSerializer(serializers.ModelSerializer):
     class Meta:
         model = pd_models.IndividualHandle
@@ -166,3 +173,30 @@ class IndividualSerializerWithOrg(IndividualSerializerWithHandles):
     class Meta:
         model = pd_models.Individual
         fields = "__all__"
+
+
+class ProfileDataChangeQuerySerializer(serializers.Serializer):
+    # Omit to get the current cursor, without any change.
+    cursor = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=pd_changes.MAX_CHANGES_PER_PAGE,
+        default=pd_changes.MAX_CHANGES_PER_PAGE,
+    )
+
+
+class ProfileDataChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    organization_id = serializers.UUIDField()
+    individual_id = serializers.UUIDField(allow_null=True)
+    model = serializers.ChoiceField(choices=pd_models.ChangedModel.choices)
+    operation = serializers.ChoiceField(choices=pd_models.ChangeOperation.choices)
+    time_created = serializers.DateTimeField()
+    # Current emails of the individual, along with the email of the
+    # handle for changes of email handles.
+    emails = StringListSerializer()
+
+
+class ProfileDataChangesSerializer(serializers.Serializer):
+    changes = ProfileDataChangeSerializer(many=True)
+    cursor = serializers.IntegerField()
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from profile_data import changes
+from profile_data.models import (
+    ChangedModel,
+    ChangeOperation,
+    HandleType,
+    Individual,
+    IndividualHandle,
+    Organization,
+    ProfileDataChange,
+)
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangesTestCase(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Acme")
+        individual = Individual.objects.create(organization=self.org)
+        IndividualHandle.objects.create(
+            organization=self.org,
+            individual=individual,
+            type=HandleType.EMAIL,
+            value="a@acme.com",
+        )
+
+    def test_records_saves(self):
+        feed, cursor = changes.list_changes(0)
+        self.assertEqual(
+            [(c["model"], c["operation"]) for c in feed],
+            [
+                (ChangedModel.ORGANIZATION, ChangeOperation.SAVED),
+                (ChangedModel.INDIVIDUAL, ChangeOperation.SAVED),
+                (ChangedModel.INDIVIDUAL_HANDLE, ChangeOperation.SAVED),
+            ],
+        )
+        self.assertEqual(feed[-1]["emails"], ["a@acme.com"])
+        self.assertEqual(cursor, feed[-1]["id"])
+
+    def test_records_organization_deletion(self):
+        _, cursor = changes.list_changes(0)
+        org_id = self.org.id
+        self.org.delete()
+
+        # A single tombstone, earlier changes survive the deletion.
+        feed, _ = changes.list_changes(cursor)
+        self.assertEqual(len(feed), 1)
+        self.assertEqual(feed[0]["organization_id"], org_id)
+        self.assertEqual(feed[0]["model"], ChangedModel.ORGANIZATION)
+        self.assertEqual(feed[0]["operation"], ChangeOperation.DELETED)
+        self.assertEqual(
+            ProfileDataChange.objects.filter(organization_id=org_id).count(), 4
+        )
+
+    @override_settings(CHANGE_FEED_RETENTION_DAYS=30)
+    def test_prunes_expired_changes(self):
+        expired = ProfileDataChange.objects.order_by("id").first()
+        ProfileDataChange.objects.filter(id=expired.id).update(
+            time_created=timezone.now() - timedelta(days=31)
+        )
+
+        changes.prune_changes()
+
+        self.assertFalse(ProfileDataChange.objects.filter(id=expired.id).exists())
+        self.assertEqual(ProfileDataChange.objects.count(), 2)
@@ -0,0 +1,106 @@
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from profile_data import deletions
+from profile_data.models import (
+    ChangedModel,
+    ChangeOperation,
+    HandleType,
+    Individual,
+    IndividualHandle,
+    Organization,
+    OrganizationDeletion,
+    OrganizationDeletionStatus,
+    ProfileDataChange,
+)
+
+
+@override_settings(ORGANIZATION_DELETION_CHUNK_SIZE=2)
+class DeletionsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create(username="admin", is_staff=True)
+        )
+        self.org = Organization.objects.create(name="Acme")
+        for i in range(5):
+            individual = Individual.objects.create(organization=self.org)
+            IndividualHandle.objects.create(
+                organization=self.org,
+                individual=individual,
+                type=HandleType.EMAIL,
+                value=f"{i}@acme.com",
+            )
+
+    def delete(self, organization_id):
+        return self.client.delete(
+            f"/api/v1/organizations/{organization_id}", secure=True
+        )
+
+    def get_deletion(self, organization_id):
+        return self.client.get(
+            f"/api/v1/organizations/{organization_id}/deletion", secure=True
+        )
+
+    def test_deletes_in_the_background(self):
+        response = self.delete(self.org.id)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], OrganizationDeletionStatus.PENDING)
+        self.assertEqual(response.json()["deleted_individuals"], 0)
+        self.assertTrue(Organization.objects.filter(id=self.org.id).exists())
+
+        # Gone as far as consumers are concerned.
+        response = self.client.get(
+            f"/api/v1/organizations/{self.org.id}/individuals",
+            {"handles__type": HandleType.EMAIL, "handles__value": "0@acme.com"},
+            secure=True,
+        )
+        self.assertEqual(response.json(), [])
+        tombstone = ProfileDataChange.objects.order_by("id").last()
+        self.assertEqual(tombstone.organization_id, self.org.id)
+        self.assertEqual(tombstone.model, ChangedModel.ORGANIZATION)
+        self.assertEqual(tombstone.operation, ChangeOperation.DELETED)
+
+        # Idempotent.
+        self.assertEqual(self.delete(self.org.id).status_code, 202)
+        self.assertEqual(OrganizationDeletion.objects.count(), 1)
+        self.assertEqual(
+            ProfileDataChange.objects.filter(operation=ChangeOperation.DELETED).count(),
+            1,
+        )
+
+    def test_deletes_in_chunks(self):
+        changes = ProfileDataChange.objects.count()
+        self.delete(self.org.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            deletions.process_organization_deletions()
+
+        # 5 handles then 5 individuals, 2 at a time.
+        chunks = [q["sql"] for q in queries if "LIMIT 2" in q["sql"]]
+        self.assertEqual(len(chunks), 6)
+
+        self.assertFalse(Organization.objects.filter(id=self.org.id).exists())
+        self.assertFalse(Individual.objects.exists())
+        self.assertFalse(IndividualHandle.objects.exists())
+        # The changes of the organization are kept, along with the
+        # tombstones of the request and of the deletion itself.
+        self.assertEqual(ProfileDataChange.objects.count(), changes + 2)
+
+        response = self.get_deletion(self.org.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], OrganizationDeletionStatus.DONE)
+        self.assertEqual(response.json()["deleted_individuals"], 5)
+        self.assertEqual(response.json()["deleted_individual_handles"], 5)
+
+        # Already deleted, unknown organizations have nothing to delete.
+        self.assertEqual(self.delete(self.org.id).status_code, 202)
+        self.assertEqual(self.delete(uuid4()).status_code, 200)
+
+    def test_status_of_unknown_deletion(self):
+        self.assertEqual(self.get_deletion(self.org.id).status_code, 404)
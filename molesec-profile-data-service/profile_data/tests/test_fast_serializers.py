@@ -0,0 +1,68 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from app.renderers import ORJSONRenderer
+from profile_data import fast_serializers as pd_fast_serializers
+from profile_data import serializers as pd_serializers
+from profile_data.models import (
+    HandleType,
+    Individual,
+    IndividualHandle,
+    LanguageCode,
+    Organization,
+)
+
+
+class FastSerializersTestCase(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name="Acme",
+            industry=None,
+            timezone="Europe/Amsterdam",
+            domains=["acme.com", "acme.io"],
+            languages=[LanguageCode.EN],
+        )
+        self.individual = Individual.objects.create(
+            organization=self.org,
+            first_name="Jürgen",
+            last_name=None,
+            date_of_birth=date(1990, 1, 2),
+            languages=[LanguageCode.EN, LanguageCode.NL],
+        )
+        for value in ["b@acme.com", "a@acme.com"]:
+            IndividualHandle.objects.create(
+                organization=self.org,
+                individual=self.individual,
+                type=HandleType.EMAIL,
+                value=value,
+                provided_by_org=value.startswith("a"),
+            )
+        # Dates as they come out of the db.
+        self.org.refresh_from_db()
+        self.individual = (
+            Individual.objects.with_handles().order_by("id").get(id=self.individual.id)
+        )
+
+    def assertRendersSame(self, fast, drf):
+        self.assertEqual(ORJSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_organization_to_dict(self):
+        self.assertRendersSame(
+            pd_fast_serializers.organization_to_dict(self.org),
+            pd_serializers.OrganizationSerializer(self.org).data,
+        )
+
+    def test_email_handle_to_dict(self):
+        handle = self.individual.handles.all()[0]
+        self.assertRendersSame(
+            pd_fast_serializers.email_handle_to_dict(handle),
+            pd_serializers.EmailHandleSerializer(handle).data,
+        )
+
+    def test_individual_with_handles_to_dict(self):
+        self.assertRendersSame(
+            pd_fast_serializers.individual_with_handles_to_dict(self.individual),
+            pd_serializers.IndividualSerializerWithHandles(self.individual).data,
+        )
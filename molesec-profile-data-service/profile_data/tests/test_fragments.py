@@ -0,0 +1,116 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from profile_data import fragments
+from profile_data import serializers as pd_serializers
+from profile_data.models import (
+    HandleType,
+    Individual,
+    IndividualHandle,
+    LanguageCode,
+    Organization,
+)
+
+
+class FragmentsTestCase(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(
+            name="Acme",
+            industry="Software",
+            timezone="Europe/Amsterdam",
+            domains=["acme.com"],
+            languages=[LanguageCode.EN],
+        )
+        self.individuals = [self._create_individual(self.org, i) for i in range(3)]
+
+    def _create_individual(self, org, i):
+        individual = Individual.objects.create(
+            organization=org,
+            first_name=f"Jürgen{i}",
+            last_name=f"Last{i}",
+            date_of_birth=date(1990, 1, 1 + i),
+            languages=[LanguageCode.EN, LanguageCode.NL],
+            role_title="Engineer",
+        )
+        IndividualHandle.objects.create(
+            organization=org,
+            individual=individual,
+            type=HandleType.EMAIL,
+            value=f"{i}@acme.com",
+        )
+        return individual
+
+    def _drf(self, individual):
+        individuals = (
+            Individual.objects.filter(organization=individual.organization)
+            .with_handles(HandleType.EMAIL)
+            .order_by("time_created", "id")
+        )
+        record = next(i for i in individuals if i.id == individual.id)
+        record.peers = [i for i in individuals if i.id != individual.id]
+        data = pd_serializers.IndividualSerializerWithOrg([record], many=True).data
+        return JSONRenderer().render(data).decode("utf-8")
+
+    def test_matches_drf(self):
+        sole = Organization.objects.create(name="Solo")
+        sole_individual = self._create_individual(sole, 0)
+
+        for fast in [False, True]:
+            with override_settings(FAST_JSON_RENDERING=fast):
+                fragments.invalidate_organization(self.org.id)
+                fragments.invalidate_organization(sole.id)
+                # First, middle and last of the organization, and the
+                # only one of another.
+                for individual in [*self.individuals, sole_individual]:
+                    with self.subTest(fast=fast, individual=individual.first_name):
+                        self.assertEqual(
+                            fragments.render_individuals_with_org(
+                                individual.organization_id, [individual.id]
+                            ),
+                            self._drf(individual),
+                        )
+
+    def test_renders_several_individuals(self):
+        first, _, last = self.individuals
+        rendered = fragments.render_individuals_with_org(
+            self.org.id, [last.id, first.id]
+        )
+        self.assertEqual(
+            rendered, f"[{self._drf(last)[1:-1]},{self._drf(first)[1:-1]}]"
+        )
+        self.assertEqual(fragments.render_individuals_with_org(self.org.id, []), "[]")
+
+    def test_invalidates_on_changes(self):
+        first, second, last = self.individuals
+        org_id = self.org.id
+
+        def render():
+            return fragments.render_individuals_with_org(org_id, [first.id])
+
+        render()
+        # Served from the cache.
+        with self.assertNumQueries(0):
+            render()
+
+        second.first_name = "Renamed"
+        second.save()
+        self.assertEqual(render(), self._drf(first))
+        self.assertIn("Renamed", render())
+
+        IndividualHandle.objects.get(value="2@acme.com").delete()
+        self.assertEqual(render(), self._drf(first))
+        self.assertNotIn("2@acme.com", render())
+
+        last.delete()
+        self.assertEqual(render(), self._drf(first))
+        self.assertNotIn(str(last.id), render())
+
+        self.org.name = "Acme Inc"
+        self.org.save()
+        self.assertEqual(render(), self._drf(first))
+        self.assertIn("Acme Inc", render())
+
+        self.org.delete()
+        self.assertEqual(render(), "[]")
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from profile_data.models import HandleType, Individual, IndividualHandle, Organization
+
+
+class HandlesTestCase(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Acme")
+        self.individual = Individual.objects.create(organization=self.org)
+        IndividualHandle.objects.create(
+            organization=self.org,
+            individual=self.individual,
+            type=HandleType.EMAIL,
+            value="Ada.Lovelace@acme.com",
+        )
+
+    def test_matching_ignores_case(self):
+        for value in ["ada.lovelace@acme.com", "ADA.LOVELACE@ACME.COM"]:
+            handles = IndividualHandle.objects.matching(value)
+            self.assertEqual([h.individual_id for h in handles], [self.individual.id])
+        self.assertFalse(IndividualHandle.objects.matching("ada@acme.com").exists())
+
+    def test_api_filter_ignores_case(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username="admin", is_staff=True))
+
+        response = client.get(
+            f"/api/v1/organizations/{self.org.id}/individuals",
+            {
+                "handles__type": HandleType.EMAIL,
+                "handles__value": "aDa.LoVeLaCe@acme.com",
+            },
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([i["id"] for i in response.json()], [str(self.individual.id)])
+        # Found, not inferred again.
+        self.assertEqual(IndividualHandle.objects.count(), 1)
+
+    def test_values_are_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError):
+            IndividualHandle.objects.create(
+                organization=self.org,
+                individual=Individual.objects.create(organization=self.org),
+                type=HandleType.EMAIL,
+                value="ada.lovelace@ACME.com",
+            )